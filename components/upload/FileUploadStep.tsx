@@ -34,31 +34,67 @@ export function FileUploadStep({ onNext }: FileUploadStepProps) {
       const formData = new FormData()
       formData.append("file", file)
 
-      const response = await fetch(`${API_URL}/upload`, {
+      const response = await fetch(`${API_URL}/upload/stream`, {
         method: "POST",
         body: formData,
         credentials: 'include',
         headers: {
-          'Accept': 'application/json',
+          'Accept': 'application/x-ndjson',
         },
         mode: 'cors'
       })
 
-      if (!response.ok) {
-        throw new Error("Failed to upload file")
+      if (!response.ok || !response.body) {
+        // Uploads rejected before streaming (unsupported type, too large, too many pages) carry a detail message
+        const error = await response.json().catch(() => null)
+        throw new Error(error?.detail || "Failed to upload file")
       }
 
-      const data = await response.json()
-      
-      // console.log(data.originalText)
-      console.log(data.enhancedData)
-      setOriginalText(data.originalText)
-      setParsedData(data.enhancedData)
+      // The service streams one JSON event per line as each stage completes
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
+      // The final event: APIResponse fields (enhancedData, enhanced, degraded) plus timings
+      let result = null
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        const lines = buffer.split("\n")
+        buffer = lines.pop() ?? ""
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.event === "originalText") {
+            setOriginalText(event.originalText)
+            setIsParsing(true)
+          } else if (event.event === "enhancedData") {
+            result = event
+          } else if (event.event === "error") {
+            throw new Error(event.detail)
+          }
+        }
+      }
 
-      toast({
-        title: "File uploaded successfully",
-        description: "Your resume has been parsed and is ready for review.",
-      })
+      if (!result) {
+        throw new Error("Upload stream ended before the resume was enhanced")
+      }
+      setParsedData(result.enhancedData)
+
+      if (result.enhanced === false) {
+        // The service fell back to its local parse; it is rougher, so ask for a review
+        toast({
+          title: "Parsed without AI enhancement",
+          description: `${result.degraded?.detail ?? "AI enhancement is unavailable."} Please review the extracted details.`,
+        })
+      } else {
+        toast({
+          title: "File uploaded successfully",
+          description: "Your resume has been parsed and is ready for review.",
+        })
+      }
 
       // Auto-advance to next step
       setTimeout(() => {
@@ -74,6 +110,7 @@ export function FileUploadStep({ onNext }: FileUploadStepProps) {
       })
     } finally {
       setIsUploading(false)
+      setIsParsing(false)
     }
   }
 
@@ -2,20 +2,17 @@
 ATS scoring module using NLP techniques for resume analysis
 """
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import spacy
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 import numpy as np
+from collections import Counter
 from typing import Dict, List, Tuple
+import math
 import re
 
-# Load English language model for NLP
-try:
-    nlp = spacy.load("en_core_web_sm")
-except:
-    import os
-    os.system("python -m spacy download en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+from idf_model import get_idf_model
+from jd_cache import JobDescriptionAnalysis, get_jd_cache, get_jd_registry, job_description_id
+from metrics import timed
+from skills import get_skill_matcher
 
 def preprocess_text(text: str) -> str:
     """
@@ -29,56 +26,118 @@ def preprocess_text(text: str) -> str:
     text = ' '.join(text.split())
     return text
 
-def calculate_tf_idf_score(resume_text: str, job_description: str) -> float:
+_analyzer = None
+
+def count_terms(processed_text: str) -> Dict[str, int]:
     """
-    Calculate TF-IDF based similarity score between resume and job description
+    Term counts using the same tokenization and stop words as TfidfVectorizer(stop_words='english')
     """
-    # Preprocess texts
-    resume_text = preprocess_text(resume_text)
-    job_description = preprocess_text(job_description)
-    
-    # Create TF-IDF vectorizer
-    vectorizer = TfidfVectorizer(stop_words='english')
-    
-    # Calculate TF-IDF matrices
-    try:
-        tfidf_matrix = vectorizer.fit_transform([job_description, resume_text])
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        
-        # Convert to percentage and round to 2 decimal places
-        return round(similarity * 100, 2)
-    except:
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = CountVectorizer(stop_words='english').build_analyzer()
+    return dict(Counter(_analyzer(processed_text)))
+
+def _pair_tfidf_similarity(job_counts: Dict[str, int], resume_counts: Dict[str, int]) -> float:
+    """
+    Cosine similarity identical to fitting TfidfVectorizer on just the two documents,
+    computed from term counts so the job description side can be cached
+    """
+    # Smoothed IDF with n=2: a term in both documents gets 1, a term in one gets ln(3/2) + 1
+    single_idf = math.log(1.5) + 1
+
+    def weights(counts: Dict[str, int], other: Dict[str, int]) -> Dict[str, float]:
+        return {term: count * (1.0 if term in other else single_idf) for term, count in counts.items()}
+
+    job_weights = weights(job_counts, resume_counts)
+    resume_weights = weights(resume_counts, job_counts)
+    job_norm = math.sqrt(sum(w * w for w in job_weights.values()))
+    resume_norm = math.sqrt(sum(w * w for w in resume_weights.values()))
+    if not job_norm or not resume_norm:
         return 0.0
+    dot = sum(weight * resume_weights[term] for term, weight in job_weights.items() if term in resume_weights)
+    return dot / (job_norm * resume_norm)
+
+@timed("jd_analysis")
+def analyze_job_description(job_description: str) -> JobDescriptionAnalysis:
+    """
+    Preprocess, count terms and extract skills for a job description, reusing the shared cache
+    """
+    processed = preprocess_text(job_description)
+    jd_id = job_description_id(processed)
+    cache = get_jd_cache()
+    analysis = cache.get(jd_id)
+    if analysis is None:
+        analysis = JobDescriptionAnalysis(
+            id=jd_id,
+            processed_text=processed,
+            term_counts=count_terms(processed),
+            skills=frozenset(extract_skills(job_description)),
+        )
+        cache.put(analysis)
+    return analysis
+
+def analyze_and_register(job_description: str) -> JobDescriptionAnalysis:
+    """
+    Analyse a job description and record its text in the shared registry, so the id
+    resolves on every worker. Only explicit registrations are recorded; ad-hoc scoring
+    requests stay in the per-process cache.
+    """
+    analysis = analyze_job_description(job_description)
+    get_jd_registry().put(analysis.id, job_description)
+    return analysis
+
+def get_job_description(jd_id: str) -> JobDescriptionAnalysis:
+    """
+    Look up a previously analysed job description by id, re-analysing it from the
+    shared registry when another worker issued the id or it was evicted here.
+    Raises KeyError if it was never registered or has expired.
+    """
+    analysis = get_jd_cache().get(jd_id)
+    if analysis is None:
+        text = get_jd_registry().get(jd_id)
+        if text is None:
+            raise KeyError(jd_id)
+        analysis = analyze_job_description(text)
+    return analysis
+
+def content_relevance(resume_text: str, job: JobDescriptionAnalysis) -> float:
+    """
+    TF-IDF similarity between a resume and an analysed job description, as a percentage.
+    Uses the corpus-fitted IDF model when one is configured, otherwise pairwise IDF.
+    """
+    idf_model = get_idf_model()
+    if idf_model is not None:
+        try:
+            resume_vector = idf_model.transform([resume_text])
+            if job.idf_generation != idf_model.n_docs or job.idf_vector.shape != resume_vector.shape:
+                job.idf_vector = idf_model.transform([job.processed_text])
+                job.idf_generation = idf_model.n_docs
+            similarity = job.idf_vector.multiply(resume_vector).sum()
+            return round(float(similarity) * 100, 2)
+        except ValueError:
+            return 0.0
+
+    similarity = _pair_tfidf_similarity(job.term_counts, count_terms(preprocess_text(resume_text)))
+    return round(similarity * 100, 2)
+
+def calculate_tf_idf_score(resume_text: str, job_description: str) -> float:
+    """
+    Calculate TF-IDF based similarity score between resume and job description.
+    Uses the corpus-fitted IDF model when one is configured, otherwise fits on the pair.
+    """
+    return content_relevance(resume_text, analyze_job_description(job_description))
 
 def extract_skills(text: str) -> List[str]:
     """
-    Extract skills from text using NLP
+    Extract skills from text using the compiled skill matcher
     """
-    # Common technical skills and keywords
-    common_skills = {
-        'python', 'javascript', 'java', 'c++', 'ruby', 'php', 'swift', 'kotlin',
-        'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask',
-        'sql', 'mongodb', 'postgresql', 'mysql', 'redis', 'elasticsearch',
-        'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'git',
-        'machine learning', 'artificial intelligence', 'data science', 'blockchain',
-        'devops', 'ci/cd', 'agile', 'scrum', 'rest api', 'graphql'
-    }
-    
-    # Process the text
-    doc = nlp(text.lower())
-    
-    # Extract noun phrases and technical terms
-    extracted_skills = set()
-    for token in doc:
-        if token.text in common_skills:
-            extracted_skills.add(token.text)
-    for ent in doc.ents:
-        if ent.text.lower() in common_skills:
-            extracted_skills.add(ent.text.lower())
-    
-    return list(extracted_skills)
+    return get_skill_matcher().extract(text)
+
+def extract_skills_batch(texts: List[str]) -> List[List[str]]:
+    """
+    Extract skills from many texts in one tokenizer pass
+    """
+    return get_skill_matcher().extract_batch(texts)
 
 def find_skill_matches(resume_text: str, job_description: str) -> Tuple[List[str], List[str]]:
     """
@@ -98,12 +157,30 @@ def calculate_ats_score(resume_text: str, job_description: str) -> Dict:
     """
     Calculate comprehensive ATS score including keyword matches and content relevance
     """
+    return calculate_ats_score_for_job(resume_text, analyze_job_description(job_description))
+
+def calculate_ats_score_for_job(resume_text: str, job: JobDescriptionAnalysis) -> Dict:
+    """
+    Score a resume against an already analysed (usually cached) job description
+    """
     # Calculate base similarity score
-    base_score = calculate_tf_idf_score(resume_text, job_description)
+    with timed("score_relevance"):
+        base_score = content_relevance(resume_text, job)
     
     # Find skill matches
-    matched_skills, missing_skills = find_skill_matches(resume_text, job_description)
+    with timed("score_skills"):
+        resume_skills = set(extract_skills(resume_text))
+    matched_skills = list(resume_skills & job.skills)
+    missing_skills = list(job.skills - resume_skills)
     
+    result = combine_scores(base_score, matched_skills, missing_skills)
+    result["jobDescriptionId"] = job.id
+    return result
+
+def combine_scores(base_score: float, matched_skills: List[str], missing_skills: List[str]) -> Dict:
+    """
+    Blend content relevance and skill coverage into the ATS score payload
+    """
     # Calculate skill match percentage
     total_required_skills = len(matched_skills) + len(missing_skills)
     skill_match_score = len(matched_skills) / total_required_skills * 100 if total_required_skills > 0 else 0
@@ -124,3 +201,57 @@ def calculate_ats_score(resume_text: str, job_description: str) -> Dict:
             "skillsMissing": len(missing_skills)
         }
     }
+
+@timed("score_batch")
+def calculate_ats_scores_batch(resumes: List[str], job_descriptions: List[str], top_k: int = None) -> List[Dict]:
+    """
+    Score every resume against every job description in one pass.
+
+    All documents are vectorized once (by the corpus IDF model if configured, else a
+    single TF-IDF fit over the batch), similarities come from one
+    sparse matrix product, and skills are extracted once per unique document.
+    Returns results ranked by score, each tagged with resumeIndex/jobDescriptionIndex.
+    """
+    if not resumes or not job_descriptions:
+        return []
+
+    # Deduplicate documents so repeated texts are processed once
+    unique_texts: Dict[str, int] = {}
+    for text in list(job_descriptions) + list(resumes):
+        unique_texts.setdefault(text, len(unique_texts))
+    texts = list(unique_texts)
+
+    idf_model = get_idf_model()
+    try:
+        if idf_model is not None:
+            tfidf_matrix = idf_model.transform(texts)
+        else:
+            processed = [preprocess_text(text) for text in texts]
+            tfidf_matrix = TfidfVectorizer(stop_words='english').fit_transform(processed)
+        job_rows = tfidf_matrix[[unique_texts[text] for text in job_descriptions]]
+        resume_rows = tfidf_matrix[[unique_texts[text] for text in resumes]]
+        # Rows are L2-normalised, so the dot product is the cosine similarity
+        similarities = (resume_rows @ job_rows.T).toarray()
+    except ValueError:
+        # Empty vocabulary (e.g. only stop words)
+        similarities = np.zeros((len(resumes), len(job_descriptions)))
+
+    skills = [set(found) for found in extract_skills_batch(texts)]
+
+    results = []
+    for resume_index, resume_text in enumerate(resumes):
+        resume_skills = skills[unique_texts[resume_text]]
+        for job_index, job_description in enumerate(job_descriptions):
+            job_skills = skills[unique_texts[job_description]]
+            base_score = round(float(similarities[resume_index, job_index]) * 100, 2)
+            result = combine_scores(
+                base_score,
+                list(resume_skills & job_skills),
+                list(job_skills - resume_skills),
+            )
+            result["resumeIndex"] = resume_index
+            result["jobDescriptionIndex"] = job_index
+            results.append(result)
+
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:top_k] if top_k else results
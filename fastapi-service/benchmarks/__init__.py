@@ -0,0 +1,10 @@
+"""
+Benchmarks for the resume service. Run from the fastapi-service directory, e.g.
+
+    python -m benchmarks.run --check benchmarks/baselines/default.json
+    python -m benchmarks.bench_enhance
+
+Suites: bench_micro (detection, PDF extraction, OCR, scoring), bench_e2e (/upload and
+/ats-score with a stubbed Gemini) and bench_enhance (single vs two-pass enhancement).
+The corpus is generated deterministically by benchmarks.corpus.
+"""
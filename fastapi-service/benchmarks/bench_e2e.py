@@ -0,0 +1,78 @@
+"""
+End-to-end benchmarks of /upload, /ats-score and /check-ats through the FastAPI
+app, with Gemini stubbed in-process so runs are offline and deterministic. The
+extraction cache is cleared before every upload so each one parses its file.
+
+    python -m benchmarks.bench_e2e --repeat 5 --latency 0
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Dict, List
+
+from benchmarks.corpus import JOB_DESCRIPTION, CorpusDocument, generate_corpus
+from benchmarks.harness import measure, skipped, tesseract_available
+
+def run(documents: List[CorpusDocument], repeat: int = 5, latency: float = 0.0) -> Dict[str, Dict]:
+    os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+    from fastapi.testclient import TestClient
+
+    from extraction_cache import get_extraction_cache
+    from fake_gemini import FakeTransport
+    from gemini_client import GeminiClient, set_gemini_client
+    import main
+
+    # Per-request INFO logging would otherwise add listener-thread work to the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    set_gemini_client(GeminiClient(FakeTransport(latency=latency), max_retries=0))
+    cache = get_extraction_cache()
+    has_tesseract = tesseract_available()
+    results: Dict[str, Dict] = {}
+
+    try:
+        with TestClient(main.app) as client:
+            def upload(document: CorpusDocument) -> None:
+                cache.clear()
+                response = client.post("/upload", files={"file": (document.name, document.content, document.file_type)})
+                response.raise_for_status()
+
+            for document in documents:
+                if document.kind != "text-pdf" and not has_tesseract:
+                    results[f"upload[{document.name}]"] = skipped("tesseract not installed")
+                    continue
+                results[f"upload[{document.name}]"] = measure(lambda: upload(document), repeat=repeat)
+
+            sample = next(document for document in documents if document.kind == "text-pdf")
+            resume_text = client.post(
+                "/upload", files={"file": (sample.name, sample.content, sample.file_type)}
+            ).json()["originalText"]
+
+            def ats_score() -> None:
+                response = client.post("/ats-score", json={"resumeData": resume_text, "jobDescription": JOB_DESCRIPTION})
+                response.raise_for_status()
+
+            results["ats-score"] = measure(ats_score, repeat=repeat)
+
+            def check_ats() -> None:
+                cache.clear()
+                response = client.post(
+                    "/check-ats",
+                    files={"file": (sample.name, sample.content, sample.file_type)},
+                    data={"job_description": JOB_DESCRIPTION},
+                )
+                response.raise_for_status()
+
+            results[f"check-ats[{sample.name}]"] = measure(check_ats, repeat=repeat)
+    finally:
+        set_gemini_client(None)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stubbed seconds per Gemini generation")
+    args = parser.parse_args()
+    print(json.dumps(run(generate_corpus(args.seed), args.repeat, args.latency), indent=2))
@@ -0,0 +1,81 @@
+"""
+Compare single-request and two-pass resume enhancement against a stubbed Gemini model.
+
+The stub sleeps a fixed time per generation, so the difference between modes is the
+number of round trips plus local parsing/validation overhead. As a suite of
+benchmarks.run the stub answers instantly, so the timings track local overhead only.
+
+    python -m benchmarks.bench_enhance --latency 0.5 --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.harness import measure
+from fake_gemini import FakeTransport
+from gemini_client import GeminiClient, set_gemini_client
+import gemini
+
+SAMPLE_RESUME_TEXT = """Jane Doe
+jane.doe@example.com | +1 555 0100 | Springfield
+Summary
+Backend engineer with 6 years of experience building Python services.
+Experience
+Acme Corp - Senior Software Engineer (2020 - Present)
+Worked on the migration of billing services to Kubernetes.
+Education
+State University - B.Sc. Computer Science (2014 - 2018)
+Skills
+Python, FastAPI, PostgreSQL, Docker, Kubernetes, AWS
+"""
+
+async def _time_mode(mode: str, runs: int, latency: float) -> Dict:
+    transport = FakeTransport(latency=latency)
+    set_gemini_client(GeminiClient(transport, max_retries=0))
+    timings: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await gemini.enhance_resume_with_ai(SAMPLE_RESUME_TEXT, mode=mode)
+        timings.append(time.perf_counter() - start)
+        if "error" in result:
+            raise RuntimeError(f"{mode} enhancement failed: {result['error']}")
+    return {
+        "mode": mode,
+        "runs": runs,
+        "model_calls_per_run": transport.calls / runs,
+        "mean_s": statistics.mean(timings),
+        "p50_s": statistics.median(timings),
+        "max_s": max(timings),
+    }
+
+def run(documents, repeat: int = 5, latency: float = 0.0) -> Dict[str, Dict]:
+    """Suite entry point for benchmarks.run; the corpus is unused, enhancement works on text"""
+    results: Dict[str, Dict] = {}
+    try:
+        for mode in ("two-pass", "single"):
+            transport = FakeTransport(latency=latency)
+            set_gemini_client(GeminiClient(transport, max_retries=0))
+            results[mode] = measure(
+                lambda: asyncio.run(gemini.enhance_resume_with_ai(SAMPLE_RESUME_TEXT, mode=mode)), repeat=repeat
+            )
+    finally:
+        set_gemini_client(None)
+    return results
+
+def compare_modes(runs: int = 5, latency: float = 0.25) -> Dict:
+    results = {mode: asyncio.run(_time_mode(mode, runs, latency)) for mode in ("two-pass", "single")}
+    results["saving_s"] = results["two-pass"]["mean_s"] - results["single"]["mean_s"]
+    results["stub_latency_s"] = latency
+    set_gemini_client(None)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.25, help="Stubbed seconds per Gemini generation")
+    args = parser.parse_args()
+    print(json.dumps(compare_modes(args.runs, args.latency), indent=2))
@@ -0,0 +1,60 @@
+"""
+Micro-benchmarks for detection, PDF extraction, image OCR and ATS scoring on the
+generated corpus. OCR benchmarks are skipped when the tesseract binary is missing.
+
+    python -m benchmarks.bench_micro --repeat 5
+"""
+
+import argparse
+import io
+import json
+from typing import Dict, List
+
+from PIL import Image
+
+from benchmarks.corpus import JOB_DESCRIPTION, CorpusDocument, generate_corpus
+from benchmarks.harness import measure, skipped, tesseract_available
+
+def run(documents: List[CorpusDocument], repeat: int = 5) -> Dict[str, Dict]:
+    from ats_score import calculate_ats_score
+    from pdf_parser import detect_file_type, extract_text_from_image, extract_text_from_pdf
+
+    results: Dict[str, Dict] = {}
+    has_tesseract = tesseract_available()
+
+    results["detect_file_type"] = measure(
+        lambda: [detect_file_type(document.content) for document in documents], repeat=repeat
+    )
+
+    for document in documents:
+        if document.file_type == "application/pdf":
+            if document.kind != "text-pdf" and not has_tesseract:
+                results[f"extract_text_from_pdf[{document.name}]"] = skipped("tesseract not installed")
+                continue
+            results[f"extract_text_from_pdf[{document.name}]"] = measure(
+                lambda: extract_text_from_pdf(document.content), repeat=repeat
+            )
+        else:
+            if not has_tesseract:
+                results[f"extract_text_from_image[{document.name}]"] = skipped("tesseract not installed")
+                continue
+            results[f"extract_text_from_image[{document.name}]"] = measure(
+                lambda: extract_text_from_image(Image.open(io.BytesIO(document.content))), repeat=repeat
+            )
+
+    resumes = {
+        document.name: extract_text_from_pdf(document.content)
+        for document in documents if document.kind == "text-pdf"
+    }
+    for name, text in resumes.items():
+        results[f"calculate_ats_score[{name}]"] = measure(
+            lambda: calculate_ats_score(text, JOB_DESCRIPTION), repeat=repeat
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(generate_corpus(args.seed), args.repeat), indent=2))
@@ -0,0 +1,130 @@
+"""
+Deterministic benchmark corpus: text PDFs, scanned PDFs, mixed PDFs and phone-style
+PNG/JPEG photos of resumes, 1-10 pages. The same seed always yields the same bytes,
+so timings are comparable across runs and machines.
+
+    python -m benchmarks.corpus --out /tmp/resume-corpus
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+from dataclasses import dataclass
+from typing import List
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw, ImageFilter
+
+SKILLS = [
+    "Python", "Java", "TypeScript", "React", "Node.js", "FastAPI", "Django", "PostgreSQL", "MySQL",
+    "MongoDB", "Redis", "Docker", "Kubernetes", "AWS", "GCP", "Terraform", "Kafka", "Spark",
+    "Machine Learning", "CI/CD", "GraphQL", "Linux", "Git", "Agile",
+]
+VERBS = ["Led", "Built", "Designed", "Migrated", "Automated", "Optimized", "Launched", "Scaled", "Reduced", "Improved"]
+OBJECTS = [
+    "billing services", "the data pipeline", "a customer dashboard", "deployment tooling", "search ranking",
+    "the mobile API", "internal analytics", "payment reconciliation", "the onboarding flow", "monitoring and alerting",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises", "Hooli"]
+JOB_DESCRIPTION = """Senior Backend Engineer
+We are looking for a backend engineer with strong Python and FastAPI experience to build
+scalable services on AWS. You will design PostgreSQL schemas, run workloads on Docker and
+Kubernetes, own CI/CD pipelines and mentor other engineers. Experience with Redis, Kafka
+and Terraform is a plus. Strong communication and leadership skills are required."""
+
+@dataclass
+class CorpusDocument:
+    name: str
+    kind: str  # text-pdf, scanned-pdf, mixed-pdf, photo-png, photo-jpeg
+    file_type: str
+    pages: int
+    content: bytes
+
+def resume_lines(rng: random.Random, pages: int) -> List[List[str]]:
+    """Plausible resume text, split into roughly one page of lines per page"""
+    lines = [
+        f"Candidate {rng.randint(1000, 9999)}",
+        f"candidate{rng.randint(1, 999)}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "Summary",
+        f"Engineer with {rng.randint(2, 15)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.",
+        "Skills",
+        ", ".join(rng.sample(SKILLS, 10)),
+        "Experience",
+    ]
+    per_page = 40
+    while len(lines) < per_page * pages:
+        lines.append(f"{rng.choice(COMPANIES)} - Software Engineer ({rng.randint(2010, 2019)} - {rng.randint(2020, 2024)})")
+        for _ in range(4):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}, "
+                         f"cutting costs by {rng.randint(5, 70)}%")
+    return [lines[i:i + per_page] for i in range(0, per_page * pages, per_page)]
+
+def render_text_image(lines: List[str], width: int = 1275, height: int = 1650) -> Image.Image:
+    """A page of text as a grayscale bitmap (150 DPI letter size by default)"""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for row, line in enumerate(lines):
+        draw.text((60, 60 + row * 38), line, fill=0)
+    return image
+
+def _image_bytes(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    options = {"quality": 85} if fmt == "JPEG" else {}
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+def build_pdf(page_lines: List[List[str]], scanned_pages: set) -> bytes:
+    doc = fitz.open()
+    for index, lines in enumerate(page_lines):
+        page = doc.new_page()
+        if index in scanned_pages:
+            page.insert_image(page.rect, stream=_image_bytes(render_text_image(lines), "PNG"))
+        else:
+            for row, line in enumerate(lines):
+                page.insert_text((50, 50 + row * 18), line, fontsize=10)
+    # No dates or random file ID, so the bytes only depend on the seed
+    doc.set_metadata({})
+    data = doc.tobytes(no_new_id=True)
+    doc.close()
+    return data
+
+def build_photo(lines: List[str], rng: random.Random, fmt: str) -> bytes:
+    """A slightly rotated, blurred, phone-sized photo of a printed page"""
+    page = render_text_image(lines, width=2250, height=3000)
+    photo = page.rotate(rng.uniform(-3, 3), expand=True, fillcolor=200).filter(ImageFilter.GaussianBlur(0.8))
+    return _image_bytes(photo.convert("RGB"), fmt)
+
+def generate_corpus(seed: int = 0) -> List[CorpusDocument]:
+    rng = random.Random(seed)
+    documents = []
+    for pages in (1, 3, 10):
+        content = build_pdf(resume_lines(rng, pages), scanned_pages=set())
+        documents.append(CorpusDocument(f"text-{pages}p.pdf", "text-pdf", "application/pdf", pages, content))
+    for pages in (1, 3):
+        content = build_pdf(resume_lines(rng, pages), scanned_pages=set(range(pages)))
+        documents.append(CorpusDocument(f"scanned-{pages}p.pdf", "scanned-pdf", "application/pdf", pages, content))
+    content = build_pdf(resume_lines(rng, 4), scanned_pages={1, 3})
+    documents.append(CorpusDocument("mixed-4p.pdf", "mixed-pdf", "application/pdf", 4, content))
+    documents.append(CorpusDocument("photo.png", "photo-png", "image/png", 1, build_photo(resume_lines(rng, 1)[0], rng, "PNG")))
+    documents.append(CorpusDocument("photo.jpg", "photo-jpeg", "image/jpeg", 1, build_photo(resume_lines(rng, 1)[0], rng, "JPEG")))
+    return documents
+
+def write_corpus(documents: List[CorpusDocument], out_dir: str) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for document in documents:
+        with open(os.path.join(out_dir, document.name), "wb") as f:
+            f.write(document.content)
+        manifest.append({"name": document.name, "kind": document.kind, "fileType": document.file_type,
+                         "pages": document.pages, "bytes": len(document.content)})
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the benchmark corpus to a directory")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_corpus(generate_corpus(args.seed), args.out)
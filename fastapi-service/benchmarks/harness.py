@@ -0,0 +1,96 @@
+"""
+Timing, result and baseline helpers shared by the benchmark suites
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import time
+from typing import Callable, Dict, List
+
+def measure(fn: Callable[[], object], repeat: int = 5, warmup: int = 1) -> Dict:
+    """
+    Time fn() repeat times after warmup calls. GC is disabled while timing so
+    collections triggered by earlier benchmarks do not land in this one.
+    """
+    for _ in range(warmup):
+        fn()
+    timings: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    median = statistics.median(timings)
+    return {
+        "runs": repeat,
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        # Median absolute deviation: the run-to-run spread the regression check allows for
+        "mad_ms": round(statistics.median(abs(t - median) for t in timings) * 1000, 3),
+    }
+
+def skipped(reason: str) -> Dict:
+    return {"skipped": reason}
+
+def tesseract_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+def environment() -> Dict:
+    """What the numbers depend on, recorded next to them"""
+    import fitz
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+        "sklearn": sklearn.__version__,
+        "tesseract": tesseract_available(),
+    }
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_results(results: Dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(results: Dict, baseline: Dict, threshold: float = 0.5, min_delta_ms: float = 2.0,
+            metric: str = "min_ms", noise_factor: float = 3.0) -> List[Dict]:
+    """
+    Compare timings against a baseline. A benchmark regresses when its metric is more
+    than threshold (fractional) slower, at least min_delta_ms slower in absolute terms,
+    and slower by more than noise_factor times the larger run-to-run spread (mad_ms) of
+    the two runs, so a no-change rerun on a busy machine does not fail the check.
+    Benchmarks missing on either side or skipped are ignored.
+    """
+    regressions = []
+    for name, current in sorted(results["benchmarks"].items()):
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous or metric not in previous or metric not in current:
+            continue
+        delta = current[metric] - previous[metric]
+        noise = noise_factor * max(current.get("mad_ms", 0.0), previous.get("mad_ms", 0.0))
+        if delta > max(min_delta_ms, noise) and current[metric] > previous[metric] * (1 + threshold):
+            regressions.append({
+                "benchmark": name,
+                "baseline_ms": previous[metric],
+                "current_ms": current[metric],
+                "slowdown": round(current[metric] / previous[metric], 2),
+            })
+    return regressions
@@ -0,0 +1,71 @@
+"""
+Run every benchmark suite, write the results as JSON and optionally check them
+against a stored baseline. Exits with status 1 when a benchmark regressed.
+
+    python -m benchmarks.run --out bench_results.json
+    python -m benchmarks.run --check benchmarks/baselines/default.json
+    python -m benchmarks.run --save-baseline benchmarks/baselines/default.json
+
+Baselines are machine-specific: record them on the machine (or CI runner class)
+that will run the check.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict
+
+from benchmarks import bench_e2e, bench_enhance, bench_micro
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import compare, environment, load_results, save_results
+
+SUITES = {"micro": bench_micro.run, "e2e": bench_e2e.run, "enhance": bench_enhance.run}
+
+def run(suites=None, repeat: int = 10, seed: int = 0) -> Dict:
+    documents = generate_corpus(seed)
+    benchmarks: Dict[str, Dict] = {}
+    for suite in suites or SUITES:
+        for name, result in SUITES[suite](documents, repeat=repeat).items():
+            benchmarks[f"{suite}.{name}"] = result
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "seed": seed,
+        "repeat": repeat,
+        "environment": environment(),
+        "benchmarks": benchmarks,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the resume service benchmarks")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Suite to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--save-baseline", help="Also store the results as a baseline at this path")
+    parser.add_argument("--check", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed fractional slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--noise-factor", type=float, default=3.0,
+                        help="Ignore slowdowns within this many median absolute deviations")
+    parser.add_argument("--metric", default="min_ms", choices=["median_ms", "min_ms", "p95_ms", "mean_ms"],
+                        help="Statistic to compare; min_ms is the least noisy on shared machines")
+    args = parser.parse_args()
+
+    results = run(args.suite, args.repeat, args.seed)
+    if args.out:
+        save_results(results, args.out)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    if args.save_baseline:
+        save_results(results, args.save_baseline)
+
+    if args.check:
+        regressions = compare(results, load_results(args.check), args.threshold, args.min_delta_ms, args.metric,
+                              args.noise_factor)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']}: {regression['baseline_ms']}ms -> "
+                  f"{regression['current_ms']}ms ({regression['slowdown']}x)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.check}", file=sys.stderr)
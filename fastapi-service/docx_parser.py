@@ -0,0 +1,175 @@
+"""
+Native DOCX text extraction.
+
+Reads the parts straight from the zip and walks them with iterparse, clearing
+elements as they are consumed, so no DOM of the document is ever built. Extracts
+body paragraphs, tables (one line per row, cells separated by " | "), text boxes
+and headers/footers. A DOCX takes milliseconds this way, where converting it to
+PDF or an image and OCRing it takes seconds.
+"""
+
+import io
+import logging
+import os
+import re
+import zipfile
+from typing import IO, Iterator, List, Union
+from xml.etree.ElementTree import ParseError, iterparse
+
+logger = logging.getLogger(__name__)
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOCUMENT_PART = "word/document.xml"
+# Upper bound on the uncompressed XML we are willing to parse (zip bomb guard)
+MAX_DOCX_XML_BYTES = int(os.getenv("MAX_DOCX_XML_BYTES", str(50 * 1024 * 1024)))
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_HEADER_FOOTER_PART = re.compile(r"word/(header|footer)\d*\.xml")
+
+ZIP_MIME = "application/zip"
+
+def is_zip(head: bytes) -> bool:
+    """Zip signature on the first bytes of a file; DOCX files are zips"""
+    return head.startswith(b"PK\x03\x04")
+
+def looks_like_docx(source: Union[bytes, str, IO[bytes]]) -> bool:
+    """
+    Whether a whole zip (bytes, path or seekable file) has a main document part.
+    Part order varies between writers, so the zip directory is read, not the first bytes.
+    The size limits are checked by validate_docx.
+    """
+    try:
+        with _open_zip(source) as archive:
+            return DOCUMENT_PART in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+def _open_zip(source: Union[bytes, str, IO[bytes]]) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _text_parts(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    parts = [info for info in archive.infolist() if _HEADER_FOOTER_PART.fullmatch(info.filename)]
+    parts.sort(key=lambda info: info.filename)
+    return parts + [archive.getinfo(DOCUMENT_PART)]
+
+def validate_docx(source: Union[bytes, str]) -> None:
+    """
+    Raise ValueError unless this is a zip with a main document part whose XML
+    stays within MAX_DOCX_XML_BYTES uncompressed
+    """
+    try:
+        with _open_zip(source) as archive:
+            if DOCUMENT_PART not in archive.namelist():
+                raise ValueError("not a Word document (no word/document.xml)")
+            size = sum(info.file_size for info in _text_parts(archive))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"not a valid DOCX archive: {str(e)}")
+    if size > MAX_DOCX_XML_BYTES:
+        raise ValueError(f"document XML is {size} bytes uncompressed; at most {MAX_DOCX_XML_BYTES} are supported")
+
+def iter_part_lines(stream: IO[bytes]) -> Iterator[str]:
+    """
+    Yield the text lines of one WordprocessingML part: a line per paragraph and per
+    table row. Text boxes nested in a paragraph come out before it. The VML copies
+    of text boxes (mc:Fallback) are skipped so their text is not repeated.
+    """
+    paragraphs: List[List[str]] = []  # open paragraphs; text boxes nest them
+    rows: List[List[str]] = []        # cells of the open row, per table depth
+    cells: List[List[str]] = []       # lines of the open cell, per table depth
+    in_run = 0
+    skipping = 0
+    pending: List[str] = []
+
+    def emit(line: str) -> None:
+        if cells:
+            cells[-1].append(line)
+        else:
+            pending.append(line)
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == _MC_FALLBACK:
+            skipping += 1 if event == "start" else -1
+        if skipping:
+            if event == "end":
+                elem.clear()
+            continue
+
+        if event == "start":
+            if tag == _W + "p":
+                paragraphs.append([])
+            elif tag == _W + "r":
+                in_run += 1
+            elif tag == _W + "tr":
+                rows.append([])
+            elif tag == _W + "tc":
+                cells.append([])
+            continue
+
+        if tag == _W + "t":
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == _W + "tab" and in_run and paragraphs:
+            paragraphs[-1].append("\t")
+        elif tag in (_W + "br", _W + "cr") and in_run and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == _W + "r":
+            in_run -= 1
+        elif tag == _W + "p":
+            emit("".join(paragraphs.pop()).rstrip())
+        elif tag == _W + "tc":
+            cell = " ".join(line.strip() for line in cells.pop() if line.strip())
+            if rows:
+                rows[-1].append(cell)
+        elif tag == _W + "tr":
+            row = [cell for cell in rows.pop() if cell]
+            if row:
+                emit(" | ".join(row))
+        elem.clear()
+
+        if pending:
+            yield from pending
+            pending.clear()
+
+def extract_text_from_docx(source: Union[bytes, str]) -> str:
+    """
+    Extract the text of a DOCX from its bytes or a path: headers, the body (with
+    tables and text boxes), then footers. Header/footer lines repeated across
+    sections are kept once, and runs of blank lines are collapsed.
+    """
+    try:
+        with _open_zip(source) as archive:
+            parts = _text_parts(archive)
+            header_lines: List[str] = []
+            body_lines: List[str] = []
+            footer_lines: List[str] = []
+            for info in parts:
+                if info.filename == DOCUMENT_PART:
+                    target = body_lines
+                elif "/header" in info.filename:
+                    target = header_lines
+                else:
+                    target = footer_lines
+                with archive.open(info) as stream:
+                    target.extend(iter_part_lines(stream))
+    except (zipfile.BadZipFile, KeyError, ParseError) as e:
+        logger.error(f"Could not read DOCX: {str(e)}")
+        return ""
+
+    lines: List[str] = []
+    seen = set()
+    for line in header_lines:
+        if line.strip() and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    for line in body_lines:
+        if line.strip() or (lines and lines[-1].strip()):
+            lines.append(line)
+    for line in footer_lines:
+        if line.strip() and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    text = "\n".join(lines).strip()
+    logger.info(f"Extracted {len(text)} characters from DOCX")
+    return text
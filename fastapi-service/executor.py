@@ -0,0 +1,155 @@
+"""
+Execution layer that keeps blocking work (parsing, OCR, Gemini calls, scoring) off the event loop
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from metrics import STAGE_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# Default sizing per stage: (pool kind, workers, extra queued tasks, Retry-After seconds).
+# Each value can be overridden with STAGE_<NAME>_KIND / _WORKERS / _QUEUE / _RETRY_AFTER.
+DEFAULT_STAGES = {
+    "extract": ("thread", 4, 16, 2),
+    "ocr": ("thread", 2, 8, 5),
+    "llm": ("thread", 8, 32, 10),  # Gemini calls are async, so this stage only gates admission
+    "score": ("thread", 4, 32, 2),
+}
+
+class StageOverloaded(HTTPException):
+    """
+    Raised when a stage has no free worker and its queue is full.
+    Surfaces as a fast 503 with a Retry-After header instead of piling up requests.
+    """
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Server is busy ({stage} queue is full). Please retry shortly.",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.stage = stage
+
+class Stage:
+    """
+    A named pool of workers with a bounded number of in-flight plus queued tasks
+    """
+    def __init__(self, name: str, kind: str, workers: int, queue_size: int, retry_after: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind for stage {name}: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.retry_after = retry_after
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    logger.info(f"Starting {self.kind} pool for stage '{self.name}' with {self.workers} workers")
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"stage-{self.name}")
+        return self._pool
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                logger.warning(f"Stage '{self.name}' is full ({self._pending}/{self.capacity}), rejecting task")
+                raise StageOverloaded(self.name, self.retry_after)
+            self._pending += 1
+        STAGE_IN_FLIGHT.labels(self.name).inc()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        STAGE_IN_FLIGHT.labels(self.name).dec()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) on this stage's pool and await the result
+        """
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            if self.kind == "thread":
+                # Carry the request's context (e.g. its stage timings) into the worker thread
+                call = functools.partial(contextvars.copy_context().run, call)
+            return await loop.run_in_executor(self._get_pool(), call)
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        """
+        Hold one of this stage's slots around work that is already async (e.g. Gemini calls)
+        """
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+def _stage_from_env(name: str, defaults) -> Stage:
+    kind, workers, queue_size, retry_after = defaults
+    prefix = f"STAGE_{name.upper()}_"
+    return Stage(
+        name,
+        os.getenv(prefix + "KIND", kind),
+        int(os.getenv(prefix + "WORKERS", str(workers))),
+        int(os.getenv(prefix + "QUEUE", str(queue_size))),
+        int(os.getenv(prefix + "RETRY_AFTER", str(retry_after))),
+    )
+
+_stages: Dict[str, Stage] = {name: _stage_from_env(name, defaults) for name, defaults in DEFAULT_STAGES.items()}
+
+def get_stage(name: str) -> Stage:
+    """Look up a configured stage by name"""
+    try:
+        return _stages[name]
+    except KeyError:
+        raise ValueError(f"Unknown execution stage: {name}")
+
+async def run_in_stage(name: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function on the named stage's pool without blocking the event loop
+    """
+    return await get_stage(name).run(func, *args, **kwargs)
+
+def stage_status() -> Dict[str, Dict[str, Any]]:
+    """Current load of every stage, for health and debugging endpoints"""
+    return {
+        name: {"kind": stage.kind, "workers": stage.workers, "capacity": stage.capacity, "pending": stage.pending}
+        for name, stage in _stages.items()
+    }
+
+def shutdown_stages() -> None:
+    """Shut down every stage pool"""
+    for stage in _stages.values():
+        stage.shutdown()
@@ -0,0 +1,232 @@
+"""
+Content-addressed cache for extracted resume text.
+
+Keys are a SHA-256 of the uploaded bytes, so re-uploads of the same file skip
+detection, parsing and OCR. Entries live in an in-memory LRU tier bounded by a
+byte budget, with an optional SQLite tier of compressed blobs that survives restarts.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction code changes its output, so the disk tier does not serve
+# text from an older pipeline. 2: whole-page fitz rendering with adaptive DPI,
+# Otsu-binarized OCR input, native DOCX extraction. 3: PDF pages separated by form
+# feeds. Settings that change the output are part of the key as well (see digest_key).
+CACHE_VERSION = "3"
+
+def content_key(content: bytes, namespace: str = "text", settings: str = "") -> str:
+    """
+    Build a cache key from the SHA-256 of the raw bytes
+    """
+    return digest_key(hashlib.sha256(content).hexdigest(), namespace, settings)
+
+def digest_key(digest: str, namespace: str = "text", settings: str = "") -> str:
+    """
+    Build a cache key from an already computed SHA-256 hex digest (e.g. hashed while streaming).
+    settings describes the configuration the value was produced with (e.g. OCR and render settings).
+    """
+    settings_hash = hashlib.sha256(settings.encode()).hexdigest()[:12]
+    return f"{namespace}:v{CACHE_VERSION}:{settings_hash}:{digest}"
+
+class ExtractionCache:
+    """
+    Two-tier string cache: a byte-budgeted LRU in memory and an optional SQLite file on disk.
+    get/put do disk I/O in the calling thread; from the event loop use get_async/put_async,
+    which only touch the memory tier on the loop and move disk access to a thread.
+    """
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, db_path: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # Separate from _lock, so memory lookups never wait on disk I/O
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Running total of blob sizes on disk, so writes do not scan the table
+        self._disk_bytes = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS blobs ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed)")
+                self._db.commit()
+                self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+                logger.info(f"Extraction cache disk tier at {db_path}")
+            except sqlite3.Error as e:
+                logger.error(f"Could not open extraction cache database {db_path}: {str(e)}")
+                self._db = None
+
+    @staticmethod
+    def _entry_size(key: str, value: str) -> int:
+        return len(key) + len(value.encode("utf-8"))
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the memory tier and evict least recently used entries over budget"""
+        size = self._entry_size(key, value)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= self._entry_size(key, old)
+            self._memory[key] = value
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                old_key, old_value = self._memory.popitem(last=False)
+                self._memory_bytes -= self._entry_size(old_key, old_value)
+                self._stats["evictions"] += 1
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+            return value
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        """Look up a key on disk; a hit is promoted to memory"""
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT value FROM blobs WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                self._db.execute("UPDATE blobs SET accessed = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+            value = zlib.decompress(row[0]).decode("utf-8")
+        except (sqlite3.Error, zlib.error) as e:
+            logger.error(f"Extraction cache disk read failed: {str(e)}")
+            return None
+        self._remember(key, value)
+        self._count("disk_hits")
+        return value
+
+    def _disk_put(self, key: str, value: str) -> None:
+        blob = zlib.compress(value.encode("utf-8"))
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT size FROM blobs WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+                self._disk_bytes += len(blob) - (row[0] if row else 0)
+                self._trim_disk()
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Extraction cache disk write failed: {str(e)}")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a key in memory, then on disk. Disk hits are promoted to memory.
+        """
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._disk_get(key)
+        if value is None:
+            self._count("misses")
+        return value
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get() for the event loop: a memory hit is answered inline, disk lookups run in a thread"""
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self._count("misses")
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a value in memory and, when configured, on disk
+        """
+        self._remember(key, value)
+        self._count("stores")
+        if self._db is not None:
+            self._disk_put(key, value)
+
+    async def put_async(self, key: str, value: str) -> None:
+        """put() for the event loop: the disk write runs in a thread"""
+        self._remember(key, value)
+        self._count("stores")
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    def _trim_disk(self) -> None:
+        """Drop the least recently accessed blobs once the disk tier is over budget (holding _db_lock)"""
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute("SELECT key, size FROM blobs ORDER BY accessed ASC LIMIT 64").fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                return
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._db.execute("DELETE FROM blobs WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                self._count("evictions")
+
+    def clear(self) -> None:
+        """Empty both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM blobs")
+                self._db.commit()
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current memory and disk usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> ExtractionCache:
+    """
+    Shared cache configured from EXTRACTION_CACHE_MAX_BYTES, EXTRACTION_CACHE_DB and EXTRACTION_CACHE_MAX_DISK_BYTES
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache(
+                    max_memory_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+                    db_path=os.getenv("EXTRACTION_CACHE_DB") or None,
+                    max_disk_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_DISK_BYTES", str(1024 * 1024 * 1024))),
+                )
+    return _cache
@@ -0,0 +1,159 @@
+"""
+Local stand-ins for the Gemini API, for tests and benchmarks.
+
+FakeTransport answers in-process; FakeGeminiServer speaks the REST generateContent
+protocol on localhost so the real HttpTransport can be exercised end to end. The
+server can inject faults (error responses and slow answers) to simulate a provider
+incident, e.g. for the circuit breaker; the rates can be changed while it runs:
+
+    python fake_gemini.py --port 8090 --latency 0.5
+    python fake_gemini.py --port 8090 --failure-rate 0.7 --slow-rate 0.2 --slow-latency 20
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from gemini_client import Transport
+
+logger = logging.getLogger(__name__)
+
+# Conforms to resume_schema.RESUME_SCHEMA so it also satisfies the single-request mode
+SAMPLE_SECTIONS = {
+    "Personal Information": {
+        "name": "Jane Doe", "address": "Springfield", "phone": "+1 555 0100", "email": "jane.doe@example.com",
+    },
+    "Summary": "Backend engineer with 6 years of experience building Python services.",
+    "Skills": {
+        "Technical Skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "AWS"],
+        "Soft Skills": ["Mentoring", "Communication"],
+    },
+    "Work Experience": [
+        {
+            "company": "Acme Corp",
+            "position": "Senior Software Engineer",
+            "dates": "2020 - Present",
+            "responsibilities": "Led migration of billing services to Kubernetes, cutting deploy time by 70%",
+        }
+    ],
+    "Education": [{"institution": "State University", "degree": "B.Sc. Computer Science", "dates": "2014 - 2018"}],
+    "Projects": [],
+    "Certifications": [],
+    "Additional Information": "",
+}
+
+def default_responder(prompt: str) -> str:
+    """Answer every prompt with a fenced JSON resume, the way Gemini usually does"""
+    return "```json\n" + json.dumps(SAMPLE_SECTIONS) + "\n```"
+
+class FakeTransport(Transport):
+    """
+    In-process transport with a fixed latency and a pluggable responder
+    """
+    def __init__(self, responder: Callable[[str], str] = default_responder, latency: float = 0.0):
+        self.responder = responder
+        self.latency = latency
+        self.calls = 0
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.responder(prompt)
+
+class FakeGeminiServer:
+    """
+    Threaded HTTP server implementing POST /v1beta/models/<model>:generateContent
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 responder: Callable[[str], str] = default_responder, failure_rate: float = 0.0,
+                 failure_status: int = 503, slow_rate: float = 0.0, slow_latency: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.responder = responder
+        # Fault injection: share of requests answered with failure_status, and share
+        # delayed by an extra slow_latency seconds
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.faults = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.split("?")[0].endswith(":generateContent"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.calls += 1
+                status, payload = server.handle(body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug("fake gemini: " + format, *args)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, body: Dict[str, Any]):
+        """Build (status, payload) for one generateContent request"""
+        delay = self.latency
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay += self.slow_latency
+        if delay:
+            threading.Event().wait(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.faults += 1
+            return self.failure_status, {
+                "error": {"code": self.failure_status, "message": "Injected fault", "status": "UNAVAILABLE"}
+            }
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        text = self.responder(prompt)
+        return 200, {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Gemini API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeGeminiServer(
+        args.host, args.port, latency=args.latency, failure_rate=args.failure_rate,
+        failure_status=args.failure_status, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+    )
+    print(f"Fake Gemini server listening on {fake.url}")
+    fake.httpd.serve_forever()
@@ -0,0 +1,524 @@
+"""
+Async client layer for Gemini calls.
+
+One shared client bounds the number of in-flight requests, applies a deadline to
+every call, retries transient failures with jittered backoff and can optionally
+hedge slow requests. A circuit breaker stops calling Gemini while it is failing or
+slow, so callers can fall back to local results at once. The transport is pluggable so a local fake server or an
+in-process stub can stand in for the real API in tests and benchmarks.
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from metrics import (
+    LLM_CALLS, LLM_CIRCUIT_REJECTED, LLM_CIRCUIT_STATE, LLM_HEDGES, LLM_IN_FLIGHT, LLM_RETRIES, LLM_TOKENS,
+    estimate_tokens,
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class GenerationResult:
+    """Text returned by a single generation call"""
+    text: str
+    attempts: int = 1
+    hedged: bool = False
+    # Time the winning request spent in the transport
+    seconds: float = 0.0
+
+class TransientError(Exception):
+    """A failure worth retrying (throttling, 5xx, dropped connection)"""
+
+class GeminiTimeout(TransientError):
+    """A call did not finish before its deadline"""
+
+def is_transient(error: Exception) -> bool:
+    """
+    Decide whether an error from a transport should be retried
+    """
+    if isinstance(error, (TransientError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    ))
+
+class AuthError(Exception):
+    """Gemini refused the credentials (invalid, revoked or unauthorized API key)"""
+
+def is_auth_error(error: Exception) -> bool:
+    if isinstance(error, AuthError):
+        return True
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return False
+    if isinstance(error, (google_exceptions.Unauthenticated, google_exceptions.PermissionDenied)):
+        return True
+    # An invalid key is reported as a bad request
+    return isinstance(error, google_exceptions.InvalidArgument) and "api key" in str(error).lower()
+
+def counts_as_failure(error: BaseException) -> bool:
+    """
+    Whether a failed call tells the circuit breaker Gemini is unusable: transient
+    errors, rejected credentials and empty or malformed responses do; cancellations
+    and requests Gemini refused for their content do not
+    """
+    if not isinstance(error, Exception):
+        return False
+    return is_transient(error) or is_auth_error(error) or isinstance(error, ValueError)
+
+class CircuitOpen(Exception):
+    """Gemini is not being called because the circuit breaker is open"""
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini circuit breaker is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Watches the outcomes of recent Gemini calls. It opens when, over the last
+    window_seconds and at least min_calls calls, the share of failed calls reaches
+    failure_rate or the share slower than slow_call_seconds reaches slow_rate.
+    While open, calls are refused without waiting. After open_seconds it is
+    half-open: up to half_open_probes calls go through, and the first of them
+    closes it again if fast and successful, or reopens it otherwise.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _GAUGE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, window_seconds: float = 30.0, min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 15.0, slow_rate: float = 0.8, open_seconds: float = 30.0,
+                 half_open_probes: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        # (finished at, failed, slow) per call in the window
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        LLM_CIRCUIT_STATE.set(0)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probes = 0
+        if state == self.OPEN:
+            self._opened_at = self._clock()
+        if state != self.HALF_OPEN:
+            self._calls.clear()
+        LLM_CIRCUIT_STATE.set(self._GAUGE_VALUES[state])
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Gemini circuit breaker {state.replace('_', '-')}")
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allows_calls(self) -> bool:
+        """False while open, so callers can skip Gemini (degraded mode) without trying"""
+        return self.state != self.OPEN
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through (0 unless open)"""
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - self._clock())
+
+    def before_call(self) -> None:
+        """Admit one call, or raise CircuitOpen. Every admitted call must end in record() or release()."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                retry_after = self._opened_at + self.open_seconds - self._clock()
+            elif state == self.HALF_OPEN and self._probes >= self.half_open_probes:
+                retry_after = 1.0
+            else:
+                if state == self.HALF_OPEN:
+                    self._probes += 1
+                return
+        LLM_CIRCUIT_REJECTED.inc()
+        raise CircuitOpen(max(0.0, retry_after))
+
+    def record(self, failed: bool, seconds: float) -> None:
+        """Record the outcome of an admitted call"""
+        slow = seconds >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                self._transition(self.OPEN if failed or slow else self.CLOSED)
+                return
+            if state == self.OPEN:
+                # A call admitted before the breaker opened
+                return
+            now = self._clock()
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._calls.popleft()
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures >= self.failure_rate * len(self._calls) or slow_calls >= self.slow_rate * len(self._calls):
+                logger.warning(
+                    f"Opening Gemini circuit breaker: {failures} failed and {slow_calls} slow "
+                    f"of the last {len(self._calls)} calls"
+                )
+                self._transition(self.OPEN)
+
+    def release(self) -> None:
+        """An admitted call ended without telling anything about Gemini's health (cancelled, bad request)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes:
+                self._probes -= 1
+
+class Transport:
+    """
+    Sends one prompt to a model and returns the generated text
+    """
+    async def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+    def missing_configuration(self) -> Optional[str]:
+        """Why this transport cannot make calls at all (e.g. no API key), or None"""
+        return None
+
+class GenaiTransport(Transport):
+    """
+    Transport backed by the google-generativeai SDK, sharing one GenerativeModel.
+    The SDK is imported and configured on first use, not at import time.
+    Requires an API key, passed in or from GEMINI_API_KEY.
+    """
+    def __init__(self, model_name: str = "gemini-1.5-flash", api_key: Optional[str] = None):
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self._model = None
+        self._lock = threading.Lock()
+        self._warned_unsupported = False
+
+    def missing_configuration(self) -> Optional[str]:
+        return None if self.api_key else "GEMINI_API_KEY is not set"
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if not self.api_key:
+                        raise ValueError("Gemini API key is missing; set GEMINI_API_KEY")
+                    import google.generativeai as genai
+                    try:
+                        genai.configure(api_key=self.api_key)
+                        logger.info("Successfully configured Gemini API")
+                    except Exception as e:
+                        logger.error(f"Error configuring Gemini API: {str(e)}")
+                        raise ValueError(f"Failed to configure Gemini API: {str(e)}")
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self) -> None:
+        """Import the SDK and build the shared model ahead of the first request"""
+        if not self.api_key:
+            logger.warning("GEMINI_API_KEY is not set; AI enhancement is unavailable")
+            return
+        self._get_model()
+
+    def _supported_config(self, generation_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Drop options the installed SDK does not know (releases before 0.5 lack structured
+        output). The prompt still carries the schema then, but nothing enforces it, so
+        this is logged once as a warning.
+        """
+        if not generation_config:
+            return None
+        import google.generativeai as genai
+        supported = {field.name for field in dataclasses.fields(genai.types.GenerationConfig)}
+        dropped = set(generation_config) - supported
+        if dropped and not self._warned_unsupported:
+            self._warned_unsupported = True
+            logger.warning(
+                f"google-generativeai {genai.__version__} does not support {sorted(dropped)}; "
+                "responses are not schema-constrained, upgrade the SDK (see requirements.txt)"
+            )
+        return {key: value for key, value in generation_config.items() if key in supported} or None
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        response = await self._get_model().generate_content_async(
+            prompt, generation_config=self._supported_config(generation_config)
+        )
+        if not response or not response.text:
+            raise ValueError("No response from Gemini")
+        return response.text
+
+def _camel_case(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+class HttpTransport(Transport):
+    """
+    Transport speaking the REST generateContent protocol to any base URL,
+    e.g. a local fake server (see fake_gemini.py) or the public endpoint
+    """
+    def __init__(self, base_url: str, model_name: str = "gemini-1.5-flash", api_key: Optional[str] = None,
+                 timeout: float = 60.0):
+        self.url = f"{base_url.rstrip('/')}/v1beta/models/{model_name}:generateContent"
+        if api_key:
+            self.url += f"?key={api_key}"
+        self.timeout = timeout
+
+    def _post(self, body: bytes) -> Dict[str, Any]:
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise TransientError(f"Gemini HTTP {e.code}")
+            if e.code in (401, 403):
+                raise AuthError(f"Gemini HTTP {e.code}")
+            raise
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise TransientError(str(e))
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        payload: Dict[str, Any] = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            payload["generationConfig"] = {_camel_case(key): value for key, value in generation_config.items()}
+        data = await asyncio.to_thread(self._post, json.dumps(payload).encode("utf-8"))
+        try:
+            text = "".join(part.get("text", "") for part in data["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Malformed Gemini response: {str(e)}")
+        if not text:
+            raise ValueError("No response from Gemini")
+        return text
+
+class GeminiClient:
+    """
+    Bounded, deadline-aware client shared by every Gemini call in the service
+    """
+    def __init__(self, transport: Transport, max_in_flight: int = 8, timeout: float = 30.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 hedge_after: Optional[float] = None, breaker: Optional[CircuitBreaker] = None):
+        self.transport = transport
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_after = hedge_after
+        self.breaker = breaker
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one loop; rebuild if the loop changed (tests, benchmarks)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def unavailable_reason(self) -> Optional[str]:
+        """Why Gemini should not be called right now: "not_configured", "circuit_open", or None"""
+        if self.transport.missing_configuration():
+            return "not_configured"
+        if self.breaker is not None and not self.breaker.allows_calls():
+            return "circuit_open"
+        return None
+
+    def available(self) -> bool:
+        """Whether Gemini is worth calling right now (configured, and the circuit breaker is not open)"""
+        return self.unavailable_reason() is None
+
+    async def _call_once(self, prompt: str, generation_config: Optional[Dict[str, Any]],
+                         timeout: float) -> GenerationResult:
+        async with self._get_semaphore():
+            LLM_IN_FLIGHT.inc()
+            LLM_TOKENS.labels("prompt").inc(estimate_tokens(prompt))
+            started = time.monotonic()
+            try:
+                text = await asyncio.wait_for(self.transport.generate(prompt, generation_config), timeout=timeout)
+            except asyncio.TimeoutError:
+                LLM_CALLS.labels("timeout").inc()
+                raise GeminiTimeout(f"Gemini call exceeded {timeout:.1f}s deadline")
+            except asyncio.CancelledError:
+                LLM_CALLS.labels("cancelled").inc()
+                raise
+            except Exception:
+                LLM_CALLS.labels("error").inc()
+                raise
+            finally:
+                LLM_IN_FLIGHT.dec()
+        LLM_CALLS.labels("ok").inc()
+        LLM_TOKENS.labels("output").inc(estimate_tokens(text))
+        return GenerationResult(text=text, seconds=time.monotonic() - started)
+
+    async def _call_hedged(self, prompt: str, generation_config: Optional[Dict[str, Any]],
+                           timeout: float) -> GenerationResult:
+        """
+        Start a second identical request if the first is still running after hedge_after
+        seconds and a slot is free; the first to succeed wins and the other is cancelled.
+        Requests still running when this returns or is cancelled are cancelled and awaited.
+        """
+        primary = asyncio.ensure_future(self._call_once(prompt, generation_config, timeout))
+        hedge: Optional[asyncio.Future] = None
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            if not done and not self._get_semaphore().locked():
+                logger.info(f"Hedging Gemini request after {self.hedge_after:.2f}s")
+                LLM_HEDGES.inc()
+                hedge = asyncio.ensure_future(self._call_once(prompt, generation_config, timeout - self.hedge_after))
+                pending.add(hedge)
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        result.hedged = task is hedge
+                        return result
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _attempt(self, prompt: str, generation_config: Optional[Dict[str, Any]],
+                       timeout: float) -> GenerationResult:
+        """
+        One attempt, hedged when configured. The circuit breaker admits and records it
+        as a single call, so a hedged pair takes one half-open probe, not two.
+        """
+        if self.breaker is not None:
+            self.breaker.before_call()
+        started = time.monotonic()
+        try:
+            if self.hedge_after and self.hedge_after < timeout:
+                result = await self._call_hedged(prompt, generation_config, timeout)
+            else:
+                result = await self._call_once(prompt, generation_config, timeout)
+        except BaseException as e:
+            if self.breaker is not None:
+                if counts_as_failure(e):
+                    self.breaker.record(failed=True, seconds=time.monotonic() - started)
+                else:
+                    self.breaker.release()
+            raise
+        if self.breaker is not None:
+            self.breaker.record(failed=False, seconds=result.seconds)
+        return result
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None) -> GenerationResult:
+        """
+        Generate text for a prompt, retrying transient errors until the retry budget is spent
+        """
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(prompt, generation_config, timeout)
+                result.attempts = attempt + 1
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                delay = self._backoff(attempt)
+                LLM_RETRIES.inc()
+                logger.warning(f"Transient Gemini error ({str(e)}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    return float(value) if value else None
+
+def build_breaker_from_env() -> Optional[CircuitBreaker]:
+    """Circuit breaker configured from GEMINI_BREAKER_* (GEMINI_BREAKER=0 disables it)"""
+    if os.getenv("GEMINI_BREAKER", "1") == "0":
+        return None
+    return CircuitBreaker(
+        window_seconds=float(os.getenv("GEMINI_BREAKER_WINDOW", "30")),
+        min_calls=int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10")),
+        failure_rate=float(os.getenv("GEMINI_BREAKER_FAILURE_RATE", "0.5")),
+        slow_call_seconds=float(os.getenv("GEMINI_BREAKER_SLOW_CALL_SECONDS", "15")),
+        slow_rate=float(os.getenv("GEMINI_BREAKER_SLOW_RATE", "0.8")),
+        open_seconds=float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30")),
+        half_open_probes=int(os.getenv("GEMINI_BREAKER_PROBES", "1")),
+    )
+
+def build_transport_from_env() -> Transport:
+    """
+    GEMINI_API_ENDPOINT points the client at a REST endpoint (e.g. a local fake server);
+    otherwise the google-generativeai SDK is used
+    """
+    model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    endpoint = os.getenv("GEMINI_API_ENDPOINT")
+    if endpoint:
+        return HttpTransport(endpoint, model_name=model_name, api_key=os.getenv("GEMINI_API_KEY"))
+    return GenaiTransport(model_name)
+
+_client: Optional[GeminiClient] = None
+_client_lock = threading.Lock()
+
+def get_gemini_client() -> GeminiClient:
+    """
+    Shared client configured from GEMINI_MAX_IN_FLIGHT, GEMINI_TIMEOUT, GEMINI_MAX_RETRIES, GEMINI_HEDGE_AFTER
+    and the GEMINI_BREAKER_* settings
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient(
+                    build_transport_from_env(),
+                    max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", "8")),
+                    timeout=float(os.getenv("GEMINI_TIMEOUT", "30")),
+                    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+                    hedge_after=_optional_float(os.getenv("GEMINI_HEDGE_AFTER")),
+                    breaker=build_breaker_from_env(),
+                )
+    return _client
+
+def set_gemini_client(client: Optional[GeminiClient]) -> None:
+    """Replace the shared client, e.g. with one using a fake transport"""
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for multi-worker serving.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app), which then loads the spaCy
+skill matcher, scoring models and IDF tables (lifecycle.preload) and freezes the GC
+before forking. Workers share those pages copy-on-write instead of each loading
+their own copy; they still start their own Gemini client, OCR pool, executor
+stages and job workers, since threads and sockets do not survive a fork.
+
+Sizing:
+  - WEB_CONCURRENCY (workers) defaults to one per core. Request work is CPU bound,
+    so more workers than cores adds memory without adding throughput.
+  - Each worker also runs an OCR process pool; OCR_WORKERS defaults to
+    cores / workers so scanned uploads on every worker at once do not oversubscribe
+    the node. Set both explicitly when the node runs other services.
+  - Memory: budget the shared preloaded image once, plus per worker its private
+    memory (see WORKER_MAX_MEMORY_MB) and OCR_WORKERS OCR processes.
+  - JOB_WORKERS job loops run in every worker; lower it (or set 0 and run
+    `python jobs.py worker` separately) so jobs do not crowd out requests.
+
+Shared state: workers keep their own in-memory copies, so anything a request can
+change is coordinated through files on the host and every worker sees it:
+  - Job description ids are recorded in JD_REGISTRY_DB; a worker that has not
+    analysed one re-analyses it from there.
+  - Resume indexes (RESUME_INDEX_DIR) are changed under an flock and journaled;
+    each worker replays new journal entries, or reloads a newer snapshot, first.
+  - The corpus IDF model (ATS_IDF_MODEL_PATH) is updated under an flock and
+    reloaded by the other workers when its meta.json is replaced.
+These directories must be on a local filesystem (flock over NFS is unreliable),
+and running several hosts needs a shared store instead.
+
+Recycling: a worker exits gracefully and is replaced after WORKER_MAX_REQUESTS
+requests (plus up to WORKER_MAX_REQUESTS_JITTER, so workers do not restart together)
+or once its private memory passes WORKER_MAX_MEMORY_MB (serving.MemoryRecycler).
+"""
+
+import os
+import shutil
+import tempfile
+
+from serving import default_worker_count
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = default_worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+max_requests = int(os.getenv("WORKER_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+
+# Read by the app at import, which happens after this file is loaded
+os.environ.setdefault("OCR_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+os.environ.setdefault("WORKER_MAX_MEMORY_MB", "1024")
+# Aggregate /metrics across workers; stale files from a previous run would be counted too
+_metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "resume-ats-metrics")
+)
+shutil.rmtree(_metrics_dir, ignore_errors=True)
+os.makedirs(_metrics_dir, exist_ok=True)
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before the first fork
+    from lifecycle import lifecycle
+    lifecycle.preload()
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
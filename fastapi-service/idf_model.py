@@ -0,0 +1,273 @@
+"""
+Corpus-fitted IDF model for content relevance scoring.
+
+Vocabulary and document frequencies are fitted once on a corpus of job descriptions
+and resumes, saved to a small directory (terms.txt, df.npy, meta.json) and
+memory-mapped on load, so requests only need transform(). New documents can be
+folded in incrementally with partial_fit().
+
+Every worker process holds its own copy. update_idf_model() folds documents in
+under an exclusive flock on the model directory, re-reading the saved model first,
+and get_idf_model() reloads the model when meta.json has been replaced, so all
+workers converge on the same saved model.
+
+    python idf_model.py fit --out models/idf corpus/*.txt corpus.jsonl
+    python idf_model.py update --model models/idf new_jds.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per model directory
+    fcntl = None
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+class IdfModelUnavailable(Exception):
+    """There is no saved model to update"""
+
+def _preprocess(text: str) -> str:
+    # Same normalisation as ats_score.preprocess_text, so fitted terms line up with scoring
+    from ats_score import preprocess_text
+    return preprocess_text(text)
+
+class IdfModel:
+    """
+    Fixed vocabulary plus document frequencies; IDF uses sklearn's smoothed formula
+    """
+    def __init__(self, terms: List[str], df: np.ndarray, n_docs: int):
+        self.terms = list(terms)
+        self.vocabulary: Dict[str, int] = {term: index for index, term in enumerate(self.terms)}
+        self.df = df
+        self.n_docs = n_docs
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def _refresh(self) -> None:
+        # smooth_idf=True: idf = ln((1 + n) / (1 + df)) + 1
+        idf = (np.log((1 + self.n_docs) / (1 + np.asarray(self.df, dtype=np.float64))) + 1).astype(np.float32)
+        vectorizer = CountVectorizer(vocabulary=dict(self.vocabulary)) if self.terms else None
+        # Swapped in one assignment so concurrent transform() calls never see a mismatched pair
+        self._state = (vectorizer, idf)
+
+    def copy(self) -> "IdfModel":
+        with self._lock:
+            return IdfModel(self.terms, np.array(self.df, dtype=np.int32), self.n_docs)
+
+    @property
+    def idf(self) -> np.ndarray:
+        return self._state[1]
+
+    @staticmethod
+    def _analyzer():
+        return CountVectorizer(stop_words="english").build_analyzer()
+
+    @classmethod
+    def fit(cls, documents: Iterable[str]) -> "IdfModel":
+        """Fit vocabulary and document frequencies on a corpus"""
+        model = cls([], np.zeros(0, dtype=np.int32), 0)
+        model.partial_fit(documents)
+        return model
+
+    def partial_fit(self, documents: Iterable[str]) -> int:
+        """
+        Fold new documents into the document frequencies, growing the vocabulary as needed.
+        Returns the number of documents added.
+        """
+        analyzer = self._analyzer()
+        added = 0
+        with self._lock:
+            df = np.array(self.df, dtype=np.int32)  # copy: a loaded model's df is read-only mmap
+            new_counts: Dict[int, int] = {}
+            for document in documents:
+                for term in set(analyzer(_preprocess(document))):
+                    index = self.vocabulary.get(term)
+                    if index is None:
+                        index = len(self.terms)
+                        self.vocabulary[term] = index
+                        self.terms.append(term)
+                    new_counts[index] = new_counts.get(index, 0) + 1
+                added += 1
+            if len(self.terms) > len(df):
+                df = np.concatenate([df, np.zeros(len(self.terms) - len(df), dtype=np.int32)])
+            for index, count in new_counts.items():
+                df[index] += count
+            self.df = df
+            self.n_docs += added
+            self._refresh()
+        return added
+
+    def transform(self, texts: List[str]):
+        """
+        L2-normalised TF-IDF rows for the given texts; out-of-vocabulary terms are ignored
+        """
+        vectorizer, idf = self._state
+        if vectorizer is None:
+            raise ValueError("IDF model has an empty vocabulary")
+        counts = vectorizer.transform([_preprocess(text) for text in texts])
+        return normalize(counts.multiply(idf).tocsr())
+
+    def save(self, path: str) -> None:
+        """Write terms.txt, df.npy and meta.json into a directory"""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            tmp = os.path.join(path, "df.npy.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(self.df, dtype=np.int32))
+            os.replace(tmp, os.path.join(path, "df.npy"))
+            tmp = os.path.join(path, "terms.txt.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("\n".join(self.terms))
+            os.replace(tmp, os.path.join(path, "terms.txt"))
+            tmp = os.path.join(path, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "n_docs": self.n_docs, "n_terms": len(self.terms)}, f)
+            os.replace(tmp, os.path.join(path, "meta.json"))
+        logger.info(f"Saved IDF model with {len(self.terms)} terms from {self.n_docs} documents to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "IdfModel":
+        """Load a saved model, memory-mapping the document frequency array"""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported IDF model version: {meta.get('version')}")
+        with open(os.path.join(path, "terms.txt"), encoding="utf-8") as f:
+            content = f.read()
+        terms = content.split("\n") if content else []
+        df = np.load(os.path.join(path, "df.npy"), mmap_mode="r")
+        if len(df) != len(terms):
+            raise ValueError("IDF model terms and frequencies are out of sync")
+        return cls(terms, df, int(meta["n_docs"]))
+
+@contextlib.contextmanager
+def model_lock(path: str, exclusive: bool) -> Iterator[None]:
+    """flock on the model directory, so a reload never sees a half-written save"""
+    if fcntl is None or not (exclusive or os.path.isdir(path)):
+        yield
+        return
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "LOCK"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Identity of the saved meta.json, which every save replaces last"""
+    try:
+        st = os.stat(os.path.join(path, "meta.json"))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+_model: Optional[IdfModel] = None
+_model_stamp: Optional[Tuple[int, int]] = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+def _reload_if_changed(path: Optional[str]) -> Optional[IdfModel]:
+    """Load the saved model unless the one in memory is current. Callers hold model_lock(path)."""
+    global _model, _model_loaded, _model_stamp
+    with _model_lock:
+        stamp = _stamp(path) if path else None
+        if _model_loaded and stamp == _model_stamp:
+            return _model
+        if stamp is not None:
+            try:
+                model = IdfModel.load(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load IDF model from {path}: {str(e)}")
+            else:
+                logger.info(f"Loaded IDF model with {len(model.terms)} terms from {path}")
+                _model = model
+        elif path and not _model_loaded:
+            logger.warning(f"No IDF model found at {path}, using per-request TF-IDF")
+        _model_stamp = stamp
+        _model_loaded = True
+        return _model
+
+def get_idf_model() -> Optional[IdfModel]:
+    """
+    Shared model loaded from ATS_IDF_MODEL_PATH, or None when no model is configured.
+    Reloaded when another process has saved a newer version.
+    """
+    path = os.getenv("ATS_IDF_MODEL_PATH")
+    if _model_loaded and (not path or _stamp(path) == _model_stamp):
+        return _model
+    if not path:
+        return _reload_if_changed(None)
+    with model_lock(path, exclusive=False):
+        return _reload_if_changed(path)
+
+def update_idf_model(documents: List[str]) -> Tuple[IdfModel, int]:
+    """
+    Fold documents into the saved model at ATS_IDF_MODEL_PATH and save it, holding the
+    directory lock so concurrent updates from other workers are not lost. A copy is
+    updated and only replaces the shared model once saved, so a failed save changes nothing.
+    Returns the updated model and the number of documents added; raises
+    IdfModelUnavailable when no model is configured or fitted.
+    """
+    global _model, _model_stamp
+    path = os.getenv("ATS_IDF_MODEL_PATH")
+    if not path:
+        raise IdfModelUnavailable("No IDF model configured (set ATS_IDF_MODEL_PATH)")
+    with model_lock(path, exclusive=True):
+        model = _reload_if_changed(path)
+        if model is None:
+            if _stamp(path) is None:
+                raise IdfModelUnavailable(
+                    "No IDF model has been fitted at ATS_IDF_MODEL_PATH yet (see python idf_model.py fit)"
+                )
+            raise IdfModelUnavailable("The IDF model at ATS_IDF_MODEL_PATH could not be loaded")
+        updated = model.copy()
+        added = updated.partial_fit(documents)
+        updated.save(path)
+        with _model_lock:
+            _model, _model_stamp = updated, _stamp(path)
+    return updated, added
+
+def read_corpus(paths: Iterable[str]) -> List[str]:
+    """
+    Read documents from .txt files (one document per file) and .jsonl files
+    (one {"text": ...} object per line)
+    """
+    documents = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                documents.extend(json.loads(line)["text"] for line in f if line.strip())
+            else:
+                documents.append(f.read())
+    return documents
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit or update the corpus IDF model used for ATS scoring")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fit_parser = subparsers.add_parser("fit", help="Fit a new model on a corpus")
+    fit_parser.add_argument("--out", required=True, help="Directory to write the model to")
+    fit_parser.add_argument("corpus", nargs="+", help=".txt or .jsonl corpus files")
+    update_parser = subparsers.add_parser("update", help="Fold new documents into an existing model")
+    update_parser.add_argument("--model", required=True, help="Model directory to update in place")
+    update_parser.add_argument("corpus", nargs="+", help=".txt or .jsonl corpus files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "fit":
+        IdfModel.fit(read_corpus(args.corpus)).save(args.out)
+    else:
+        with model_lock(args.model, exclusive=True):
+            model = IdfModel.load(args.model)
+            model.partial_fit(read_corpus(args.corpus))
+            model.save(args.model)
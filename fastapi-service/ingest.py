@@ -0,0 +1,256 @@
+"""
+Size-capped upload ingestion and text extraction.
+
+By the time a handler runs, Starlette has already parsed the multipart body into
+UploadFile.file, a SpooledTemporaryFile that stays in memory up to 1 MB and rolls
+over to an unnamed temp file beyond that. Ingestion sniffs the signature, then
+hashes and measures that file in chunks without copying it: parsers get its bytes
+while it is small, or read the rolled-over file by its /proc/<pid>/fd path. Only
+the Content-Length check (exceeds_upload_limit, run before the body is parsed)
+refuses an oversized upload early; chunked uploads are parsed in full first and
+then rejected here. PDFs are also checked against a page limit, and DOCX files
+against an uncompressed size limit, before any parsing starts.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+import fitz  # PyMuPDF
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from docx_parser import DOCX_MIME, ZIP_MIME, looks_like_docx, validate_docx
+from executor import run_in_stage
+from extraction_cache import digest_key, get_extraction_cache
+from metrics import timed
+from pdf_parser import (
+    detect_file_type, extract_text_from_image, extract_text_from_pdf, extraction_settings_tag, parse_docx_file,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+# Where large uploads are copied on platforms without /proc
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+# Allowance for multipart boundaries and headers when pre-checking Content-Length
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+SNIFF_BYTES = 512
+
+class UploadRejected(HTTPException):
+    """
+    An upload refused during ingestion (unsupported type, too large, too many pages)
+    """
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code=status_code, detail=detail)
+
+def is_supported_type(file_type: str) -> bool:
+    return file_type.startswith("image/") or file_type in ("application/pdf", DOCX_MIME)
+
+def exceeds_upload_limit(content_length: Optional[str]) -> bool:
+    """
+    True when a request's declared Content-Length cannot fit a MAX_UPLOAD_BYTES file,
+    so it can be refused before its body is read
+    """
+    try:
+        return int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+    except (TypeError, ValueError):
+        return False
+
+class IngestedUpload:
+    """
+    An accepted upload: its detected type, size and SHA-256, and the content either
+    in memory (small files) or in a file readable by path. owns_path says whether
+    close() deletes that file; the request's own spooled file is left to Starlette.
+    """
+    def __init__(self, file_type: str, size: int, digest: str,
+                 data: Optional[bytes] = None, path: Optional[str] = None, owns_path: bool = True):
+        self.file_type = file_type
+        self.size = size
+        self.digest = digest
+        self.data = data
+        self.path = path
+        self.owns_path = owns_path
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """The bytes, or the temp file path for spooled uploads"""
+        return self.path if self.path is not None else self.data
+
+    def read_bytes(self) -> bytes:
+        if self.path is None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def cache_key(self, namespace: str = "text") -> str:
+        return digest_key(self.digest, namespace, extraction_settings_tag())
+
+    def close(self) -> None:
+        """Remove the temp file, if this upload owns one"""
+        if self.path is not None and self.owns_path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self.path = None
+
+def count_pdf_pages(source: Union[bytes, str]) -> int:
+    if isinstance(source, str):
+        with fitz.open(source, filetype="pdf") as doc:
+            return len(doc)
+    with fitz.open(stream=source, filetype="pdf") as doc:
+        return len(doc)
+
+def check_pdf_pages(upload: IngestedUpload) -> None:
+    """
+    Reject PDFs over MAX_PDF_PAGES (or that cannot be opened at all)
+    """
+    try:
+        pages = count_pdf_pages(upload.source)
+    except Exception as e:
+        raise UploadRejected(400, f"Could not open PDF: {str(e)}")
+    if pages > MAX_PDF_PAGES:
+        raise UploadRejected(413, f"PDF has {pages} pages; at most {MAX_PDF_PAGES} are supported.")
+
+def check_docx(upload: IngestedUpload) -> None:
+    """
+    Reject zips that are not Word documents, or whose XML would inflate past the limit
+    """
+    try:
+        validate_docx(upload.source)
+    except ValueError as e:
+        raise UploadRejected(400, f"Could not open DOCX: {str(e)}")
+
+def _spooled_path(spooled) -> Optional[str]:
+    """
+    A path that opens the temp file a SpooledTemporaryFile rolled over to, where /proc
+    is available. It names this process, so process-kind stages can open it too.
+    """
+    path = f"/proc/{os.getpid()}/fd/{spooled.fileno()}"
+    return path if os.path.exists(path) else None
+
+async def ingest_upload(file: UploadFile, max_bytes: Optional[int] = None) -> IngestedUpload:
+    """
+    Validate a parsed upload in place. Unsupported types are rejected after the
+    first bytes and oversized files as soon as they pass the limit. The content is
+    not copied: small uploads are kept as bytes and rolled-over ones read by path.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    head = await file.read(SNIFF_BYTES)
+    if not head:
+        raise UploadRejected(400, "Uploaded file is empty.")
+
+    with timed("detect"):
+        file_type = detect_file_type(head)
+    if file_type != ZIP_MIME:
+        logger.info(f"Detected file type: {file_type}")
+    if not (is_supported_type(file_type) or file_type == ZIP_MIME):
+        raise UploadRejected(
+            400, f"Unsupported file type: {file_type}. Only PDF, DOCX and image files are supported."
+        )
+
+    hasher = hashlib.sha256(head)
+    size = len(head)
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadRejected(413, f"File is larger than the {round(max_bytes / (1024 * 1024), 1):g} MB limit.")
+        hasher.update(chunk)
+    await file.seek(0)
+
+    if file_type == ZIP_MIME:
+        # The zip directory is at the end, so a DOCX is recognized once the whole file is in
+        with timed("detect"):
+            is_docx = await asyncio.to_thread(looks_like_docx, file.file)
+        await file.seek(0)
+        if not is_docx:
+            raise UploadRejected(
+                400, f"Unsupported file type: {ZIP_MIME}. Only PDF, DOCX and image files are supported."
+            )
+        file_type = DOCX_MIME
+        logger.info(f"Detected file type: {file_type}")
+
+    # Same test Starlette uses to decide whether reads need a thread
+    rolled_to_disk = getattr(file.file, "_rolled", True)
+    path = _spooled_path(file.file) if rolled_to_disk else None
+    if path is not None:
+        upload = IngestedUpload(file_type, size, hasher.hexdigest(), path=path, owns_path=False)
+    elif rolled_to_disk:
+        # No /proc: copy to a named temp file that fitz and PIL can open
+        with tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_TMP_DIR, delete=False) as spool:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, spool)
+        upload = IngestedUpload(file_type, size, hasher.hexdigest(), path=spool.name)
+    else:
+        upload = IngestedUpload(file_type, size, hasher.hexdigest(), data=await file.read())
+
+    check = {"application/pdf": check_pdf_pages, DOCX_MIME: check_docx}.get(file_type)
+    if check is not None:
+        try:
+            await run_in_stage("extract", check, upload)
+        except BaseException:
+            upload.close()
+            raise
+    return upload
+
+async def extract_text_by_type(content: Union[bytes, str], file_type: str) -> str:
+    """
+    Run PDF or DOCX parsing, or image OCR, on the matching stage pool.
+    content is the file's bytes or the path of a spooled upload.
+    """
+    try:
+        if file_type.startswith('image/'):
+            # Handle image files with OCR
+            logger.info("Processing image file with OCR")
+            image = Image.open(content if isinstance(content, str) else io.BytesIO(content))
+            with timed("extract"):
+                extracted_text = await run_in_stage("ocr", extract_text_from_image, image)
+            logger.info(f"OCR text length: {len(extracted_text) if extracted_text else 0}")
+        elif file_type == DOCX_MIME:
+            # Native DOCX extraction, no OCR involved
+            logger.info("Processing DOCX file")
+            with timed("extract"):
+                extracted_text = await run_in_stage("extract", parse_docx_file, content)
+            logger.info(f"DOCX text length: {len(extracted_text) if extracted_text else 0}")
+        else:
+            # Handle PDF files
+            logger.info("Processing PDF file")
+            with timed("extract"):
+                extracted_text = await run_in_stage("extract", extract_text_from_pdf, content)
+            logger.info(f"PDF text length: {len(extracted_text) if extracted_text else 0}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing file: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing file: {str(e)}"
+        )
+    return extracted_text
+
+async def extract_upload_text(upload: IngestedUpload) -> str:
+    """
+    Extract an ingested upload's text, reusing cached results for identical bytes
+    """
+    cache = get_extraction_cache()
+    cache_key = upload.cache_key()
+    cached_text = await cache.get_async(cache_key)
+    if cached_text is not None:
+        logger.info("Extraction cache hit, skipping parsing")
+        return cached_text
+
+    extracted_text = await extract_text_by_type(upload.source, upload.file_type)
+    
+    if extracted_text:
+        await cache.put_async(cache_key, extracted_text)
+    return extracted_text
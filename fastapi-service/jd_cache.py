@@ -0,0 +1,194 @@
+"""
+Cache of analysed job descriptions shared across scoring requests.
+
+Scoring hundreds of resumes against one posting otherwise preprocesses, vectorizes
+and skill-matches the same job description every time. Entries are keyed by a hash
+of the normalised text, which doubles as the jobDescriptionId clients can send
+instead of the full text.
+
+The cache is per process. So that an id issued by POST /job-descriptions resolves
+on every worker, the raw text of registered job descriptions is also recorded in a
+small SQLite registry (JobDescriptionRegistry) shared by all workers; a worker that
+misses locally re-analyses the text from there. Job descriptions sent inline for
+scoring are never written to the registry.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional
+
+logger = logging.getLogger(__name__)
+
+def job_description_id(processed_text: str) -> str:
+    """Stable id for a job description, from its normalised text"""
+    return hashlib.sha256(processed_text.encode("utf-8")).hexdigest()[:32]
+
+@dataclass
+class JobDescriptionAnalysis:
+    """Everything the scorer needs from one job description"""
+    id: str
+    processed_text: str
+    term_counts: Dict[str, int]
+    skills: FrozenSet[str]
+    # Filled lazily when a corpus IDF model is configured; generation tracks model updates
+    idf_vector: Any = None
+    idf_generation: int = -1
+    size_bytes: int = field(default=0, compare=False)
+
+    def __post_init__(self):
+        if not self.size_bytes:
+            self.size_bytes = (
+                sys.getsizeof(self.processed_text)
+                + sum(sys.getsizeof(term) + 64 for term in self.term_counts)
+                + sum(sys.getsizeof(skill) + 32 for skill in self.skills)
+                + 256
+            )
+
+class JobDescriptionCache:
+    """
+    LRU of JobDescriptionAnalysis entries bounded by an estimated memory budget
+    """
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, JobDescriptionAnalysis]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, jd_id: str) -> Optional[JobDescriptionAnalysis]:
+        with self._lock:
+            analysis = self._entries.get(jd_id)
+            if analysis is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(jd_id)
+            self._stats["hits"] += 1
+            return analysis
+
+    def put(self, analysis: JobDescriptionAnalysis) -> None:
+        with self._lock:
+            old = self._entries.pop(analysis.id, None)
+            if old is not None:
+                self._bytes -= old.size_bytes
+            self._entries[analysis.id] = analysis
+            self._bytes += analysis.size_bytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size_bytes
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+class JobDescriptionRegistry:
+    """
+    Raw job description text by id in SQLite, shared by every process on the host.
+    Entries unused for ttl_seconds expire, and beyond max_entries the least recently
+    used are dropped. Database errors are logged and treated as
+    misses, so scoring falls back to the per-process cache. The connection is opened
+    per process, so a registry touched in a pre-fork master is safe in its workers.
+    """
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._last_purge = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        """This process's connection (holding _lock)"""
+        if self._pid != os.getpid():
+            self._pid, self._db = os.getpid(), None
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few registrations to a power cut only costs a re-registration
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS job_descriptions (id TEXT PRIMARY KEY, text TEXT NOT NULL, used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS job_descriptions_used ON job_descriptions (used)")
+            db.commit()
+            self._db = db
+        if self._db is None:
+            raise sqlite3.OperationalError(f"job description registry {self.db_path} is unavailable")
+        return self._db
+
+    def put(self, jd_id: str, text: str) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO job_descriptions (id, text, used) VALUES (?, ?, ?)", (jd_id, text, now))
+                if now - self._last_purge > 3600:
+                    self._last_purge = now
+                    db.execute("DELETE FROM job_descriptions WHERE used < ?", (now - self.ttl_seconds,))
+                db.execute(
+                    "DELETE FROM job_descriptions WHERE id NOT IN "
+                    "(SELECT id FROM job_descriptions ORDER BY used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Job description registry write failed: {str(e)}")
+
+    def get(self, jd_id: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._connection()
+                row = db.execute(
+                    "SELECT text FROM job_descriptions WHERE id = ? AND used >= ?", (jd_id, now - self.ttl_seconds)
+                ).fetchone()
+                if row is not None:
+                    db.execute("UPDATE job_descriptions SET used = ? WHERE id = ?", (now, jd_id))
+                    db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Job description registry read failed: {str(e)}")
+            return None
+        return row[0] if row else None
+
+_cache: Optional[JobDescriptionCache] = None
+_cache_lock = threading.Lock()
+
+def get_jd_cache() -> JobDescriptionCache:
+    """Shared cache sized by JD_CACHE_MAX_BYTES"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = JobDescriptionCache(int(os.getenv("JD_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+    return _cache
+
+_registry: Optional[JobDescriptionRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_jd_registry() -> JobDescriptionRegistry:
+    """
+    Shared registry at JD_REGISTRY_DB (default data/job_descriptions.db beside the service),
+    capped by JD_REGISTRY_TTL_SECONDS and JD_REGISTRY_MAX_ENTRIES
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobDescriptionRegistry(
+                    os.getenv("JD_REGISTRY_DB") or os.path.join(
+                        os.path.dirname(os.path.abspath(__file__)), "data", "job_descriptions.db"
+                    ),
+                    float(os.getenv("JD_REGISTRY_TTL_SECONDS", str(7 * 24 * 3600))),
+                    int(os.getenv("JD_REGISTRY_MAX_ENTRIES", "10000")),
+                )
+    return _registry
@@ -0,0 +1,435 @@
+"""
+Asynchronous resume processing jobs backed by a durable SQLite queue.
+
+POST /jobs stores the upload under JOBS_DIR and enqueues a job; workers claim jobs
+with a lease, run extraction and Gemini enhancement, and record the result. Failed
+attempts are retried with jittered exponential backoff, finished jobs expire after
+JOB_TTL_SECONDS, and an Idempotency-Key maps repeated submissions to the same job.
+
+Workers run inside the API process (JOB_WORKERS, 0 disables them) or standalone,
+sharing the same database, so ingestion and processing can scale separately:
+
+    python jobs.py worker --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from executor import StageOverloaded, get_stage
+from ingest import IngestedUpload, extract_upload_text
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_CAP = float(os.getenv("JOB_BACKOFF_CAP", "120"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+class JobFailed(Exception):
+    """A job attempt failed; retryable=False fails the job without further attempts"""
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class LeaseLost(Exception):
+    """The worker's lease on a job ran out and another worker re-claimed it"""
+
+class JobQueue:
+    """
+    Jobs table plus the input files they point to. Claims take an immediate write
+    lock, so several worker processes can share one database file.
+    """
+    def __init__(self, directory: str = JOBS_DIR):
+        self.directory = directory
+        self.inputs_dir = os.path.join(directory, "inputs")
+        os.makedirs(self.inputs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "jobs.db"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, status TEXT NOT NULL, "
+            "filename TEXT, file_type TEXT NOT NULL, size INTEGER NOT NULL, digest TEXT NOT NULL, "
+            "input_path TEXT, options TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "max_attempts INTEGER NOT NULL, available_at REAL NOT NULL, lease_until REAL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, expires_at REAL NOT NULL, "
+            "result TEXT, error TEXT, lease_token TEXT)"
+        )
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "lease_token" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)")
+
+    def enqueue(self, upload: IngestedUpload, filename: Optional[str] = None,
+                options: Optional[Dict[str, Any]] = None, idempotency_key: Optional[str] = None) -> Dict:
+        """
+        Persist the upload and queue a job for it. With an idempotency key that is
+        already known (and not expired), the existing job is returned instead.
+        """
+        if idempotency_key:
+            existing = self._find_by_idempotency_key(idempotency_key)
+            if existing is not None:
+                return existing
+
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.inputs_dir, job_id)
+        if upload.path is not None and upload.owns_path:
+            shutil.move(upload.path, input_path)
+            upload.path = None
+        elif upload.path is not None:
+            # The request's spooled file goes away with the request
+            shutil.copyfile(upload.path, input_path)
+        else:
+            with open(input_path, "wb") as f:
+                f.write(upload.data)
+
+        now = time.time()
+        stale_input = None
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if idempotency_key:
+                    row = self._db.execute(
+                        "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                    ).fetchone()
+                    if row is not None and row["expires_at"] > now:
+                        # Lost a race with a concurrent submission using the same key
+                        self._db.execute("COMMIT")
+                        self._remove_input(input_path)
+                        return self._to_dict(row)
+                    if row is not None:
+                        # Expired but not purged yet: the key is free again
+                        self._db.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+                        stale_input = row["input_path"]
+                self._db.execute(
+                    "INSERT INTO jobs (id, idempotency_key, status, filename, file_type, size, digest, input_path, "
+                    "options, max_attempts, available_at, created_at, updated_at, expires_at) "
+                    "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, idempotency_key, filename, upload.file_type, upload.size, upload.digest, input_path,
+                     json.dumps(options or {}), JOB_MAX_ATTEMPTS, now, now, now, now + JOB_TTL_SECONDS),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                self._remove_input(input_path)
+                raise
+        if stale_input:
+            self._remove_input(stale_input)
+        logger.info(f"Queued job {job_id} ({upload.file_type}, {upload.size} bytes)")
+        return self.get(job_id)
+
+    def _find_by_idempotency_key(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE idempotency_key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Take the next due job (or one whose worker's lease ran out) and lease it. The
+        returned lease_token must accompany complete() and fail(), so a worker whose
+        lease was taken over cannot overwrite the new attempt's outcome. A job whose
+        lease ran out on its last attempt (its worker hung or died) is failed instead.
+        """
+        now = time.time()
+        lease_token = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                exhausted = self._db.execute(
+                    "SELECT id, attempts, input_path FROM jobs WHERE status = 'running' AND lease_until < ? "
+                    "AND attempts >= max_attempts AND expires_at > ?",
+                    (now, now),
+                ).fetchall()
+                for job in exhausted:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, input_path = NULL, lease_until = NULL, "
+                        "lease_token = NULL, updated_at = ?, expires_at = ? WHERE id = ?",
+                        (f"Worker lease expired on attempt {job['attempts']}", now, now + JOB_TTL_SECONDS, job["id"]),
+                    )
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE expires_at > ? AND ("
+                    "(status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?)) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    self._fail_exhausted(exhausted)
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, lease_token = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (now + JOB_LEASE_SECONDS, lease_token, now, row["id"]),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self._fail_exhausted(exhausted)
+        job = self._to_dict(row)
+        job["attempts"] += 1
+        job["status"] = "running"
+        job["lease_token"] = lease_token
+        return job
+
+    def _fail_exhausted(self, jobs: List[sqlite3.Row]) -> None:
+        for job in jobs:
+            logger.error(f"Job {job['id']} failed: worker lease expired on attempt {job['attempts']}")
+            if job["input_path"]:
+                self._remove_input(job["input_path"])
+
+    def complete(self, job_id: str, lease_token: str, result: Dict) -> None:
+        self._finish(job_id, lease_token, "succeeded", result=json.dumps(result))
+
+    def fail(self, job_id: str, lease_token: str, error: str, attempts: int, max_attempts: int,
+             retryable: bool = True, retry_after: Optional[float] = None) -> str:
+        """
+        Record a failed attempt: requeue with backoff while attempts remain, else fail the job.
+        Returns the new status; raises LeaseLost if the lease is no longer held.
+        """
+        if retryable and attempts < max_attempts:
+            delay = retry_after or random.uniform(0, min(JOB_BACKOFF_CAP, JOB_BACKOFF_BASE * (2 ** attempts)))
+            now = time.time()
+            with self._lock:
+                updated = self._db.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, lease_until = NULL, lease_token = NULL, "
+                    "error = ?, updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'running'",
+                    (now + delay, error, now, job_id, lease_token),
+                ).rowcount
+            if not updated:
+                raise LeaseLost(job_id)
+            logger.warning(f"Job {job_id} attempt {attempts}/{max_attempts} failed ({error}), retrying in {delay:.1f}s")
+            return "queued"
+        self._finish(job_id, lease_token, "failed", error=error)
+        logger.error(f"Job {job_id} failed after {attempts} attempts: {error}")
+        return "failed"
+
+    def _finish(self, job_id: str, lease_token: str, status: str,
+                result: Optional[str] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT input_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, input_path = NULL, lease_until = NULL, "
+                "lease_token = NULL, updated_at = ?, expires_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (status, result, error, now, now + JOB_TTL_SECONDS, job_id, lease_token),
+            ).rowcount
+        if not updated:
+            raise LeaseLost(job_id)
+        if row and row["input_path"]:
+            self._remove_input(row["input_path"])
+
+    def purge_expired(self) -> int:
+        """Delete expired jobs and their input files"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute("SELECT id, input_path FROM jobs WHERE expires_at <= ?", (now,)).fetchall()
+            self._db.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+        for row in rows:
+            if row["input_path"]:
+                self._remove_input(row["input_path"])
+        if rows:
+            logger.info(f"Purged {len(rows)} expired jobs")
+        return len(rows)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE expires_at > ? GROUP BY status", (time.time(),)
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def _remove_input(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        return dict(row)
+
+def job_status(job: Dict) -> Dict:
+    """Public view of a job for GET /jobs/{id}"""
+    status = {
+        "id": job["id"],
+        "status": job["status"],
+        "filename": job["filename"],
+        "attempts": job["attempts"],
+        "maxAttempts": job["max_attempts"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+        "expiresAt": job["expires_at"],
+    }
+    if job["status"] == "queued" and job["attempts"]:
+        status["nextAttemptAt"] = job["available_at"]
+    if job["result"]:
+        status["result"] = json.loads(job["result"])
+    if job["error"]:
+        status["error"] = job["error"]
+    return status
+
+async def process_resume_job(job: Dict) -> Dict:
+    """
+    The /upload pipeline for a queued job: extract (cached by content hash), then enhance
+    """
+    from gemini import enhance_resume_with_ai
+    from gemini_client import get_gemini_client
+
+    upload = IngestedUpload(job["file_type"], job["size"], job["digest"], path=job["input_path"])
+    try:
+        extracted_text = await extract_upload_text(upload)
+    except StageOverloaded as e:
+        raise JobFailed(e.detail, retry_after=float(e.headers["Retry-After"]))
+    except HTTPException as e:
+        raise JobFailed(e.detail, retryable=False)
+    if not extracted_text:
+        raise JobFailed("Could not extract text from the file", retryable=False)
+
+    # Jobs are not served degraded: while the circuit breaker is open, retry once it lets probes through
+    client = get_gemini_client()
+    reason = client.unavailable_reason()
+    if reason == "not_configured":
+        raise JobFailed(f"Gemini is not configured ({client.transport.missing_configuration()})", retryable=False)
+    if reason == "circuit_open":
+        raise JobFailed("Gemini is unavailable (circuit breaker open)", retry_after=client.breaker.retry_after())
+
+    options = json.loads(job["options"])
+    try:
+        async with get_stage("llm").admit():
+            enhanced_data = await enhance_resume_with_ai(extracted_text, mode=options.get("mode"))
+    except StageOverloaded as e:
+        raise JobFailed(e.detail, retry_after=float(e.headers["Retry-After"]))
+    if "error" in enhanced_data and "original_text" in enhanced_data:
+        if enhanced_data.get("reason") == "circuit_open":
+            raise JobFailed("Gemini is unavailable (circuit breaker open)", retry_after=client.breaker.retry_after())
+        raise JobFailed(f"Resume enhancement failed: {enhanced_data['error']}")
+
+    return {
+        "status": "success",
+        "filename": job["filename"],
+        "originalText": extracted_text,
+        "enhancedData": enhanced_data,
+    }
+
+class JobWorkers:
+    """
+    A set of asyncio worker loops claiming jobs from the queue
+    """
+    def __init__(self, queue: JobQueue, concurrency: int = JOB_WORKERS):
+        self.queue = queue
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self._last_purge = 0.0
+
+    async def _run_one(self, job: Dict) -> None:
+        job_id, lease_token = job["id"], job["lease_token"]
+        try:
+            try:
+                result = await process_resume_job(job)
+            except JobFailed as e:
+                await asyncio.to_thread(
+                    self.queue.fail, job_id, lease_token, str(e), job["attempts"], job["max_attempts"],
+                    e.retryable, e.retry_after,
+                )
+            except Exception as e:
+                logger.error(f"Unhandled error in job {job_id}: {str(e)}")
+                await asyncio.to_thread(
+                    self.queue.fail, job_id, lease_token, str(e), job["attempts"], job["max_attempts"]
+                )
+            else:
+                await asyncio.to_thread(self.queue.complete, job_id, lease_token, result)
+                logger.info(f"Job {job_id} succeeded on attempt {job['attempts']}")
+        except LeaseLost:
+            # Took longer than JOB_LEASE_SECONDS; the worker that re-claimed the job owns its outcome
+            logger.warning(f"Job {job_id} attempt {job['attempts']} outlived its lease, discarding its outcome")
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if time.time() - self._last_purge > 60:
+                    self._last_purge = time.time()
+                    await asyncio.to_thread(self.queue.purge_expired)
+                job = await asyncio.to_thread(self.queue.claim)
+            except sqlite3.Error as e:
+                logger.error(f"Job queue error: {str(e)}")
+                job = None
+            if job is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            await self._run_one(job)
+
+    def start(self) -> None:
+        if self.concurrency > 0 and not self._tasks:
+            logger.info(f"Starting {self.concurrency} job workers")
+            self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel the worker loops; interrupted jobs are re-claimed once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Shared queue stored under JOBS_DIR"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(JOBS_DIR)
+    return _queue
+
+async def _run_standalone(concurrency: int) -> None:
+    workers = JobWorkers(get_job_queue(), concurrency)
+    workers.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await workers.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resume processing job workers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Process queued jobs without serving HTTP")
+    worker_parser.add_argument("--concurrency", type=int, default=max(1, JOB_WORKERS))
+    args = parser.parse_args()
+
+    from log_config import configure_logging
+
+    configure_logging()
+    asyncio.run(_run_standalone(args.concurrency))
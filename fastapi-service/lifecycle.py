@@ -0,0 +1,118 @@
+"""
+Service lifecycle: lazy loading of heavy components, explicit warmup and readiness.
+
+Importing the service does no heavy work. Scoring models, the skill matcher, the
+corpus IDF model, the Gemini SDK and the OCR pool load on first use (each behind its own lock) or all
+at once through warm_up(), which the app runs in the background at startup. Under a
+pre-forking server, preload() loads the fork-safe part once in the master (gunicorn.conf.py).
+"""
+
+import gc
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Monotonic reference for startup measurements; set when the service module is imported
+PROCESS_STARTED = time.perf_counter()
+
+def _warm_scoring() -> None:
+    # Imports sklearn and compiles the skill matcher, then exercises the scoring path once
+    from ats_score import calculate_ats_score
+    calculate_ats_score("python developer with docker experience", "python developer")
+
+def _warm_idf_model() -> None:
+    from idf_model import get_idf_model
+    get_idf_model()
+
+def _warm_gemini() -> None:
+    from gemini_client import get_gemini_client
+    transport = get_gemini_client().transport
+    if hasattr(transport, "warm_up"):
+        transport.warm_up()
+
+def _warm_ocr_pool() -> None:
+    from ocr_engine import warm_up_engine
+    from pdf_parser import get_ocr_pool
+    warm_up_engine()
+    pool = get_ocr_pool()
+    if pool is not None:
+        # Force a worker process to spawn (and load an engine) now rather than on the first scanned upload
+        pool.submit(warm_up_engine).result()
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("idf_model", _warm_idf_model),
+    ("scoring", _warm_scoring),
+    ("gemini", _warm_gemini),
+    ("ocr_pool", _warm_ocr_pool),
+]
+
+# Steps that only load read-only data and start no threads, sockets or processes,
+# so they can run in a pre-fork master and be shared with its workers
+PRELOAD_STEPS = ("idf_model", "scoring")
+
+class Lifecycle:
+    """
+    Tracks startup timings and whether every heavy component has been loaded
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.startup_seconds: Optional[float] = None
+
+    def mark_started(self) -> None:
+        """Record how long it took from import to the app accepting requests"""
+        self.startup_seconds = round(time.perf_counter() - PROCESS_STARTED, 3)
+        logger.info(f"Service started in {self.startup_seconds}s")
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Load every heavy component once. Safe to call concurrently and repeatedly.
+        """
+        with self._lock:
+            if self.ready:
+                return dict(self.timings)
+            self.errors.clear()
+            self._run_steps(WARMUP_STEPS)
+            self.ready = not self.errors
+            return dict(self.timings)
+
+    def preload(self) -> Dict[str, float]:
+        """
+        Load the fork-safe components in a master process before it forks workers,
+        then freeze the GC so collections in the workers never touch (and copy) the
+        pages holding them. Workers inherit the timings and warm up only the rest.
+        """
+        with self._lock:
+            self._run_steps([(name, step) for name, step in WARMUP_STEPS if name in PRELOAD_STEPS])
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Preloaded {', '.join(self.timings)}; {gc.get_freeze_count()} objects frozen for sharing")
+        return dict(self.timings)
+
+    def _run_steps(self, steps: List[Tuple[str, Callable[[], None]]]) -> None:
+        for name, step in steps:
+            if name in self.timings:
+                continue
+            started = time.perf_counter()
+            try:
+                step()
+                self.timings[name] = round(time.perf_counter() - started, 3)
+                logger.info(f"Warmed up {name} in {self.timings[name]}s")
+            except Exception as e:
+                logger.error(f"Warmup step {name} failed: {str(e)}")
+                self.errors[name] = str(e)
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "startupSeconds": self.startup_seconds,
+            "warmupSeconds": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+lifecycle = Lifecycle()
@@ -0,0 +1,181 @@
+"""
+Non-blocking, structured and redacting logging.
+
+Request handlers only put records on an in-memory queue; a listener thread formats
+them (JSON by default), redacts personal data and writes them out. Payload capture
+(raw Gemini responses, parsed resumes) is off unless the request is sampled
+(LOG_PAYLOAD_SAMPLE_RATE) or carries the X-Debug-Payloads header matching
+LOG_DEBUG_KEY, so payloads are not even serialized on the normal path.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+from typing import Any, Optional
+
+from metrics import LOG_RECORDS_DROPPED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_REDACT = os.getenv("LOG_REDACT", "1") != "0"
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+# Shared secret for per-request full payload logging; unset disables the debug header
+LOG_DEBUG_KEY = os.getenv("LOG_DEBUG_KEY")
+DEBUG_HEADER = "x-debug-payloads"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+# None (no capture), "sample" (redacted, truncated) or "full" (redacted, untruncated)
+payload_capture_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("payload_capture", default=None)
+
+def _mask_phone(match: re.Match) -> str:
+    # Date ranges like "2014 - 2018" look similar; phone numbers have at least 9 digits
+    digits = sum(char.isdigit() for char in match.group(0))
+    return "[phone]" if 9 <= digits <= 15 else match.group(0)
+
+_REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "[email]"),
+    (re.compile(r"https?://\S+|(?:www\.)?linkedin\.com/\S+|github\.com/\S+", re.IGNORECASE), "[url]"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[ssn]"),
+    (re.compile(r"(?<!\w)\+?\d[\d ().-]{7,}\d(?!\w)"), _mask_phone),
+]
+
+def redact(text: str) -> str:
+    """Mask emails, URLs, phone numbers and SSN-like numbers"""
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+# Attributes every LogRecord has; anything else came in through extra= and is emitted as a field
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class StructuredFormatter(logging.Formatter):
+    """
+    One JSON object per record (or a plain line in text mode), with the request id,
+    extra fields and redaction applied. Runs on the listener thread.
+    """
+    def __init__(self, json_output: bool = True, redact_output: bool = True):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        self.json_output = json_output
+        self.redact_output = redact_output
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        if self.redact_output:
+            message = redact(message)
+        if not self.json_output:
+            record.message = message
+            prefix = f"[{record.request_id}] " if getattr(record, "request_id", None) else ""
+            return f"{self.formatTime(record)} {record.levelname} {record.name}: {prefix}{message}"
+
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": message,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and value is not None:
+                entry[key] = redact(value) if self.redact_output and isinstance(value, str) else value
+        return json.dumps(entry, default=str)
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records without formatting them (the queue is in-process) and drops
+    records instead of blocking when the queue is full
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_lock = threading.Lock()
+
+def configure_logging() -> None:
+    """
+    Route the root logger through the queue. Safe to call repeatedly; after a fork
+    (e.g. preloaded workers) it starts a fresh listener in the child.
+    """
+    global _listener, _listener_pid
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+        log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        output = logging.StreamHandler()
+        output.setFormatter(StructuredFormatter(json_output=LOG_FORMAT == "json", redact_output=LOG_REDACT))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_NonBlockingQueueHandler(log_queue))
+        root.setLevel(LOG_LEVEL)
+        # Third-party debug chatter (multipart parsing, PIL plugins) is never useful on the request path
+        for noisy in ("multipart", "PIL", "urllib3"):
+            logging.getLogger(noisy).setLevel(max(logging.INFO, root.level))
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+class OnceFilter(logging.Filter):
+    """
+    Passes each distinct message once per process, for a logger whose warnings would
+    otherwise repeat on every call
+    """
+    def __init__(self):
+        super().__init__()
+        self._seen = set()
+        self._seen_lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        with self._seen_lock:
+            if message in self._seen:
+                return False
+            self._seen.add(message)
+        return True
+
+def choose_payload_capture(debug_header: Optional[str]) -> Optional[str]:
+    """Decide payload capture for a new request: full with a valid debug key, else sampled"""
+    if LOG_DEBUG_KEY and debug_header == LOG_DEBUG_KEY:
+        return "full"
+    if LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        return "sample"
+    return None
+
+def log_payload(logger: logging.Logger, label: str, payload: Any) -> None:
+    """
+    Log a payload only if the current request captures payloads. Serialization happens
+    here, after that check, so uncaptured requests pay nothing.
+    """
+    mode = payload_capture_var.get()
+    if mode is None or not logger.isEnabledFor(logging.INFO):
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"), default=str)
+    if mode == "sample" and len(text) > LOG_PAYLOAD_MAX_CHARS:
+        text = text[:LOG_PAYLOAD_MAX_CHARS] + f"... [{len(text) - LOG_PAYLOAD_MAX_CHARS} more chars]"
+    logger.info(f"{label}: {text}", extra={"payload": label, "capture": mode})
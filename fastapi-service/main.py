@@ -1,11 +1,24 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Depends
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import os
+import uuid
 from typing import Optional
 
+from lifecycle import lifecycle
+from serving import memory_recycler
+from log_config import (
+    DEBUG_HEADER, choose_payload_capture, configure_logging, payload_capture_var, request_id_var, stop_logging,
+)
+from metrics import (
+    HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, LLM_DEGRADED, render_metrics, server_timing_header, start_request_timings, timed,
+)
+
 security = HTTPBearer()
 
 # Import our modules (to be implemented)
@@ -13,7 +26,41 @@ security = HTTPBearer()
 # from pdf_parser import extract_text_from_pdf
 # from ats_score import calculate_tf_idf_score
 
-app = FastAPI(title="Resume ATS API", version="1.0.0")
+# Load heavy components in the background at startup; /ready reports when they are loaded.
+# With WARMUP_ON_STARTUP=0 they load on first use instead (or via POST /warmup).
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No-op in a single process; in a worker forked from a preloaded master it starts this process's log listener
+    configure_logging()
+    lifecycle.mark_started()
+    if WARMUP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, lifecycle.warm_up)
+    job_workers = JobWorkers(get_job_queue())
+    job_workers.start()
+    yield
+    from resume_index import save_all_indexes
+
+    await job_workers.stop()
+    save_all_indexes()
+    shutdown_stages()
+    shutdown_ocr_pool()
+    stop_logging()
+
+app = FastAPI(title="Resume ATS API", version="1.0.0", lifespan=lifespan)
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Refuse multipart uploads whose declared size is over the limit before the body is parsed.
+    Registered first, so it runs inside the CORS, metrics and request id middlewares and
+    its 413 carries their headers; without CORS headers the browser could not read it.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data") \
+            and exceeds_upload_limit(request.headers.get("content-length")):
+        return JSONResponse(status_code=413, content={"detail": "Upload is larger than the allowed size."})
+    return await call_next(request)
 
 # CORS middleware for Next.js frontend
 app.add_middleware(
@@ -25,6 +72,50 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Request latency histogram, in-flight gauge and a Server-Timing header with the
+    stages timed during the request. For streaming responses these cover the time
+    until the response headers are sent; the stream's events carry the rest.
+    """
+    timings = start_request_timings()
+    start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        HTTP_IN_FLIGHT.dec()
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method, route.path if route is not None else "unmatched", str(response.status_code)
+    ).observe(elapsed)
+    response.headers["Server-Timing"] = ", ".join(
+        entry for entry in (server_timing_header(timings), f"total;dur={elapsed * 1000:.1f}") if entry
+    )
+    memory_recycler.request_finished()
+    return response
+
+@app.middleware("http")
+async def bind_request_context(request: Request, call_next):
+    """
+    Tag log records with a request id (X-Request-ID, generated if absent) and decide
+    whether this request's payloads are logged (sampling or the debug header)
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    payload_capture_var.set(choose_payload_capture(request.headers.get(DEBUG_HEADER)))
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage histograms, OCR/LLM counters and in-flight gauges"""
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
 @app.get("/")
 async def root():
     return {"message": "Resume ATS API is running"}
@@ -33,40 +124,323 @@ async def root():
 async def ping():
     return {"status": "ok", "message": "Service is healthy"}
 
-from pdf_parser import extract_text_from_pdf, detect_file_type, extract_text_from_image
-from gemini import enhance_resume_with_ai
-from PIL import Image
-import io
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once scoring models, the Gemini client and the OCR pool are loaded
+    """
+    status = lifecycle.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.post("/warmup")
+async def warmup():
+    """
+    Load every heavy component now and report how long each took
+    """
+    await asyncio.get_running_loop().run_in_executor(None, lifecycle.warm_up)
+    status = lifecycle.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+from pdf_parser import extract_resume_sections, local_resume_data, shutdown_ocr_pool
+from gemini import (
+    ENHANCE_MODE, enhance_resume_with_ai, enhance_resume_sections, enhancement_error, format_resume_sections,
+    gemini_unavailable_reason,
+)
+from executor import get_stage, run_in_stage, shutdown_stages
+from extraction_cache import get_extraction_cache
+from ingest import exceeds_upload_limit, extract_text_by_type, extract_upload_text, ingest_upload
+from jobs import JobWorkers, get_job_queue, job_status
+import json
+import time
 
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging: queued, structured and redacted (see log_config.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@app.get("/cache/stats")
+async def cache_stats():
+    from jd_cache import get_jd_cache
+
+    return {"extraction": get_extraction_cache().stats(), "jobDescriptions": get_jd_cache().stats()}
+
+@app.post("/job-descriptions")
+async def register_job_description(request: dict):
+    """
+    Analyse a job description once and return an id that /ats-score accepts in place of the text
+    """
+    try:
+        job_description = request.get("jobDescription", "")
+        if not job_description:
+            raise HTTPException(status_code=400, detail="Missing job description")
+
+        from ats_score import analyze_and_register
+
+        analysis = await run_in_stage("score", analyze_and_register, job_description)
+
+        return JSONResponse({
+            "success": True,
+            "jobDescriptionId": analysis.id,
+            "skills": sorted(analysis.skills)
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error registering job description: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/ats-score")
 async def analyze_ats_score(request: dict):
     try:
         resume_text = request.get("resumeData", "")
         job_description = request.get("jobDescription", "")
+        job_description_id = request.get("jobDescriptionId", "")
         
-        if not resume_text or not job_description:
+        if not resume_text or not (job_description or job_description_id):
             raise HTTPException(status_code=400, detail="Missing resume data or job description")
             
-        from ats_score import calculate_ats_score
+        from ats_score import analyze_job_description, calculate_ats_score_for_job, get_job_description
+        
+        # Reuse the cached analysis of the job description when possible
+        if job_description:
+            job = await run_in_stage("score", analyze_job_description, job_description)
+        else:
+            try:
+                job = await run_in_stage("score", get_job_description, job_description_id)
+            except KeyError:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Unknown or expired jobDescriptionId. Register the job description again."
+                )
         
         # Calculate ATS score and get analysis
-        analysis = calculate_ats_score(resume_text, job_description)
+        analysis = await run_in_stage("score", calculate_ats_score_for_job, resume_text, job)
         
         return JSONResponse({
             "success": True,
             "analysis": analysis
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in ATS scoring: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+MAX_BATCH_DOCUMENTS = int(os.getenv("MAX_BATCH_DOCUMENTS", "1000"))
+
+def parse_top_k(value, default: Optional[int] = None) -> Optional[int]:
+    """
+    topK from a request body: a positive integer (or a string of digits), the default when absent
+    """
+    if value is None:
+        return default
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise HTTPException(status_code=422, detail="topK must be a positive integer")
+    return value
+
+@app.post("/ats-score/batch")
+async def analyze_ats_score_batch(request: dict):
+    """
+    Score one resume against many job descriptions, many resumes against one
+    job description, or any mix of both. Results are ranked by score.
+    """
+    try:
+        resumes = request.get("resumes") or ([request["resumeData"]] if request.get("resumeData") else [])
+        job_descriptions = request.get("jobDescriptions") or (
+            [request["jobDescription"]] if request.get("jobDescription") else []
+        )
+        top_k = parse_top_k(request.get("topK"))
+
+        if not resumes or not job_descriptions:
+            raise HTTPException(status_code=400, detail="Missing resumes or job descriptions")
+        if not all(isinstance(text, str) and text for text in resumes + job_descriptions):
+            raise HTTPException(status_code=400, detail="Resumes and job descriptions must be non-empty strings")
+        if len(resumes) + len(job_descriptions) > MAX_BATCH_DOCUMENTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_DOCUMENTS} documents per batch")
+
+        from ats_score import calculate_ats_scores_batch
+
+        results = await run_in_stage("score", calculate_ats_scores_batch, resumes, job_descriptions, top_k)
+
+        return JSONResponse({
+            "success": True,
+            "results": results
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch ATS scoring: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/idf/documents")
+async def add_idf_documents(request: dict):
+    """
+    Fold new documents (typically fresh job descriptions) into the corpus IDF model
+    and persist it, so content relevance stays comparable across requests
+    """
+    try:
+        documents = request.get("documents") or []
+        if not documents or not all(isinstance(document, str) and document for document in documents):
+            raise HTTPException(status_code=400, detail="documents must be a non-empty list of strings")
+
+        from idf_model import IdfModelUnavailable, update_idf_model
+
+        try:
+            model, added = await run_in_stage("score", update_idf_model, documents)
+        except IdfModelUnavailable as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        return JSONResponse({
+            "success": True,
+            "added": added,
+            "documents": model.n_docs,
+            "terms": len(model.terms)
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating IDF model: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _resume_index(name: str):
+    """The named index; first use loads its snapshot and replays its journal, so off the event loop"""
+    from resume_index import get_resume_index
+
+    try:
+        return await run_in_stage("score", get_resume_index, name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/indexes/{name}/resumes")
+async def index_resumes(name: str, request: dict):
+    """
+    Add or replace resumes in a candidate index: {"resumes": [{"id": ..., "text": ...}]}
+    """
+    try:
+        resumes = request.get("resumes") or []
+        if not resumes or not all(isinstance(r, dict) and r.get("id") and r.get("text") for r in resumes):
+            raise HTTPException(status_code=400, detail="resumes must be a non-empty list of {id, text} objects")
+        if len(resumes) > MAX_BATCH_DOCUMENTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_DOCUMENTS} resumes per request")
+
+        index = await _resume_index(name)
+
+        replaced = await run_in_stage("score", index.add_many, [(str(r["id"]), r["text"]) for r in resumes])
+
+        return JSONResponse({
+            "success": True,
+            "added": len(resumes) - replaced,
+            "replaced": replaced,
+            "size": len(index)
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error indexing resumes: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/indexes/{name}/resumes/{resume_id}")
+async def remove_indexed_resume(name: str, resume_id: str):
+    index = await _resume_index(name)
+    if not await run_in_stage("score", index.remove, resume_id):
+        raise HTTPException(status_code=404, detail="Resume not found in index")
+    return JSONResponse({"success": True, "size": len(index)})
+
+@app.post("/indexes/{name}/query")
+async def query_resume_index(name: str, request: dict):
+    """
+    Top-k indexed resumes for a job description (text or registered jobDescriptionId)
+    """
+    try:
+        job_description = request.get("jobDescription", "")
+        job_description_id = request.get("jobDescriptionId", "")
+        top_k = parse_top_k(request.get("topK"), default=10)
+        if not (job_description or job_description_id):
+            raise HTTPException(status_code=400, detail="Missing job description")
+
+        from ats_score import analyze_job_description, get_job_description
+
+        index = await _resume_index(name)
+        if job_description:
+            job = await run_in_stage("score", analyze_job_description, job_description)
+        else:
+            try:
+                job = await run_in_stage("score", get_job_description, job_description_id)
+            except KeyError:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Unknown or expired jobDescriptionId. Register the job description again."
+                )
+
+        results = await run_in_stage("score", index.query, job, top_k)
+
+        return JSONResponse({
+            "success": True,
+            "jobDescriptionId": job.id,
+            "size": len(index),
+            "results": results
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error querying resume index: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/indexes/{name}/save")
+async def save_index(name: str):
+    """Write a snapshot now; changes are journaled as they happen, so this only shortens recovery"""
+    index = await _resume_index(name)
+    await run_in_stage("score", index.save)
+    return JSONResponse({"success": True, "size": len(index)})
+
+# How each gemini_unavailable_reason() is worded for clients
+UNAVAILABLE_WORDING = {"not_configured": "not configured", "circuit_open": "temporarily unavailable"}
+
+def degraded_result(extracted_text: str, reason: str, detail: str) -> dict:
+    """
+    Degraded mode: the local section parse, mapped to the shape Gemini returns and
+    flagged as not enhanced, in place of Gemini's
+    """
+    LLM_DEGRADED.labels(reason).inc()
+    logger.warning(f"Serving local parse without AI enhancement: {detail}")
+    return {
+        "enhancedData": local_resume_data(extracted_text),
+        "enhanced": False,
+        "degraded": {"reason": reason, "detail": detail},
+    }
+
+def enhancement_failed(extracted_text: str, enhanced_data: dict) -> dict:
+    """
+    The degraded result for an enhancement that failed, or that the circuit breaker refused mid-way
+    """
+    reason = enhanced_data.get("reason", "llm_error")
+    if reason in UNAVAILABLE_WORDING:
+        return degraded_result(extracted_text, reason, f"AI enhancement is {UNAVAILABLE_WORDING[reason]}.")
+    return degraded_result(extracted_text, reason, f"AI enhancement failed: {enhanced_data['error']}")
+
+async def enhance_or_degrade(extracted_text: str, mode: Optional[str] = None) -> dict:
+    """
+    Enhance with Gemini, or return the degraded local result: at once while Gemini
+    is not configured or the circuit breaker is open, or after enhancement failed
+    """
+    reason = gemini_unavailable_reason()
+    if reason is not None:
+        return degraded_result(extracted_text, reason, f"AI enhancement is {UNAVAILABLE_WORDING[reason]}.")
+    async with get_stage("llm").admit():
+        enhanced_data = await enhance_resume_with_ai(extracted_text, mode)
+    if "error" in enhanced_data and "original_text" in enhanced_data:
+        return enhancement_failed(extracted_text, enhanced_data)
+    return {"enhancedData": enhanced_data, "enhanced": True}
+
 @app.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
@@ -74,44 +448,14 @@ async def upload_file(
     try:
         logger.info(f"Received file: {file.filename}")
         
-        # Read the file content
-        content = await file.read()
-        logger.info(f"File size: {len(content)} bytes")
+        # Stream the upload in, rejecting unsupported or oversized files early
+        upload = await ingest_upload(file)
+        logger.info(f"File size: {upload.size} bytes")
         
-        # Detect file type
         try:
-            file_type = detect_file_type(content)
-            logger.info(f"Detected file type: {file_type}")
-        except Exception as e:
-            logger.error(f"Error detecting file type: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Error detecting file type: {str(e)}")
-        
-        extracted_text = ""
-        
-        try:
-            if file_type.startswith('image/'):
-                # Handle image files with OCR
-                logger.info("Processing image file with OCR")
-                image = Image.open(io.BytesIO(content))
-                extracted_text = extract_text_from_image(image)
-                logger.info(f"OCR text length: {len(extracted_text) if extracted_text else 0}")
-            elif file_type == 'application/pdf':
-                # Handle PDF files
-                logger.info("Processing PDF file")
-                extracted_text = extract_text_from_pdf(content)
-                logger.info(f"PDF text length: {len(extracted_text) if extracted_text else 0}")
-            else:
-                logger.error(f"Unsupported file type: {file_type}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {file_type}. Only PDF and image files are supported."
-                )
-        except Exception as e:
-            logger.error(f"Error processing file: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing file: {str(e)}"
-            )
+            extracted_text = await extract_upload_text(upload)
+        finally:
+            upload.close()
         
         if not extracted_text:
             logger.error("No text could be extracted from the file")
@@ -121,10 +465,12 @@ async def upload_file(
             )
             
         try:
-            # Use Gemini to parse and enhance the resume
+            # Use Gemini to parse and enhance the resume, or the local parse while it is unavailable
             logger.info("Using Gemini AI to parse and enhance the resume")
-            enhanced_data = enhance_resume_with_ai(extracted_text)
+            enhancement = await enhance_or_degrade(extracted_text)
             logger.info("Resume enhancement complete")
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error parsing text into sections: {str(e)}")
             raise HTTPException(
@@ -135,15 +481,15 @@ async def upload_file(
         try:
             # Create the response
             logger.info("Creating response")
-            response = JSONResponse(content={
-                "status": "success",
-                "filename": file.filename,
-                "originalText": extracted_text,
-                "enhancedData": enhanced_data
-            })
+            with timed("serialize"):
+                response = JSONResponse(content={
+                    "status": "success",
+                    "filename": file.filename,
+                    "originalText": extracted_text,
+                    **enhancement,
+                })
             response.headers["Access-Control-Allow-Credentials"] = "true"
             logger.info(f"Successfully processed file: {file.filename}")
-            print(response)
             return response
             
         except Exception as e:
@@ -152,10 +498,159 @@ async def upload_file(
                 status_code=500,
                 detail=f"Error creating response: {str(e)}"
             )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unhandled error in upload endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _format_event(event: str, payload: dict, sse: bool) -> str:
+    """Encode one progress event as an NDJSON line or an SSE frame"""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"event": event, **payload}) + "\n"
+
+@app.post("/upload/stream")
+async def upload_file_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    mode: Optional[str] = Form(None),
+):
+    """
+    Streaming variant of /upload. Emits fileType, originalText, sections and
+    enhancedData events as each stage finishes, each with cumulative stage timings.
+    Responds with SSE when the client accepts text/event-stream, NDJSON otherwise.
+    A client that disconnects early cancels the remaining work.
+    """
+    logger.info(f"Received file for streaming upload: {file.filename}")
+    # Rejections during ingestion are plain HTTP errors, before the stream starts
+    upload = await ingest_upload(file)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    enhance_mode = mode or ENHANCE_MODE
+
+    async def events():
+        started = time.perf_counter()
+        timings = {}
+
+        def mark(stage: str) -> dict:
+            timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+            return dict(timings)
+
+        try:
+            cache = get_extraction_cache()
+            cache_key = upload.cache_key()
+            cached_text = await cache.get_async(cache_key)
+
+            yield _format_event("fileType", {
+                "fileType": upload.file_type, "cached": cached_text is not None, "timingsMs": mark("detect"),
+            }, sse)
+
+            extracted_text = cached_text
+            if extracted_text is None:
+                extracted_text = await extract_text_by_type(upload.source, upload.file_type)
+                if extracted_text:
+                    await cache.put_async(cache_key, extracted_text)
+            upload.close()
+            if not extracted_text:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Could not extract text from the file. Please ensure the file contains readable text."
+                )
+            yield _format_event("originalText", {"originalText": extracted_text, "timingsMs": mark("extract")}, sse)
+
+            if await request.is_disconnected():
+                logger.info("Client disconnected after extraction, skipping Gemini calls")
+                return
+
+            reason = gemini_unavailable_reason()
+            if reason is not None:
+                # Degraded mode: answer with the local parse instead of waiting on a failing Gemini
+                enhancement = degraded_result(extracted_text, reason, f"AI enhancement is {UNAVAILABLE_WORDING[reason]}.")
+                yield _format_event("sections", {
+                    "sections": enhancement["enhancedData"], "source": "local", "timingsMs": mark("sections"),
+                }, sse)
+                yield _format_event("enhancedData", {
+                    "status": "success", "filename": file.filename, **enhancement, "timingsMs": mark("enhance"),
+                }, sse)
+                return
+
+            sections_sent = False
+            async with get_stage("llm").admit():
+                if enhance_mode == "single":
+                    # One structured request; the quick local parse stands in for the sections event
+                    sections = extract_resume_sections(extracted_text)
+                    yield _format_event("sections", {"sections": sections, "source": "local", "timingsMs": mark("sections")}, sse)
+                    sections_sent = True
+                    enhanced_data = await enhance_resume_with_ai(extracted_text, mode="single")
+                else:
+                    # Either pass failing degrades like the single-request mode does
+                    sections = await format_resume_sections(extracted_text)
+                    if "error" in sections:
+                        enhanced_data = {
+                            "error": sections["error"],
+                            "original_text": extracted_text,
+                            "reason": sections.get("reason", "llm_error"),
+                        }
+                    else:
+                        yield _format_event("sections", {"sections": sections, "source": "gemini", "timingsMs": mark("sections")}, sse)
+                        sections_sent = True
+                        if await request.is_disconnected():
+                            logger.info("Client disconnected after sectioning, skipping enhancement")
+                            return
+                        try:
+                            enhanced_data = await enhance_resume_sections(sections)
+                        except Exception as e:
+                            logger.error(f"Error enhancing resume sections: {str(e)}")
+                            enhanced_data = enhancement_error(e, extracted_text)
+            if "error" in enhanced_data and "original_text" in enhanced_data:
+                enhancement = enhancement_failed(extracted_text, enhanced_data)
+                if not sections_sent:
+                    yield _format_event("sections", {
+                        "sections": enhancement["enhancedData"], "source": "local", "timingsMs": mark("sections"),
+                    }, sse)
+            else:
+                enhancement = {"enhancedData": enhanced_data, "enhanced": True}
+            yield _format_event("enhancedData", {
+                "status": "success", "filename": file.filename, **enhancement, "timingsMs": mark("enhance"),
+            }, sse)
+        except HTTPException as e:
+            yield _format_event("error", {"status": e.status_code, "detail": e.detail, "timingsMs": mark("error")}, sse)
+        except Exception as e:
+            logger.error(f"Unhandled error in streaming upload: {str(e)}")
+            yield _format_event("error", {"status": 500, "detail": str(e), "timingsMs": mark("error")}, sse)
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    # The background task also removes the spooled file if the client disconnects before extraction
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"},
+                             background=BackgroundTask(upload.close))
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    mode: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Queue an upload for background processing and return its job id immediately.
+    Resubmitting with the same Idempotency-Key returns the original job.
+    """
+    upload = await ingest_upload(file)
+    try:
+        job = await asyncio.to_thread(
+            get_job_queue().enqueue, upload, file.filename, {"mode": mode}, idempotency_key
+        )
+    finally:
+        upload.close()
+    return JSONResponse(status_code=202, content=job_status(job), headers={"Location": f"/jobs/{job['id']}"})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued job, with the /upload response as result once it succeeded"""
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job_status(job)
+
 @app.post("/enhance-resume")
 async def enhance_resume(file: UploadFile = File(...)):
     """
@@ -185,35 +680,62 @@ async def enhance_resume(file: UploadFile = File(...)):
 @app.post("/check-ats")
 async def check_ats_score(
     file: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    ai_analysis: bool = Form(False),
 ):
     """
-    Endpoint to check ATS score
-    TODO: Implement actual ATS scoring logic
+    Score an uploaded resume against a job description in one request: detect,
+    extract (cached by content hash) and score locally, with no Gemini call.
+    The job description is analysed while the file is being extracted.
+    With ai_analysis=true, a Gemini ATS analysis is added as aiAnalysis.
     """
     try:
-        # Validate file type
-        if not file.filename.endswith(('.pdf', '.doc', '.docx')):
-            raise HTTPException(status_code=400, detail="Unsupported file type")
-        
-        # TODO: Extract text from resume
-        # resume_text = extract_text_from_pdf(file)
-        
-        # TODO: Calculate TF-IDF score
-        # score = calculate_tf_idf_score(resume_text, job_description)
-        
-        # TODO: Analyze with Gemini AI
-        # analysis = analyze_ats_score(resume_text, job_description)
-        
-        return JSONResponse({
+        if not job_description.strip():
+            raise HTTPException(status_code=400, detail="Missing job description")
+
+        from ats_score import analyze_job_description, calculate_ats_score_for_job
+
+        upload = await ingest_upload(file)
+        try:
+            extracted_text, job = await asyncio.gather(
+                extract_upload_text(upload),
+                run_in_stage("score", analyze_job_description, job_description),
+            )
+        finally:
+            upload.close()
+
+        if not extracted_text:
+            raise HTTPException(
+                status_code=400,
+                detail="Could not extract text from the file. Please ensure the file contains readable text."
+            )
+
+        analysis = await run_in_stage("score", calculate_ats_score_for_job, extracted_text, job)
+        result = {
             "success": True,
-            "message": "ATS checking endpoint ready",
             "filename": file.filename,
-            "job_description_length": len(job_description)
-        })
-    
+            "textLength": len(extracted_text),
+            "analysis": analysis,
+        }
+
+        reason = gemini_unavailable_reason() if ai_analysis else None
+        if reason is not None:
+            LLM_DEGRADED.labels(reason).inc()
+            result["aiAnalysis"] = {"error": f"AI analysis is {UNAVAILABLE_WORDING[reason]}."}
+        elif ai_analysis:
+            from gemini import analyze_ats_score as analyze_ats_with_ai
+
+            async with get_stage("llm").admit():
+                result["aiAnalysis"] = await analyze_ats_with_ai(extracted_text, job_description)
+
+        return JSONResponse(result)
+
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.error(f"Error in ATS check: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    # Single process for development; serve with `gunicorn -c gunicorn.conf.py main:app` for multiple workers
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,113 @@
+"""
+Latency and throughput instrumentation.
+
+Stages are timed with timed("<stage>"), which observes a Prometheus histogram and
+also records the duration on the current request, so the HTTP middleware can send a
+Server-Timing header with the per-request breakdown. Metrics are exported on /metrics;
+set PROMETHEUS_MULTIPROC_DIR to aggregate across worker processes.
+"""
+
+import contextlib
+import contextvars
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+
+# Stage latencies span ~1ms (detection, scoring) to tens of seconds (OCR, Gemini)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "resume_stage_seconds", "Time spent in each processing stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "resume_http_request_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("resume_http_requests_in_flight", "HTTP requests being handled", multiprocess_mode="livesum")
+STAGE_IN_FLIGHT = Gauge(
+    "resume_stage_in_flight", "Tasks running or queued per executor stage", ["stage"], multiprocess_mode="livesum"
+)
+OCR_PAGES = Counter("resume_ocr_pages_total", "Rendered pages and embedded images sent to OCR, by outcome", ["outcome"])
+OCR_REUSE = Counter(
+    "resume_ocr_reuse_total", "Embedded images checked for an earlier OCR result: document, cache or miss", ["result"]
+)
+OCR_SECONDS_SAVED = Counter(
+    "resume_ocr_seconds_saved_total", "OCR time avoided by reusing results, as measured on first recognition"
+)
+LLM_CALLS = Counter("resume_llm_calls_total", "Gemini generation calls, by outcome", ["outcome"])
+LLM_RETRIES = Counter("resume_llm_retries_total", "Gemini calls retried after a transient error")
+LLM_HEDGES = Counter("resume_llm_hedges_total", "Hedged Gemini requests started")
+LLM_TOKENS = Counter("resume_llm_tokens_total", "Estimated Gemini tokens (4 characters per token)", ["kind"])
+PROMPT_INPUT_TOKENS = Counter(
+    "resume_prompt_input_tokens_total", "Estimated tokens of text put into prompts, raw and after preparation",
+    ["input", "kind"],
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "resume_llm_circuit_state", "Gemini circuit breaker state: 0 closed, 1 half-open, 2 open", multiprocess_mode="livemax"
+)
+LLM_CIRCUIT_REJECTED = Counter("resume_llm_circuit_rejected_total", "Gemini calls refused by the open circuit breaker")
+LLM_DEGRADED = Counter(
+    "resume_llm_degraded_total", "Responses served from the local parse instead of Gemini, by reason", ["reason"]
+)
+LLM_IN_FLIGHT = Gauge("resume_llm_in_flight", "Gemini requests in flight", multiprocess_mode="livesum")
+LOG_RECORDS_DROPPED = Counter("resume_log_records_dropped_total", "Log records dropped because the log queue was full")
+
+# (stage, seconds) pairs recorded during the current request
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+def observe(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """Time a block (or, as a decorator, a function) as one observation of a stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """Begin collecting stage timings for the current request"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """
+    Server-Timing value with one entry per stage; repeated stages (e.g. OCR pages)
+    are summed and their count is given in desc
+    """
+    totals: Dict[str, List[float]] = {}
+    for stage, seconds in timings:
+        total = totals.setdefault(stage, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+    entries = []
+    for stage, (seconds, count) in totals.items():
+        entry = f"{stage};dur={seconds * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count}x"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Gemini models (about 4 characters per token)"""
+    return (len(text) + 3) // 4
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus exposition of every metric, aggregated across processes when configured"""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
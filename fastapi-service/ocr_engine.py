@@ -0,0 +1,227 @@
+"""
+OCR engines, engine pooling and image preprocessing.
+
+The tesserocr engine keeps a Tesseract API instance alive, so the language data is
+loaded once per engine instead of once per image. tesserocr is in requirements.txt
+and builds against libtesseract (libtesseract-dev and libleptonica-dev on Debian).
+Where it is not installed, the pytesseract engine is used instead, with a warning:
+it starts a tesseract process for every image.
+
+Engines are checked out of a per-process EnginePool, so each engine handles one
+image at a time. OCR pool processes build their own pool after the fork.
+Before recognition, images are converted to grayscale, oversized ones (phone
+photos) are downscaled, and the result is binarized.
+"""
+
+import abc
+import contextlib
+import logging
+import math
+import os
+import queue
+import threading
+from typing import Callable, Iterator, List, Optional
+
+from PIL import Image
+
+from log_config import OnceFilter
+
+logger = logging.getLogger(__name__)
+# Engines are created per pool slot and per process; the fallback is reported once
+fallback_logger = logging.getLogger(f"{__name__}.fallback")
+fallback_logger.addFilter(OnceFilter())
+
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")  # "auto", "tesserocr" or "pytesseract"
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Tesseract page segmentation mode; 3 is fully automatic, 4 a single column, 6 one block of text
+OCR_PSM = int(os.getenv("OCR_PSM", "3"))
+# Engines per process; they are created on demand, up to this many concurrent OCR calls
+OCR_ENGINES = int(os.getenv("OCR_ENGINES", "4"))
+OCR_MAX_IMAGE_PIXELS = int(os.getenv("OCR_MAX_IMAGE_PIXELS", str(9_000_000)))
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "1") != "0"
+
+def otsu_threshold(histogram: List[int]) -> int:
+    """Threshold of a 256-bin grayscale histogram that best separates ink from background"""
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = background_sum = 0
+    best_threshold, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background
+        foreground_mean = (weighted_total - background_sum) / foreground
+        variance = background * foreground * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+def preprocess_image(image: Image.Image) -> Image.Image:
+    """
+    Grayscale (transparent areas become white), downscale to OCR_MAX_IMAGE_PIXELS,
+    then binarize with Otsu's threshold when OCR_BINARIZE is on
+    """
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    if image.mode != "L":
+        image = image.convert("L")
+
+    pixels = image.width * image.height
+    if pixels > OCR_MAX_IMAGE_PIXELS:
+        scale = math.sqrt(OCR_MAX_IMAGE_PIXELS / pixels)
+        image = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))), Image.LANCZOS)
+
+    if OCR_BINARIZE:
+        threshold = otsu_threshold(image.histogram())
+        image = image.point([0 if level <= threshold else 255 for level in range(256)])
+    return image
+
+class OcrEngine(abc.ABC):
+    """
+    Recognizes text in one preprocessed image at a time
+    """
+    name = "base"
+
+    @abc.abstractmethod
+    def recognize(self, image: Image.Image) -> str:
+        """Text of a preprocessed image"""
+
+    def close(self) -> None:
+        pass
+
+class TesserocrEngine(OcrEngine):
+    """
+    A long-lived Tesseract API instance with the language data loaded once
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG, psm: int = OCR_PSM):
+        import tesserocr
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM(psm))
+
+    def recognize(self, image: Image.Image) -> str:
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+
+    def close(self) -> None:
+        self._api.End()
+
+class PytesseractEngine(OcrEngine):
+    """
+    Fallback engine: one tesseract process per image
+    """
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG, psm: int = OCR_PSM):
+        self.lang = lang
+        self.config = f"--psm {psm}"
+
+    def recognize(self, image: Image.Image) -> str:
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+def create_engine(kind: str = OCR_ENGINE) -> OcrEngine:
+    """
+    Build an engine of the configured kind; "auto" prefers tesserocr and falls back to pytesseract
+    """
+    if kind in ("auto", "tesserocr"):
+        try:
+            return TesserocrEngine()
+        except ImportError:
+            if kind == "tesserocr":
+                raise
+            fallback_logger.warning(
+                "tesserocr is not installed; using the pytesseract OCR engine, one tesseract process per image"
+            )
+    elif kind != "pytesseract":
+        raise ValueError(f"Unknown OCR engine {kind!r}")
+    return PytesseractEngine()
+
+class EnginePool:
+    """
+    Up to size engines, created on first demand and reused; callers wait when all are busy.
+    An engine that raised is closed and replaced, since its state is unknown.
+    """
+    def __init__(self, size: int = OCR_ENGINES, factory: Callable[[], OcrEngine] = create_engine):
+        self.size = max(1, size)
+        self._factory = factory
+        self._idle: "queue.LifoQueue[OcrEngine]" = queue.LifoQueue()
+        # One slot per engine that exists or may be created
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    @contextlib.contextmanager
+    def engine(self) -> Iterator[OcrEngine]:
+        self._slots.acquire()
+        try:
+            engine = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            yield engine
+        except Exception:
+            self._close(engine)
+            raise
+        else:
+            self._idle.put(engine)
+        finally:
+            self._slots.release()
+
+    def _checkout(self) -> OcrEngine:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            engine = self._factory()
+            logger.debug(f"Created {engine.name} OCR engine")
+            return engine
+
+    @staticmethod
+    def _close(engine: OcrEngine) -> None:
+        try:
+            engine.close()
+        except Exception as e:
+            logger.error(f"Error closing OCR engine: {str(e)}")
+
+    def close(self) -> None:
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(engine)
+
+_pool: Optional[EnginePool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+def get_engine_pool() -> EnginePool:
+    """This process's engine pool; a forked child (OCR pool worker) starts its own"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = EnginePool()
+                _pool_pid = os.getpid()
+    return _pool
+
+def settings_tag() -> str:
+    """The settings that affect OCR output, for cache keys of recognized text"""
+    return f"{OCR_ENGINE}:{OCR_LANG}:psm{OCR_PSM}:bin{int(OCR_BINARIZE)}:{OCR_MAX_IMAGE_PIXELS}"
+
+def recognize_text(image: Image.Image) -> str:
+    """Preprocess an image and OCR it with a pooled engine"""
+    image = preprocess_image(image)
+    with get_engine_pool().engine() as engine:
+        return engine.recognize(image).strip()
+
+def warm_up_engine() -> None:
+    """Create an engine now, so the first OCR call does not wait for language data to load"""
+    with get_engine_pool().engine():
+        pass
@@ -3,19 +3,123 @@ PDF and Image parsing utilities with OCR support using PyMuPDF for better perfor
 """
 
 import fitz  # PyMuPDF
-import pytesseract
 from PIL import Image
 import io
-from pdf2image import convert_from_bytes
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import hashlib
 import imghdr
+import json
 import logging
+import math
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import threading
+import time
+
+from docx_parser import DOCX_MIME, ZIP_MIME, extract_text_from_docx, is_zip, looks_like_docx
+from extraction_cache import digest_key, get_extraction_cache
+from metrics import OCR_PAGES, OCR_REUSE, OCR_SECONDS_SAVED, observe, timed
+from ocr_engine import recognize_text, settings_tag
 
 logger = logging.getLogger(__name__)
 
+# Page-level OCR scheduling. Pages without a text layer are sent to a shared
+# process pool so a scanned multi-page resume uses more than one core.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+# Seconds a page may run in an OCR worker before it is given up (time queued does not count)
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+# Seconds a page may wait for a free OCR worker before it is dropped
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT", "300"))
+# How often a queued page is checked for having started
+OCR_QUEUE_POLL_SECONDS = 0.05
+# The service process runs threads (log listener, stage pools, job workers) that a
+# forked child would inherit in an arbitrary state, so pool workers are not forked from it
+OCR_START_METHOD = os.getenv(
+    "OCR_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+# Bounds how many rendered pages wait on the pool, which bounds peak memory
+OCR_MAX_PENDING_PAGES = int(os.getenv("OCR_MAX_PENDING_PAGES", str(max(2, OCR_WORKERS * 2))))
+
+# Page rendering for OCR. A letter/A4 page at 300 DPI is ~8.7M pixels; larger
+# pages are rendered at a lower DPI to stay within the pixel budget.
+OCR_RENDER_DPI = float(os.getenv("OCR_RENDER_DPI", "300"))
+OCR_MIN_DPI = float(os.getenv("OCR_MIN_DPI", "100"))
+OCR_MAX_PAGE_PIXELS = int(os.getenv("OCR_MAX_PAGE_PIXELS", str(9_000_000)))
+
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+# Where the current pool's workers report their pids, so a stuck one can be terminated
+_ocr_pool_pids = None
+_ocr_pool_lock = threading.Lock()
+
+def _report_worker_pid(pids) -> None:
+    """OCR pool worker initializer"""
+    pids.put(os.getpid())
+
+def get_ocr_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Return the shared OCR process pool, creating it on first use.
+    Returns None when OCR_WORKERS <= 1, in which case pages are OCRed inline.
+    """
+    global _ocr_pool, _ocr_pool_pids
+    if OCR_WORKERS <= 1:
+        return None
+    if _ocr_pool is None:
+        with _ocr_pool_lock:
+            if _ocr_pool is None:
+                logger.info(f"Starting OCR process pool with {OCR_WORKERS} workers")
+                context = multiprocessing.get_context(OCR_START_METHOD)
+                _ocr_pool_pids = context.Queue()
+                _ocr_pool = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS, mp_context=context,
+                    initializer=_report_worker_pid, initargs=(_ocr_pool_pids,),
+                )
+    return _ocr_pool
+
+def recycle_ocr_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    Replace a pool with a worker stuck on a page. Cancelling a running future does
+    not stop its process, so the workers are terminated; the next get_ocr_pool()
+    starts a fresh pool. Pages still in flight on the old one fail with BrokenProcessPool.
+    """
+    global _ocr_pool, _ocr_pool_pids
+    with _ocr_pool_lock:
+        if _ocr_pool is not pool:
+            return
+        pids, _ocr_pool, _ocr_pool_pids = _ocr_pool_pids, None, None
+    logger.warning("Recycling the OCR process pool after a page timed out")
+    while True:
+        try:
+            pid = pids.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    pids.close()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_ocr_pool() -> None:
+    """
+    Shut down the shared OCR process pool, if it was started
+    """
+    global _ocr_pool, _ocr_pool_pids
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _ocr_pool_pids.close()
+            _ocr_pool, _ocr_pool_pids = None, None
+
 def detect_file_type(file_content: bytes) -> str:
     """
-    Detect the file type using file signatures
+    Detect the file type using file signatures. Given only the first bytes of a
+    zip, this is ZIP_MIME; whether it is a DOCX takes the whole file.
     """
     # Check if it's an image
     img_type = imghdr.what(None, h=file_content)
@@ -26,140 +130,379 @@ def detect_file_type(file_content: bytes) -> str:
     if file_content.startswith(b'%PDF'):
         return "application/pdf"
     
+    # DOCX is a zip of WordprocessingML parts; only the whole file can tell
+    if is_zip(file_content):
+        return DOCX_MIME if looks_like_docx(file_content) else ZIP_MIME
+    
     return "application/octet-stream"
 
 def extract_text_from_image(image) -> str:
     """
-    Extract text from an image using OCR
+    Extract text from an image using OCR (preprocessed, on a pooled engine)
     """
     try:
-        text = pytesseract.image_to_string(image)
-        return text.strip()
+        return recognize_text(image)
     except Exception as e:
         logger.error(f"OCR Error: {str(e)}")
         return ""
 
-def extract_text_from_pdf(file_content: bytes) -> str:
+# A rendered page handed to an OCR worker: (PIL mode, width, height, raw samples).
+# Raw bytes pickle cheaply across the process boundary, unlike fitz objects.
+ImagePayload = Tuple[str, int, int, bytes]
+
+def page_render_dpi(page) -> float:
+    """
+    Pick the render resolution for a page: OCR_RENDER_DPI, lowered for oversized
+    pages so the bitmap stays within OCR_MAX_PAGE_PIXELS (but not below OCR_MIN_DPI)
+    """
+    width_in, height_in = page.rect.width / 72, page.rect.height / 72
+    area = max(width_in * height_in, 1e-6)
+    dpi = min(OCR_RENDER_DPI, math.sqrt(OCR_MAX_PAGE_PIXELS / area))
+    return max(dpi, OCR_MIN_DPI)
+
+def extraction_settings_tag() -> str:
+    """The settings that affect extracted text, for cache keys of whole-file results"""
+    return f"{settings_tag()}:dpi{OCR_RENDER_DPI:g}-{OCR_MIN_DPI:g}:{OCR_MAX_PAGE_PIXELS}"
+
+def render_page(page) -> ImagePayload:
+    """
+    Rasterize a page to an 8-bit grayscale bitmap with fitz's own renderer
+    """
+    zoom = page_render_dpi(page) / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    return ("L", pix.width, pix.height, pix.samples)
+
+def image_scale(info: dict) -> float:
+    """
+    Upscaling for an embedded image stored below OCR_RENDER_DPI, as rendering its
+    page would, within OCR_MAX_PAGE_PIXELS
+    """
+    native_dpi = info["width"] / (info["transform"][0] / 72)
+    budget = math.sqrt(OCR_MAX_PAGE_PIXELS / (info["width"] * info["height"]))
+    return max(1.0, min(OCR_RENDER_DPI / native_dpi, budget))
+
+def render_image(doc, xref: int, scale: float = 1.0) -> ImagePayload:
+    """
+    Decode an embedded image, as grayscale or RGB without alpha, scaled up by scale
+    """
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    if scale > 1:
+        pix = fitz.Pixmap(pix, round(pix.width * scale), round(pix.height * scale), None)
+    return ("L" if pix.n == 1 else "RGB", pix.width, pix.height, pix.samples)
+
+def image_only_layout(page) -> Optional[List[dict]]:
+    """
+    The embedded images of a page in reading order, if the page is nothing but
+    upright images stored at OCR_MIN_DPI or better (typical of scans and of image
+    logos or backgrounds). None if the page has to be rendered and OCRed whole.
+    """
+    infos = page.get_image_info(xrefs=True)
+    if not infos or page.get_drawings():
+        return None
+    images = []
+    for info in infos:
+        a, b, c, d, _, _ = info["transform"]
+        upright = a > 0 and d > 0 and not b and not c
+        if info["xref"] <= 0 or not upright or info["colorspace"] not in (1, 3, 4):
+            return None  # inline, rotated or mask images
+        if info["width"] * info["height"] > OCR_MAX_PAGE_PIXELS or info["width"] / (a / 72) < OCR_MIN_DPI:
+            return None
+        images.append(info)
+    return sorted(images, key=lambda info: (info["bbox"][1], info["bbox"][0]))
+
+def image_digest(doc, info: dict) -> str:
+    """
+    Content hash of an embedded image's encoded stream and format plus the OCR
+    settings. The same graphic embedded in another PDF gets the same digest.
     """
-    Extract text from PDF file with enhanced extraction and OCR fallback using PyMuPDF
+    digest = hashlib.sha256(
+        f"{info['width']}x{info['height']}:{info['bpc']}:{info['cs-name']}:{settings_tag()}:".encode()
+    )
+    digest.update(doc.xref_stream_raw(info["xref"]))
+    return digest.hexdigest()
+
+# One piece of OCR work: its page, a content digest when its text can be reused
+# (embedded images), and a callable producing its bitmap on demand
+OcrUnit = Tuple[int, Optional[str], Callable[[], ImagePayload]]
+
+def iter_ocr_units(doc, page_numbers: Iterable[int]) -> Iterator[OcrUnit]:
+    """
+    Pages made only of embedded images yield one unit per image, so an image
+    repeated on several pages (one xref) or across documents (one digest) is
+    recognized once. Other pages yield one unit that renders the whole page.
+    """
+    digests: Dict[int, str] = {}
+    for page_num in page_numbers:
+        page = doc[page_num]
+        try:
+            images = image_only_layout(page)
+            for info in images or []:
+                if info["xref"] not in digests:
+                    digests[info["xref"]] = image_digest(doc, info)
+        except Exception as layout_err:
+            logger.error(f"Error inspecting images of page {page_num + 1}: {str(layout_err)}")
+            images = None
+        if images is None:
+            yield page_num, None, functools.partial(render_page, page)
+            continue
+        for info in images:
+            yield page_num, digests[info["xref"]], functools.partial(render_image, doc, info["xref"], image_scale(info))
+
+def ocr_page(payload: ImagePayload) -> str:
+    """
+    OCR a single rendered page or image; errors propagate so failed units are not cached.
+    Runs inside an OCR pool worker, so it must stay a module-level function.
+    """
+    mode, width, height, samples = payload
+    return recognize_text(Image.frombytes(mode, (width, height), samples))
+
+def _await_ocr(future: Future) -> str:
+    """
+    Result of a pooled OCR call, allowing it OCR_PAGE_TIMEOUT from when the pool hands
+    it to a worker; waiting behind other pages counts against OCR_QUEUE_TIMEOUT instead.
+    Raises FutureTimeoutError when either runs out.
+    """
+    queued_until = time.perf_counter() + OCR_QUEUE_TIMEOUT
+    while not (future.running() or future.done()):
+        if time.perf_counter() >= queued_until:
+            raise FutureTimeoutError()
+        try:
+            return future.result(timeout=OCR_QUEUE_POLL_SECONDS)
+        except FutureTimeoutError:
+            pass
+    return future.result(timeout=OCR_PAGE_TIMEOUT)
+
+def _run_page_ocr(units: Iterator[OcrUnit], use_pool: bool = True) -> Dict[int, str]:
+    """
+    OCR units as they are produced and join each page's texts in order. An image
+    already recognized earlier in the document, or in an earlier request (the "ocr"
+    namespace of the extraction cache), reuses that text without being decoded.
+    With the OCR pool, at most OCR_MAX_PENDING_PAGES bitmaps are in flight;
+    without it, units are OCRed inline.
+    """
+    pool = get_ocr_pool() if use_pool else None
+    cache = get_extraction_cache()
+    # Units are numbered in page order; each maps to its page and, once done, its text
+    unit_pages: List[int] = []
+    results: Dict[int, str] = {}
+    # OCR seconds behind each unit's text, credited as saved when the text is reused
+    seconds: Dict[int, float] = {}
+    first_unit: Dict[str, int] = {}
+    duplicates: Dict[int, int] = {}
+
+    def record(unit: int, digest: Optional[str], text: str, elapsed: float, outcome: str) -> None:
+        results[unit] = text
+        observe("ocr_page", elapsed)
+        OCR_PAGES.labels(outcome).inc()
+        if outcome in ("ok", "empty"):
+            seconds[unit] = elapsed
+        # Empty text is not cached: it may come from a transient engine problem
+        if outcome == "ok" and digest is not None:
+            cache.put(digest_key(digest, "ocr"), json.dumps({"text": text, "seconds": round(elapsed, 3)}))
+
+    # unit -> (future, submit time, digest, bitmap, pool)
+    pending: Dict[int, Tuple[Future, float, Optional[str], ImagePayload, ProcessPoolExecutor]] = {}
+
+    def collect(unit: int) -> None:
+        future, submitted, digest, payload, page_pool = pending.pop(unit)
+        page_num = unit_pages[unit]
+        try:
+            try:
+                text = _await_ocr(future)
+            except BrokenProcessPool:
+                # The pool was recycled under this page; run it once more on a fresh one
+                logger.info(f"Resubmitting page {page_num + 1} to a fresh OCR pool")
+                page_pool = get_ocr_pool()
+                future, submitted = page_pool.submit(ocr_page, payload), time.perf_counter()
+                text = _await_ocr(future)
+            outcome = "ok" if text else "empty"
+        except FutureTimeoutError:
+            if future.cancel():
+                logger.error(
+                    f"OCR dropped page {page_num + 1}: no OCR worker was free for {OCR_QUEUE_TIMEOUT:g}s"
+                )
+                text, outcome = "", "dropped"
+            else:
+                # Running in a worker, which cancel() cannot stop
+                logger.error(f"OCR timed out on page {page_num + 1} after {OCR_PAGE_TIMEOUT:g}s")
+                recycle_ocr_pool(page_pool)
+                text, outcome = "", "timeout"
+        except Exception as ocr_err:
+            logger.error(f"OCR error on page {page_num + 1}: {str(ocr_err)}")
+            text, outcome = "", "error"
+        record(unit, digest, text, time.perf_counter() - submitted, outcome)
+
+    for page_num, digest, make_payload in units:
+        unit = len(unit_pages)
+        unit_pages.append(page_num)
+        if digest is not None:
+            if digest in first_unit:
+                duplicates[unit] = first_unit[digest]
+                continue
+            first_unit[digest] = unit
+            cached = cache.get(digest_key(digest, "ocr"))
+            if cached is not None:
+                entry = json.loads(cached)
+                results[unit] = entry["text"]
+                seconds[unit] = entry["seconds"]
+                OCR_REUSE.labels("cache").inc()
+                OCR_SECONDS_SAVED.inc(entry["seconds"])
+                continue
+            OCR_REUSE.labels("miss").inc()
+
+        try:
+            with timed("render_page"):
+                payload = make_payload()
+        except Exception as render_err:
+            logger.error(f"Error rendering page {page_num + 1}: {str(render_err)}")
+            continue
+
+        if pool is None:
+            started = time.perf_counter()
+            try:
+                text = ocr_page(payload)
+                outcome = "ok" if text else "empty"
+            except Exception as ocr_err:
+                logger.error(f"OCR error on page {page_num + 1}: {str(ocr_err)}")
+                text, outcome = "", "error"
+            record(unit, digest, text, time.perf_counter() - started, outcome)
+            continue
+
+        if len(pending) >= OCR_MAX_PENDING_PAGES:
+            collect(next(iter(pending)))
+        # Looked up per unit: a timed-out page replaces the pool
+        pool = get_ocr_pool()
+        pending[unit] = (pool.submit(ocr_page, payload), time.perf_counter(), digest, payload, pool)
+    for unit in list(pending):
+        collect(unit)
+
+    for unit, original in duplicates.items():
+        results[unit] = results.get(original, "")
+        OCR_REUSE.labels("document").inc()
+        OCR_SECONDS_SAVED.inc(seconds.get(original, 0.0))
+
+    page_texts: Dict[int, List[str]] = {}
+    for unit, page_num in enumerate(unit_pages):
+        text = results.get(unit, "")
+        page_texts.setdefault(page_num, [])
+        if text.strip():
+            page_texts[page_num].append(text)
+    return {page_num: "\n".join(texts) for page_num, texts in page_texts.items()}
+
+def extract_text_from_pdf(file_content: Union[bytes, str]) -> str:
+    """
+    Extract text from PDF file with enhanced extraction and OCR fallback using PyMuPDF.
+    Accepts the PDF bytes or a path to a spooled upload.
+    Pages with a text layer are read inline; pages without one are rendered one at
+    a time and OCRed on the OCR process pool, then reassembled in page order and
+    separated by PAGE_BREAK.
     """
     if not file_content:
         logger.error("Empty file content provided")
         return ""
         
-    extracted_text = []
+    page_texts: Dict[int, str] = {}
+    ocr_pages: List[int] = []
     
     try:
-        # Open PDF from memory buffer
-        with fitz.open(stream=file_content, filetype="pdf") as doc:
+        # Open PDF from a spooled file or from memory
+        if isinstance(file_content, str):
+            doc = fitz.open(file_content, filetype="pdf")
+        else:
+            doc = fitz.open(stream=file_content, filetype="pdf")
+        with doc:
             total_pages = len(doc)
             logger.info(f"Processing PDF with {total_pages} pages")
             
-            for page_num in range(total_pages):
-                logger.debug(f"Processing page {page_num + 1}/{total_pages}")
-                page = doc[page_num]
+            with timed("pdf_text"):
+                for page_num in range(total_pages):
+                    logger.debug(f"Processing page {page_num + 1}/{total_pages}")
                 
-                # First try normal text extraction
-                text = page.get_text("text")
-                if text.strip():
-                    extracted_text.append(text)
-                    continue
-                
-                # If no text found, try getting text from images
-                images = page.get_images()
-                if not images:
-                    logger.debug(f"No images found on page {page_num + 1}")
-                    continue
-                    
-                logger.debug(f"Found {len(images)} images on page {page_num + 1}")
-                for img_idx, img in enumerate(images):
+                    # First try normal text extraction
                     try:
-                        xref = img[0]
-                        pix = fitz.Pixmap(doc, xref)
-                        
-                        # Skip images that are too small
-                        if pix.width < 50 or pix.height < 50:
-                            logger.debug(f"Skipping small image: {pix.width}x{pix.height}")
-                            continue
-                            
-                        try:
-                            # Convert to PIL Image for OCR
-                            if pix.n >= 3:  # RGB or RGBA
-                                pil_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                            else:  # Grayscale
-                                pil_image = Image.frombytes("L", [pix.width, pix.height], pix.samples)
-                            
-                            ocr_text = extract_text_from_image(pil_image)
-                            if ocr_text:
-                                extracted_text.append(ocr_text)
-                        finally:
-                            pix = None
-                    except Exception as img_err:
-                        logger.error(f"Error processing image {img_idx} on page {page_num + 1}: {str(img_err)}")
-                        continue
-        
-        final_text = "\n".join(extracted_text)
+                        text = doc[page_num].get_text("text")
+                    except Exception as text_err:
+                        logger.error(f"Error reading text layer of page {page_num + 1}: {str(text_err)}")
+                        text = ""
+                    if text.strip():
+                        page_texts[page_num] = text
+                    else:
+                        # No text layer (scans, vector-drawn or tiled content): render and OCR the page
+                        ocr_pages.append(page_num)
+
+            if ocr_pages:
+                logger.info(f"Running OCR on {len(ocr_pages)} pages without a text layer")
+                page_texts.update(_run_page_ocr(iter_ocr_units(doc, ocr_pages), use_pool=len(ocr_pages) > 1))
+
+        extracted_text = [page_texts[page_num] for page_num in sorted(page_texts) if page_texts[page_num]]
+        final_text = f"\n{PAGE_BREAK}".join(extracted_text)
         logger.info(f"Successfully extracted {len(final_text)} characters")
         return final_text
     
     except Exception as e:
         logger.error(f"Error extracting text with PyMuPDF: {str(e)}")
-        
-        # Fallback to pdf2image + OCR if PyMuPDF fails
-        try:
-            logger.info("Attempting fallback to pdf2image + OCR")
-            images = convert_from_bytes(file_content)
-            logger.info(f"Converted PDF to {len(images)} images")
-            
-            texts = []
-            for idx, image in enumerate(images, 1):
-                try:
-                    logger.debug(f"Processing image {idx}/{len(images)}")
-                    text = extract_text_from_image(image)
-                    if text:
-                        texts.append(text)
-                except Exception as ocr_err:
-                    logger.error(f"OCR error on image {idx}: {str(ocr_err)}")
-                    continue
-            
-            final_text = "\n".join(texts)
-            logger.info(f"Fallback extracted {len(final_text)} characters")
-            return final_text
-        
-        except Exception as fallback_err:
-            logger.error(f"Fallback extraction failed: {str(fallback_err)}")
-            return ""
-
-    except Exception as e:
-        print(f"Error extracting text from PDF: {str(e)}")
-        return ""
-        
-        return clean_extracted_text(extracted_text)
-    except Exception as e:
-        print(f"Error extracting text from PDF: {str(e)}")
         return ""
 
+# Pages of extracted PDF text are separated by a form feed, as pdftotext does
+PAGE_BREAK = "\f"
+# Lines at the top and bottom of a page that may hold a running header or footer
+PAGE_EDGE_LINES = 2
+# "3", "Page 3", "3 / 5", "Page 3 of 5"
+_PAGE_NUMBER = re.compile(r"(page\s*)?\d{1,3}(\s*(/|of)\s*\d{1,3})?", re.IGNORECASE)
+
+def _edge_key(line: str) -> str:
+    """Running headers and footers often carry the page number, so digits are ignored"""
+    return re.sub(r"\d+", "#", line.lower())
+
 def clean_extracted_text(text: str) -> str:
     """
-    Clean and format the extracted text
+    Clean and format the extracted text: collapse whitespace runs, drop lines with
+    no letters or digits (OCR specks, rules, bullets on their own) and consecutive
+    duplicates. Across page breaks, page numbers and lines repeated at the top or
+    bottom of several pages (running headers and footers) are dropped as well, the
+    first page keeping its copy. Repeated lines elsewhere, such as a job title held
+    twice or the same bullet under two jobs, are kept.
     """
     if not text:
         return ""
-    
-    # Split into lines and remove empty lines
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-    # Remove duplicate consecutive lines
+
+    pages = []
+    for page_text in text.split(PAGE_BREAK):
+        lines = (' '.join(raw_line.split()) for raw_line in page_text.split('\n'))
+        pages.append([line for line in lines if line and re.search(r'[^\W_]', line)])
+
+    def edges(page: List[str]) -> List[str]:
+        return page[:PAGE_EDGE_LINES] + page[-PAGE_EDGE_LINES:]
+
+    edge_pages: Dict[str, int] = {}
+    if len(pages) > 1:
+        for page in pages:
+            for key in {_edge_key(line) for line in edges(page)}:
+                edge_pages[key] = edge_pages.get(key, 0) + 1
+
     cleaned_lines = []
     prev_line = None
-    for line in lines:
-        if line != prev_line:
+    for page_index, page in enumerate(pages):
+        last_edge = len(page) - PAGE_EDGE_LINES
+        for index, line in enumerate(page):
+            if len(pages) > 1 and (index < PAGE_EDGE_LINES or index >= last_edge):
+                if _PAGE_NUMBER.fullmatch(line):
+                    continue
+                if page_index > 0 and edge_pages[_edge_key(line)] > 1:
+                    continue
+            key = line.lower()
+            if key == prev_line:
+                continue
             cleaned_lines.append(line)
-            prev_line = line
-    
+            prev_line = key
+
     # Join lines with proper spacing
     cleaned_text = '\n'.join(cleaned_lines)
-    
+
     return cleaned_text
 
 def extract_resume_sections(pdf_text: str) -> Dict[str, Any]:
@@ -236,6 +579,49 @@ def extract_resume_sections(pdf_text: str) -> Dict[str, Any]:
     
     return cleaned_sections
 
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+def _section_body(section: str) -> List[str]:
+    """The lines of a locally parsed section, without the heading line it starts with"""
+    return [line for line in section.split("\n")[1:] if line.strip()]
+
+def local_resume_data(text: str) -> Dict[str, Any]:
+    """
+    The local section parse in the shape Gemini returns (RESUME_SCHEMA, ResumeData in
+    the app), for degraded mode. Sections the local parse only has as free text
+    become a single entry. Skills fall back to the taxonomy matcher over the whole text.
+    """
+    from skills import get_skill_matcher
+
+    sections = extract_resume_sections(text)
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    contact = sections.get("contactInfo") or text
+    email = _EMAIL.search(contact)
+    phone = _PHONE.search(contact)
+    experience = _section_body(sections.get("experience", ""))
+    education = _section_body(sections.get("education", ""))
+    projects = _section_body(sections.get("projects", ""))
+    return {
+        "Personal Information": {
+            "name": lines[0] if lines else "",
+            "address": "",
+            "phone": phone.group(0) if phone else "",
+            "email": email.group(0) if email else "",
+        },
+        "Summary": "\n".join(_section_body(sections.get("summary", ""))),
+        "Skills": {"Technical Skills": sorted(sections.get("skills") or get_skill_matcher().extract(text)), "Soft Skills": []},
+        "Work Experience": [{
+            "company": "", "position": experience[0], "dates": "", "responsibilities": "\n".join(experience[1:]),
+        }] if experience else [],
+        "Education": [{"institution": education[0], "degree": "\n".join(education[1:]), "dates": ""}] if education else [],
+        "Projects": [{"title": projects[0], "description": "\n".join(projects[1:])}] if projects else [],
+        "Certifications": [
+            {"name": line, "issuer": "", "details": ""} for line in _section_body(sections.get("certifications", ""))
+        ],
+        "Additional Information": ", ".join(sections.get("languages", [])),
+    }
+
 def extract_skills_from_text(text: str) -> List[str]:
     """
     Extract skills from text by splitting on common delimiters and using common patterns
@@ -295,10 +681,8 @@ def extract_skills_from_text(text: str) -> List[str]:
     
     return unique_skills
 
-def parse_docx_file(file_content: bytes) -> str:
+def parse_docx_file(file_content: Union[bytes, str]) -> str:
     """
-    Parse DOCX files
-    TODO: Implement DOCX parsing
+    Parse DOCX files (bytes or a path) with the native streaming extractor
     """
-    # Placeholder implementation
-    return "Extracted DOCX text will go here..."
+    return extract_text_from_docx(file_content)
@@ -0,0 +1,102 @@
+"""
+Prompt preparation: cleaned, compact and token-budgeted inputs for Gemini prompts.
+
+Text is cleaned with clean_extracted_text (whitespace, noise, page numbers and
+running headers and footers), then fitted to a token budget. Fitting is section-aware: every section
+keeps its heading and opening lines, and the longest sections lose their tail
+lines first. JSON goes into prompts without indentation. Estimated tokens before
+and after preparation are logged and counted per input.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, List
+
+from metrics import PROMPT_INPUT_TOKENS, estimate_tokens, timed
+from pdf_parser import clean_extracted_text
+
+logger = logging.getLogger(__name__)
+
+PROMPT_RESUME_TOKEN_BUDGET = int(os.getenv("PROMPT_RESUME_TOKEN_BUDGET", "6000"))
+PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", "2000"))
+# Characters per token, matching metrics.estimate_tokens
+CHARS_PER_TOKEN = 4
+
+_SECTION_HEADING = re.compile(
+    r"((professional|work|technical|key|core)\s+)?(summary|objective|profile|experience|employment|work history|"
+    r"education|academic|skills|technologies|competencies|projects|portfolio|certifications|certificates|"
+    r"languages|awards|achievements|publications|volunteering|interests|references)\b",
+    re.IGNORECASE,
+)
+
+def is_section_heading(line: str) -> bool:
+    """Short lines that start with a common resume section name"""
+    return len(line.split()) <= 4 and _SECTION_HEADING.match(line.strip()) is not None
+
+def split_sections(lines: List[str]) -> List[List[str]]:
+    """Group lines into sections, each starting at a heading (the first holds the contact block)"""
+    sections: List[List[str]] = [[]]
+    for line in lines:
+        if is_section_heading(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Trim text to about max_tokens. Lines are granted to sections round-robin, so
+    each section keeps a prefix (heading first) and long sections are cut the most.
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+
+    sections = split_sections(text.split("\n"))
+    kept = [0] * len(sections)
+    full = [False] * len(sections)
+    used = 0
+    progress = True
+    while progress:
+        progress = False
+        for index, section in enumerate(sections):
+            if full[index] or kept[index] == len(section):
+                continue
+            cost = len(section[kept[index]]) + 1
+            if used + cost > budget:
+                full[index] = True
+                continue
+            used += cost
+            kept[index] += 1
+            progress = True
+
+    lines = [line for index, section in enumerate(sections) for line in section[:kept[index]]]
+    if not lines:
+        # A single line longer than the whole budget
+        return text[:budget]
+    return "\n".join(lines)
+
+def prepare_text(text: str, max_tokens: int, input_name: str) -> str:
+    """Clean text and fit it to max_tokens, recording token counts before and after"""
+    with timed("prompt_prep"):
+        raw_tokens = estimate_tokens(text)
+        prepared = fit_to_budget(clean_extracted_text(text), max_tokens)
+        prepared_tokens = estimate_tokens(prepared)
+    PROMPT_INPUT_TOKENS.labels(input_name, "raw").inc(raw_tokens)
+    PROMPT_INPUT_TOKENS.labels(input_name, "prepared").inc(prepared_tokens)
+    logger.info(
+        f"Prepared {input_name} for prompt: {raw_tokens} -> {prepared_tokens} tokens (budget {max_tokens})",
+        extra={"prompt_input": input_name, "tokens_raw": raw_tokens, "tokens_prepared": prepared_tokens},
+    )
+    return prepared
+
+def prepare_resume_text(text: str) -> str:
+    return prepare_text(text, PROMPT_RESUME_TOKEN_BUDGET, "resume")
+
+def prepare_job_description(text: str) -> str:
+    return prepare_text(text, PROMPT_JD_TOKEN_BUDGET, "job_description")
+
+def compact_json(value: Any) -> str:
+    """JSON for prompts: no indentation or spaces after separators, non-ASCII kept as is"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,545 @@
+"""
+Resume search index: rank a stored candidate pool against a job description.
+
+Each index keeps the term counts of every resume in a sparse term matrix (read
+column-wise as an inverted index) and a postings list per skill. A query only
+touches the columns for the job description's terms and the postings for its
+skills, then blends content relevance and skill coverage exactly like
+calculate_ats_score. Content relevance uses IDF computed over the indexed pool.
+
+The matrix is a main part plus a small tail of recently added rows; only the tail
+is rebuilt after an add, and it is merged into the main part once it reaches a
+share of the pool. Removed rows are masked out and compacted away once they make
+up COMPACT_RATIO of the rows.
+
+An index with a path is durable: every add and remove is appended (and fsynced)
+to a journal before it returns, and snapshots are written to a new directory that
+becomes current with one atomic rename of the CURRENT file. Loading reads the
+current snapshot and replays its journal. Layout of RESUME_INDEX_DIR/<name>:
+
+    CURRENT                 generation of the live snapshot, e.g. "3"
+    snapshot-3/             index.json, offsets.npy, term_ids.npy, counts.npy
+    journal-3.jsonl         adds and removes since snapshot 3
+    LOCK                    flock'd by every process using the index
+
+Several processes (e.g. gunicorn workers) can share one index directory. Each
+takes an exclusive flock on LOCK to change or snapshot the index and a shared one
+to read it, and first catches up: it replays journal entries past the offset it
+has applied, or reloads everything when CURRENT names a newer snapshot.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per index directory
+    fcntl = None
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+
+from ats_score import combine_scores, count_terms, extract_skills, preprocess_text
+from jd_cache import JobDescriptionAnalysis
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+INDEX_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Rows added since the last merge live in a tail matrix, merged into the main one
+# once it holds TAIL_MERGE_RATIO of the rows (at least TAIL_MIN_ROWS)
+TAIL_MERGE_RATIO = 0.1
+TAIL_MIN_ROWS = 256
+# Removed rows are dropped once they are this share of all rows (at least COMPACT_MIN_ROWS)
+COMPACT_RATIO = 0.25
+COMPACT_MIN_ROWS = 64
+# A snapshot is written once the journal has this many entries (and at least as many as resumes)
+SNAPSHOT_EVERY = int(os.getenv("RESUME_INDEX_SNAPSHOT_EVERY", "1000"))
+
+def _fsync_dir(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _build_matrix(term_ids: List[np.ndarray], counts: List[np.ndarray], width: int) -> Tuple[csc_matrix, csr_matrix]:
+    """Raw term counts of some rows as CSC (for column slicing) plus their squares as CSR (for norms)"""
+    lengths = np.array([len(ids) for ids in term_ids], dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    indices = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int32)
+    data = np.concatenate(counts) if counts else np.zeros(0, dtype=np.float32)
+    shape = (len(term_ids), width)
+    return csr_matrix((data, indices, indptr), shape=shape).tocsc(), csr_matrix((data * data, indices, indptr), shape=shape)
+
+class ResumeIndex:
+    """
+    Incrementally updatable inverted index over extracted resume text, journaled to path when given
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._journal = None
+        self._lock_file = None
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop all in-memory state, e.g. before loading a snapshot another process wrote"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.terms: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_ids: List[Optional[str]] = []  # None marks a removed row
+        self.rows: Dict[str, int] = {}
+        self.doc_term_ids: List[np.ndarray] = []
+        self.doc_counts: List[np.ndarray] = []
+        self.doc_skills: List[FrozenSet[str]] = []
+        self.skill_postings: Dict[str, Set[int]] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._df = np.zeros(0, dtype=np.int64)
+        # Main matrix covering rows [0, _main_rows), tail covering the rest; both built lazily
+        self._main: Optional[Tuple[csc_matrix, csr_matrix]] = None
+        self._main_rows = 0
+        self._tail: Optional[Tuple[csc_matrix, csr_matrix]] = None
+        self._norms: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (idf, row norms) until the next change
+        self.generation = 0
+        self.journal_entries = 0
+        self._journal_offset = 0  # bytes of the current journal applied to this instance
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the journal holds changes that are not in a snapshot yet"""
+        return self.journal_entries > 0
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.vocabulary[term] = term_id
+            self.terms.append(term)
+        return term_id
+
+    def _changed(self) -> None:
+        self._tail = None
+        self._norms = None
+
+    def _append(self, resume_id: str, term_ids: np.ndarray, counts: np.ndarray, skills: FrozenSet[str]) -> None:
+        row = len(self.doc_ids)
+        self.doc_ids.append(resume_id)
+        self.rows[resume_id] = row
+        self.doc_term_ids.append(term_ids)
+        self.doc_counts.append(counts)
+        self.doc_skills.append(skills)
+        for skill in skills:
+            self.skill_postings.setdefault(skill, set()).add(row)
+        if row >= len(self._alive):
+            self._alive = np.concatenate([self._alive, np.zeros(max(row + 1, len(self._alive)), dtype=bool)])
+        self._alive[row] = True
+        if len(self.terms) > len(self._df):
+            self._df = np.concatenate([self._df, np.zeros(max(len(self.terms), len(self._df)), dtype=np.int64)])
+        self._df[term_ids] += 1
+        self._changed()
+
+    def _apply_add(self, resume_id: str, counts: Dict[str, int], skills: FrozenSet[str]) -> bool:
+        replaced = self._apply_remove(resume_id)
+        term_ids = np.array([self._term_id(term) for term in counts], dtype=np.int32)
+        values = np.array(list(counts.values()), dtype=np.float32)
+        self._append(resume_id, term_ids, values, skills)
+        return replaced
+
+    def _apply_remove(self, resume_id: str) -> bool:
+        row = self.rows.pop(resume_id, None)
+        if row is None:
+            return False
+        self.doc_ids[row] = None
+        self._alive[row] = False
+        self._df[self.doc_term_ids[row]] -= 1
+        self.doc_term_ids[row] = np.zeros(0, dtype=np.int32)
+        self.doc_counts[row] = np.zeros(0, dtype=np.float32)
+        for skill in self.doc_skills[row]:
+            self.skill_postings.get(skill, set()).discard(row)
+        self.doc_skills[row] = frozenset()
+        self._changed()
+        return True
+
+    def add_many(self, resumes: Iterable[Tuple[str, str]]) -> int:
+        """
+        Index (or re-index) (resume id, text) pairs with one journal write.
+        Returns how many replaced an existing entry.
+        """
+        prepared = [
+            (resume_id, count_terms(preprocess_text(text)), frozenset(extract_skills(text)))
+            for resume_id, text in resumes
+        ]
+        with self._lock, self._synced(exclusive=True):
+            self._write_journal([
+                {"op": "add", "id": resume_id, "terms": counts, "skills": sorted(skills)}
+                for resume_id, counts, skills in prepared
+            ])
+            replaced = sum(self._apply_add(resume_id, counts, skills) for resume_id, counts, skills in prepared)
+            self._after_change()
+            return replaced
+
+    def add(self, resume_id: str, text: str) -> bool:
+        """
+        Index (or re-index) a resume. Returns True if it replaced an existing entry.
+        """
+        return self.add_many([(resume_id, text)]) > 0
+
+    def remove(self, resume_id: str) -> bool:
+        """Drop a resume from the index. Returns False if it was not indexed."""
+        with self._lock, self._synced(exclusive=True):
+            if resume_id not in self.rows:
+                return False
+            self._write_journal([{"op": "remove", "id": resume_id}])
+            self._apply_remove(resume_id)
+            self._after_change()
+            return True
+
+    def _after_change(self) -> None:
+        dead = len(self.doc_ids) - len(self.rows)
+        if dead >= COMPACT_MIN_ROWS and dead >= COMPACT_RATIO * len(self.doc_ids):
+            self._compact()
+        if self.path and self.journal_entries >= max(SNAPSHOT_EVERY, len(self.rows)):
+            self._save()
+
+    def _compact(self) -> None:
+        """Drop removed rows, renumbering the live ones"""
+        live = [row for row, resume_id in enumerate(self.doc_ids) if resume_id is not None]
+        doc_ids = [self.doc_ids[row] for row in live]
+        term_ids = [self.doc_term_ids[row] for row in live]
+        counts = [self.doc_counts[row] for row in live]
+        skills = [self.doc_skills[row] for row in live]
+        self.doc_ids, self.doc_term_ids, self.doc_counts, self.doc_skills = [], [], [], []
+        self.rows, self.skill_postings = {}, {}
+        self._alive = np.zeros(len(live), dtype=bool)
+        self._df = np.zeros(len(self.terms), dtype=np.int64)
+        self._main, self._main_rows = None, 0
+        for row in range(len(live)):
+            self._append(doc_ids[row], term_ids[row], counts[row], skills[row])
+        logger.info(f"Compacted resume index to {len(live)} rows")
+
+    def _matrices(self) -> Tuple[List[Tuple[int, csc_matrix, csr_matrix]], np.ndarray, np.ndarray]:
+        """
+        The (first row, counts, squared counts) parts covering every row, plus the
+        current IDF and row norms. Merges the tail into the main part when it has grown.
+        """
+        total_rows = len(self.doc_ids)
+        if total_rows - self._main_rows >= max(TAIL_MIN_ROWS, TAIL_MERGE_RATIO * self._main_rows):
+            self._main = _build_matrix(self.doc_term_ids, self.doc_counts, len(self.terms))
+            self._main_rows = total_rows
+            self._tail = None
+        if self._tail is None and total_rows > self._main_rows:
+            self._tail = _build_matrix(
+                self.doc_term_ids[self._main_rows:], self.doc_counts[self._main_rows:], len(self.terms)
+            )
+        parts = [(0, *self._main)] if self._main is not None else []
+        if total_rows > self._main_rows:
+            parts.append((self._main_rows, *self._tail))
+
+        if self._norms is None:
+            # Smoothed IDF over the live pool, same formula as TfidfVectorizer
+            idf = np.log((1 + len(self.rows)) / (1 + self._df[:len(self.terms)])) + 1
+            squared_idf = idf * idf
+            norms = np.concatenate(
+                [squares @ squared_idf[:squares.shape[1]] for _, _, squares in parts]
+            ) if parts else np.zeros(0)
+            self._norms = (idf, np.sqrt(norms))
+        return parts, *self._norms
+
+    def query(self, job: JobDescriptionAnalysis, top_k: int = 10) -> List[Dict]:
+        """
+        Top-k resumes for an analysed job description, ranked by the calculate_ats_score blend
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        with self._lock:
+            self.catch_up()
+            if not self.rows:
+                return []
+            parts, idf, norms = self._matrices()
+            n_docs = len(self.rows)
+            total_rows = len(self.doc_ids)
+
+            # Content relevance: cosine between the JD's TF-IDF vector and every row,
+            # computed only from the inverted-index columns of the JD's terms
+            known = [(self.vocabulary[term], count) for term, count in job.term_counts.items() if term in self.vocabulary]
+            unknown_idf = np.log(1 + n_docs) + 1  # df = 0 for terms no resume contains
+            query_norm = np.sqrt(
+                sum((count * idf[term_id]) ** 2 for term_id, count in known)
+                + sum((count * unknown_idf) ** 2 for term, count in job.term_counts.items() if term not in self.vocabulary)
+            )
+            content = np.zeros(total_rows)
+            if known and query_norm:
+                term_ids = np.array([term_id for term_id, _ in known])
+                # Row counts times idf, dotted with the query's counts times idf
+                weights = np.array([count * idf[term_id] ** 2 for term_id, count in known])
+                dots = np.zeros(total_rows)
+                for first_row, counts, _ in parts:
+                    in_part = term_ids < counts.shape[1]
+                    dots[first_row:first_row + counts.shape[0]] = counts[:, term_ids[in_part]] @ weights[in_part]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    content = np.where(norms > 0, dots / (norms * query_norm), 0.0)
+            content = np.round(content * 100, 2)
+
+            # Skill coverage from the skill postings
+            matched_counts = np.zeros(total_rows)
+            for skill in job.skills:
+                rows = self.skill_postings.get(skill)
+                if rows:
+                    matched_counts[list(rows)] += 1
+            skill_scores = matched_counts / len(job.skills) * 100 if job.skills else matched_counts
+
+            scores = content * 0.6 + skill_scores * 0.4
+            scores[~self._alive[:total_rows]] = -np.inf
+
+            k = min(top_k, n_docs)
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            results = []
+            for row in ranked:
+                resume_skills = self.doc_skills[row]
+                result = combine_scores(
+                    float(content[row]),
+                    list(resume_skills & job.skills),
+                    list(job.skills - resume_skills),
+                )
+                result["resumeId"] = self.doc_ids[row]
+                results.append(result)
+            return results
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"journal-{generation}.jsonl")
+
+    def _snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"snapshot-{generation}")
+
+    @contextlib.contextmanager
+    def _synced(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold the index directory's flock (exclusive to write) and catch up with
+        changes other processes made. Callers hold self._lock; never nested.
+        """
+        if not self.path:
+            yield
+            return
+        if fcntl is None:
+            self._refresh()
+            yield
+            return
+        if self._lock_file is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._lock_file = open(os.path.join(self.path, "LOCK"), "a")
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            self._refresh()
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def catch_up(self) -> None:
+        """Apply changes other processes sharing the index directory have made since the last call"""
+        with self._lock, self._synced(exclusive=False):
+            pass
+
+    def _read_current(self) -> int:
+        try:
+            with open(os.path.join(self.path, "CURRENT"), encoding="ascii") as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self) -> None:
+        generation = self._read_current()
+        if generation != self.generation:
+            self._reset()
+            self.generation = generation
+            self._load_snapshot()
+        self._replay_journal()
+
+    def _write_journal(self, entries: List[Dict]) -> None:
+        """Append entries to the journal and fsync, so they survive a crash once this returns"""
+        if not self.path:
+            return
+        if self._journal is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._journal = open(self._journal_path(self.generation), "ab")
+        if os.fstat(self._journal.fileno()).st_size > self._journal_offset:
+            # Drop the partial line of a write cut short by a crash
+            self._journal.truncate(self._journal_offset)
+        data = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries).encode("utf-8")
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_offset += len(data)
+        self.journal_entries += len(entries)
+
+    def _replay_journal(self) -> None:
+        """Apply journal entries past the offset already applied"""
+        try:
+            f = open(self._journal_path(self.generation), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A write cut short by a crash; it was never acknowledged
+                    logger.warning(f"Ignoring truncated resume index journal entry at byte {self._journal_offset}")
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt resume index journal entry at byte {self._journal_offset}")
+                    self._journal_offset += len(line)
+                    continue
+                self._journal_offset += len(line)
+                if entry["op"] == "add":
+                    self._apply_add(entry["id"], entry["terms"], frozenset(entry["skills"]))
+                else:
+                    self._apply_remove(entry["id"])
+                self.journal_entries += 1
+
+    def save(self) -> None:
+        """
+        Write a compacted snapshot as the next generation, switch CURRENT to it and
+        start an empty journal; the previous snapshot and journal are then deleted
+        """
+        if not self.path:
+            raise ValueError("This resume index has no path to save to")
+        with self._lock, self._synced(exclusive=True):
+            self._save()
+
+    def _save(self) -> None:
+        generation = self.generation + 1
+        live = [row for row, resume_id in enumerate(self.doc_ids) if resume_id is not None]
+        lengths = np.array([len(self.doc_term_ids[row]) for row in live], dtype=np.int64)
+        arrays = {
+            "offsets": np.concatenate([[0], np.cumsum(lengths)]),
+            "term_ids": np.concatenate([self.doc_term_ids[row] for row in live]) if live else np.zeros(0, np.int32),
+            "counts": np.concatenate([self.doc_counts[row] for row in live]) if live else np.zeros(0, np.float32),
+        }
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, f".snapshot-{generation}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, array in arrays.items():
+            with open(os.path.join(tmp, f"{name}.npy"), "wb") as f:
+                np.save(f, array)
+                f.flush()
+                os.fsync(f.fileno())
+        with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "terms": self.terms,
+                "docIds": [self.doc_ids[row] for row in live],
+                "skills": [sorted(self.doc_skills[row]) for row in live],
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(tmp)
+        os.replace(tmp, self._snapshot_path(generation))
+        open(self._journal_path(generation), "a").close()
+
+        current_tmp = os.path.join(self.path, "CURRENT.tmp")
+        with open(current_tmp, "w", encoding="ascii") as f:
+            f.write(str(generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(self.path, "CURRENT"))
+        _fsync_dir(self.path)
+
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        shutil.rmtree(self._snapshot_path(self.generation), ignore_errors=True)
+        try:
+            os.remove(self._journal_path(self.generation))
+        except FileNotFoundError:
+            pass
+        self.generation = generation
+        self.journal_entries = 0
+        self._journal_offset = 0
+        logger.info(f"Saved resume index with {len(live)} resumes to {self._snapshot_path(generation)}")
+
+    def _load_snapshot(self) -> None:
+        snapshot = self._snapshot_path(self.generation)
+        if not os.path.exists(os.path.join(snapshot, "index.json")):
+            return
+        with open(os.path.join(snapshot, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported resume index version: {meta.get('version')}")
+        offsets = np.load(os.path.join(snapshot, "offsets.npy"))
+        term_ids = np.load(os.path.join(snapshot, "term_ids.npy"))
+        counts = np.load(os.path.join(snapshot, "counts.npy"))
+        self.terms = meta["terms"]
+        self.vocabulary = {term: term_id for term_id, term in enumerate(self.terms)}
+        for row, resume_id in enumerate(meta["docIds"]):
+            start, end = offsets[row], offsets[row + 1]
+            self._append(resume_id, term_ids[start:end], counts[start:end], frozenset(meta["skills"][row]))
+
+    @classmethod
+    def load(cls, path: str) -> "ResumeIndex":
+        """Open the index at path: its current snapshot, if any, plus the journal written since"""
+        index = cls(path)
+        index.catch_up()
+        return index
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+_indexes: Dict[str, ResumeIndex] = {}
+_indexes_lock = threading.Lock()
+
+def index_path(name: str) -> str:
+    directory = os.getenv("RESUME_INDEX_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "data", "resume_index"
+    )
+    return os.path.join(directory, name)
+
+def get_resume_index(name: str) -> ResumeIndex:
+    """
+    Named (e.g. per-tenant) index, loaded from disk on first use or created empty
+    """
+    if not INDEX_NAME_RE.match(name):
+        raise ValueError(f"Invalid index name: {name}")
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None:
+            index = ResumeIndex.load(index_path(name))
+            if len(index):
+                logger.info(f"Loaded resume index '{name}' with {len(index)} resumes")
+            _indexes[name] = index
+        return index
+
+def save_resume_index(name: str) -> None:
+    get_resume_index(name).save()
+
+def save_all_indexes() -> None:
+    """Snapshot every loaded index with journaled changes, e.g. at shutdown"""
+    with _indexes_lock:
+        names = [name for name, index in _indexes.items() if index.dirty]
+    for name in names:
+        try:
+            save_resume_index(name)
+        except Exception as e:
+            logger.error(f"Failed to save resume index '{name}': {str(e)}")
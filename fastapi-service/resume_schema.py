@@ -0,0 +1,112 @@
+"""
+Fixed JSON schema for structured resume output, plus a strict, fast parser/validator for model responses
+"""
+
+import json
+import re
+from typing import Any, Dict, List
+
+def _string() -> Dict[str, Any]:
+    return {"type": "STRING"}
+
+def _array_of(items: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "ARRAY", "items": items}
+
+def _object(properties: Dict[str, Any], required: List[str] = None) -> Dict[str, Any]:
+    schema = {"type": "OBJECT", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
+
+# Mirrors the ResumeData interface the Next.js app renders (types/resume.ts).
+# Written in Gemini's responseSchema dialect so it can be sent as-is.
+RESUME_SCHEMA = _object(
+    {
+        "Personal Information": _object(
+            {"name": _string(), "address": _string(), "phone": _string(), "email": _string()},
+            required=["name", "email"],
+        ),
+        "Summary": _string(),
+        "Skills": _object(
+            {"Technical Skills": _array_of(_string()), "Soft Skills": _array_of(_string())},
+            required=["Technical Skills", "Soft Skills"],
+        ),
+        "Work Experience": _array_of(_object(
+            {"company": _string(), "position": _string(), "dates": _string(), "responsibilities": _string()},
+            required=["company", "position"],
+        )),
+        "Education": _array_of(_object(
+            {"institution": _string(), "degree": _string(), "dates": _string()},
+            required=["institution"],
+        )),
+        "Projects": _array_of(_object({"title": _string(), "description": _string()}, required=["title"])),
+        "Certifications": _array_of(_object(
+            {"name": _string(), "issuer": _string(), "details": _string()},
+            required=["name"],
+        )),
+        "Additional Information": _string(),
+    },
+    required=["Personal Information", "Skills", "Work Experience", "Education", "Projects", "Certifications"],
+)
+
+_PYTHON_TYPES = {
+    "OBJECT": dict,
+    "ARRAY": list,
+    "STRING": str,
+    "NUMBER": (int, float),
+    "INTEGER": int,
+    "BOOLEAN": bool,
+}
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*\n?(.*?)\n?\s*```$", re.DOTALL)
+
+class SchemaValidationError(ValueError):
+    """Raised when a model response does not match the expected schema"""
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors[:5]))
+        self.errors = errors
+
+def parse_json_response(text: str) -> Any:
+    """
+    Parse a model response as JSON, accepting an optional surrounding code fence.
+    Raises json.JSONDecodeError for anything that is not a single JSON document.
+    """
+    stripped = text.strip()
+    match = _FENCE_RE.match(stripped)
+    if match:
+        stripped = match.group(1)
+    return json.loads(stripped)
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check a parsed value against a responseSchema-style schema and list every mismatch
+    """
+    expected = _PYTHON_TYPES.get(schema.get("type", "").upper())
+    if expected is None:
+        return [f"{path}: unsupported schema type {schema.get('type')!r}"]
+    # bool is an int subclass; don't let True pass as a number
+    if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+        return [f"{path}: expected {schema['type'].lower()}, got {type(value).__name__}"]
+
+    errors = []
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required key {key!r}")
+        for key, child in schema.get("properties", {}).items():
+            if key in value and value[key] is not None:
+                errors.extend(schema_errors(value[key], child, f"{path}.{key}"))
+    elif isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{index}]"))
+    return errors
+
+def parse_and_validate(text: str, schema: Dict[str, Any] = RESUME_SCHEMA) -> Dict[str, Any]:
+    """
+    Parse a model response and validate it against the schema in one pass
+    """
+    data = parse_json_response(text)
+    errors = schema_errors(data, schema)
+    if errors:
+        raise SchemaValidationError(errors)
+    return data
@@ -0,0 +1,86 @@
+"""
+Multi-worker serving: worker sizing and memory-based worker recycling.
+
+Workers are recycled by gunicorn after WORKER_MAX_REQUESTS requests (see
+gunicorn.conf.py) and by MemoryRecycler once a worker's private memory passes
+WORKER_MAX_MEMORY_MB. Recycling means the worker finishes its in-flight requests
+and exits, and the master forks a fresh one from the preloaded image.
+"""
+
+import logging
+import os
+import signal
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 0 disables memory recycling; only enable it under a supervisor that replaces exited workers
+WORKER_MAX_MEMORY_MB = float(os.getenv("WORKER_MAX_MEMORY_MB", "0"))
+WORKER_MEMORY_CHECK_EVERY = int(os.getenv("WORKER_MEMORY_CHECK_EVERY", "50"))
+
+def default_worker_count() -> int:
+    """
+    WEB_CONCURRENCY if set, else one worker per core. Request handling is CPU bound
+    (parsing, scoring, OCR), so more workers than cores only adds memory.
+    """
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return max(1, os.cpu_count() or 1)
+
+def worker_private_bytes() -> Optional[int]:
+    """
+    Memory this process does not share with its master: private pages from
+    /proc/self/smaps_rollup, falling back to RSS. Pages still shared copy-on-write
+    with the preloaded master are not counted. None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            private_kb = 0
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private_kb += int(line.split()[1])
+            return private_kb * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryRecycler:
+    """
+    Checks the worker's private memory every few requests and asks the worker to
+    shut down gracefully (SIGTERM) once it is over the limit
+    """
+    def __init__(self, max_memory_mb: float = WORKER_MAX_MEMORY_MB, check_every: int = WORKER_MEMORY_CHECK_EVERY):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.check_every = max(1, check_every)
+        self._requests = 0
+        self._exiting = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def request_finished(self) -> None:
+        if not self.enabled or self._exiting:
+            return
+        with self._lock:
+            self._requests += 1
+            if self._requests % self.check_every:
+                return
+        used = worker_private_bytes()
+        if used is None or used <= self.max_bytes:
+            return
+        self._exiting = True
+        logger.warning(
+            f"Worker {os.getpid()} uses {used / 1048576:.0f}MB private memory "
+            f"(limit {self.max_bytes / 1048576:.0f}MB) after {self._requests} requests; recycling"
+        )
+        os.kill(os.getpid(), signal.SIGTERM)
+
+memory_recycler = MemoryRecycler()
@@ -0,0 +1,107 @@
+"""
+Fast skill extraction with a compiled phrase matcher over a loadable skill taxonomy.
+
+Only spaCy's tokenizer is used (no tagger, parser or NER), so multi-word skills
+such as "machine learning" match and aliases like "k8s" map to their canonical name.
+Canonical names and aliases of up to two characters ("R", "AI", "ML") only match as
+written in the taxonomy, since their lowercase forms turn up inside handles, units and unrelated words.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import spacy
+from spacy.matcher import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
+CASE_SENSITIVE_ALIAS_CHARS = 2
+
+# Only explicit URLs stay single tokens. spaCy's default URL pattern also swallows
+# slash lists of dotted names ("React.js/Vue.js"), which would then match nothing.
+_EXPLICIT_URL = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+
+def normalize_term(term: str) -> str:
+    """Lowercase a skill or alias, except short aliases, which keep the case they must appear in"""
+    term = term.strip()
+    return term if len(term) <= CASE_SENSITIVE_ALIAS_CHARS else term.lower()
+
+def load_taxonomy(paths: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Load and merge {canonical skill: [aliases]} JSON files; later files extend earlier ones
+    """
+    taxonomy: Dict[str, List[str]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for written, aliases in json.load(f).items():
+                canonical = written.lower().strip()
+                merged = taxonomy.setdefault(canonical, [])
+                # A short canonical name is kept as written, like a short alias
+                if len(canonical) <= CASE_SENSITIVE_ALIAS_CHARS:
+                    aliases = [written, *aliases]
+                for alias in map(normalize_term, aliases):
+                    if alias not in merged:
+                        merged.append(alias)
+    return taxonomy
+
+class SkillMatcher:
+    """
+    PhraseMatchers over every canonical skill and alias: case-insensitive, plus an
+    exact-case one for short names and aliases
+    """
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        # A blank pipeline is just the tokenizer
+        self.nlp = spacy.blank("en")
+        self.nlp.tokenizer.url_match = _EXPLICIT_URL.match
+        self.matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+        self.exact_matcher = PhraseMatcher(self.nlp.vocab, attr="ORTH")
+        self.taxonomy = taxonomy
+        for canonical, aliases in taxonomy.items():
+            short = [alias for alias in aliases if len(alias) <= CASE_SENSITIVE_ALIAS_CHARS]
+            terms = [term for term in (canonical, *aliases) if len(term) > CASE_SENSITIVE_ALIAS_CHARS]
+            if terms:
+                self.matcher.add(canonical, [self.nlp.make_doc(term) for term in terms])
+            if short:
+                self.exact_matcher.add(canonical, [self.nlp.make_doc(alias) for alias in short])
+        logger.info(f"Compiled skill matcher with {len(taxonomy)} skills")
+
+    def _skills_in(self, doc) -> List[str]:
+        seen = {}
+        matches = sorted(self.matcher(doc) + self.exact_matcher(doc), key=lambda match: match[1])
+        for match_id, _, _ in matches:
+            seen.setdefault(self.nlp.vocab.strings[match_id], None)
+        return list(seen)
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in text, in order of first appearance"""
+        return self._skills_in(self.nlp.make_doc(text))
+
+    def extract_batch(self, texts: List[str], batch_size: int = 64) -> List[List[str]]:
+        """Canonical skills for each text, tokenized in batches with nlp.pipe"""
+        return [self._skills_in(doc) for doc in self.nlp.pipe(texts, batch_size=batch_size)]
+
+_matcher: Optional[SkillMatcher] = None
+_matcher_lock = threading.Lock()
+
+def taxonomy_paths() -> List[str]:
+    """
+    The bundled taxonomy plus any extra files listed in SKILL_TAXONOMY_PATHS (os.pathsep-separated)
+    """
+    extra = [path for path in os.getenv("SKILL_TAXONOMY_PATHS", "").split(os.pathsep) if path]
+    return [DEFAULT_TAXONOMY_PATH, *extra]
+
+def get_skill_matcher() -> SkillMatcher:
+    """
+    Shared matcher, compiled on first use
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher(load_taxonomy(taxonomy_paths()))
+    return _matcher
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service is a flat set of modules; make them importable as in `python main.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
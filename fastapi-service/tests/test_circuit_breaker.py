@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import tempfile
+
+import fitz
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+from fake_gemini import FakeGeminiServer, FakeTransport
+from gemini import enhance_resume_with_ai
+from gemini_client import CircuitBreaker, GeminiClient, HttpTransport, set_gemini_client
+import main
+from pdf_parser import local_resume_data
+from resume_schema import RESUME_SCHEMA, schema_errors
+
+RESUME_TEXT = "Jane Doe\nSkills\nPython, Docker, Kubernetes\nExperience\nAcme Corp - Engineer"
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture(scope="module")
+def resume_pdf() -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    for line_number, line in enumerate(RESUME_TEXT.split("\n")):
+        page.insert_text((72, 72 + 16 * line_number), line)
+    return doc.tobytes()
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+    set_gemini_client(None)
+
+@pytest.fixture
+def server():
+    server = FakeGeminiServer(failure_rate=1.0).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def breaker(server, clock):
+    breaker = CircuitBreaker(min_calls=2, open_seconds=30, clock=clock)
+    set_gemini_client(GeminiClient(HttpTransport(server.url), max_retries=0, breaker=breaker))
+    return breaker
+
+def upload(client, pdf: bytes) -> dict:
+    response = client.post("/upload", files={"file": ("resume.pdf", pdf, "application/pdf")})
+    assert response.status_code == 200
+    return response.json()
+
+def stream(client, pdf: bytes, mode: str) -> dict:
+    response = client.post("/upload/stream", files={"file": ("resume.pdf", pdf, "application/pdf")}, data={"mode": mode})
+    assert response.status_code == 200
+    return {event["event"]: event for event in map(json.loads, response.text.splitlines())}
+
+def test_failures_open_the_breaker_and_uploads_degrade(client, resume_pdf, server, breaker):
+    for _ in range(2):
+        result = upload(client, resume_pdf)
+        assert result["enhanced"] is False
+        assert result["degraded"]["reason"] == "llm_error"
+    assert breaker.state == CircuitBreaker.OPEN
+
+    calls = server.calls
+    result = upload(client, resume_pdf)
+    assert result["degraded"]["reason"] == "circuit_open"
+    assert result["enhancedData"] == local_resume_data(result["originalText"])
+    assert schema_errors(result["enhancedData"], RESUME_SCHEMA) == []
+    assert result["enhancedData"]["Personal Information"]["name"] == "Jane Doe"
+    assert result["enhancedData"]["Skills"]["Technical Skills"] == ["docker", "kubernetes", "python"]
+    assert server.calls == calls
+
+def test_stream_degrades_while_open(client, resume_pdf, server, breaker):
+    for _ in range(2):
+        upload(client, resume_pdf)
+    calls = server.calls
+    events = stream(client, resume_pdf, "single")
+    assert "error" not in events
+    assert events["sections"]["source"] == "local"
+    assert events["enhancedData"]["enhanced"] is False
+    assert events["enhancedData"]["degraded"]["reason"] == "circuit_open"
+    assert server.calls == calls
+
+def test_two_pass_stream_failure_degrades(client, resume_pdf, server, breaker):
+    events = stream(client, resume_pdf, "two-pass")
+    assert "error" not in events
+    assert events["sections"]["source"] == "local"
+    assert events["enhancedData"]["enhanced"] is False
+    assert events["enhancedData"]["degraded"]["reason"] == "llm_error"
+
+def test_two_pass_stops_after_a_failed_first_pass(server, breaker):
+    result = asyncio.run(enhance_resume_with_ai(RESUME_TEXT, mode="two-pass"))
+    assert result["reason"] == "llm_error"
+    assert result["original_text"] == RESUME_TEXT
+    assert server.calls == 1
+
+def test_calls_refused_by_the_open_breaker_report_circuit_open(client, resume_pdf, server, breaker):
+    for _ in range(2):
+        upload(client, resume_pdf)
+    calls = server.calls
+    # Refused inside the client, after the unavailable_reason() check let the request through
+    for mode in ("single", "two-pass"):
+        assert asyncio.run(enhance_resume_with_ai(RESUME_TEXT, mode=mode))["reason"] == "circuit_open"
+    result = main.enhancement_failed(RESUME_TEXT, asyncio.run(enhance_resume_with_ai(RESUME_TEXT)))
+    assert result["degraded"]["reason"] == "circuit_open"
+    assert server.calls == calls
+
+@pytest.mark.parametrize("faults", [
+    {"failure_rate": 1.0, "failure_status": 403},
+    {"responder": lambda prompt: ""},
+], ids=["rejected-key", "empty-response"])
+def test_rejected_keys_and_empty_responses_open_the_breaker(client, resume_pdf, faults):
+    server = FakeGeminiServer(**faults).start()
+    try:
+        breaker = CircuitBreaker(min_calls=2, open_seconds=30, clock=Clock())
+        set_gemini_client(GeminiClient(HttpTransport(server.url), max_retries=0, breaker=breaker))
+        for _ in range(2):
+            assert upload(client, resume_pdf)["degraded"]["reason"] == "llm_error"
+        assert breaker.state == CircuitBreaker.OPEN
+        assert upload(client, resume_pdf)["degraded"]["reason"] == "circuit_open"
+    finally:
+        server.stop()
+
+def test_half_open_probe_closes_the_breaker(client, resume_pdf, server, breaker, clock):
+    for _ in range(2):
+        upload(client, resume_pdf)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    server.failure_rate = 0.0
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    result = upload(client, resume_pdf)
+    assert result["enhanced"] is True
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_missing_configuration_degrades_without_calling(client, resume_pdf):
+    class UnconfiguredTransport(FakeTransport):
+        def missing_configuration(self):
+            return "GEMINI_API_KEY is not set"
+
+    transport = UnconfiguredTransport()
+    set_gemini_client(GeminiClient(transport, max_retries=0))
+    result = upload(client, resume_pdf)
+    assert result["degraded"]["reason"] == "not_configured"
+    assert stream(client, resume_pdf, "single")["enhancedData"]["degraded"]["reason"] == "not_configured"
+    assert transport.calls == 0
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+import executor
+import main
+from executor import Stage, StageOverloaded
+
+def test_full_stage_rejects_instead_of_queueing():
+    stage = Stage("test", "thread", workers=1, queue_size=1, retry_after=3)
+    release = threading.Event()
+
+    async def overload():
+        running = [asyncio.ensure_future(stage.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert stage.pending == 2
+        with pytest.raises(StageOverloaded) as rejected:
+            await stage.run(lambda: None)
+        release.set()
+        await asyncio.gather(*running)
+        return rejected.value
+
+    rejected = asyncio.run(overload())
+    assert rejected.status_code == 503 and rejected.headers == {"Retry-After": "3"}
+    # Rejected and finished tasks both give their slot back
+    assert stage.pending == 0
+    stage.shutdown()
+
+def test_admit_holds_a_slot_for_async_work():
+    stage = Stage("test", "thread", workers=1, queue_size=0, retry_after=1)
+
+    async def nested():
+        async with stage.admit():
+            with pytest.raises(StageOverloaded):
+                async with stage.admit():
+                    pass
+        async with stage.admit():
+            return stage.pending
+
+    assert asyncio.run(nested()) == 1
+    assert stage.pending == 0
+
+def test_overloaded_stage_answers_503_with_retry_after(monkeypatch):
+    stage = Stage("score", "thread", workers=1, queue_size=0, retry_after=7)
+    monkeypatch.setitem(executor._stages, "score", stage)
+    monkeypatch.setattr(stage, "_pending", stage.capacity)
+    with TestClient(main.app) as client:
+        response = client.post("/ats-score", json={"resumeData": "Python developer", "jobDescription": "Python"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "7"
+        assert "score queue is full" in response.json()["detail"]
+
+        monkeypatch.setattr(stage, "_pending", 0)
+        assert client.post("/ats-score", json={"resumeData": "Python developer", "jobDescription": "Python"}).status_code == 200
+    stage.shutdown()
@@ -0,0 +1,66 @@
+import asyncio
+
+import extraction_cache
+from extraction_cache import ExtractionCache, content_key, digest_key
+
+def test_keys_cover_version_settings_and_content(monkeypatch):
+    key = content_key(b"%PDF-1", settings="dpi=300")
+    assert key != content_key(b"%PDF-2", settings="dpi=300")
+    assert key != content_key(b"%PDF-1", settings="dpi=200")
+    assert key != content_key(b"%PDF-1", namespace="ocr", settings="dpi=300")
+    monkeypatch.setattr(extraction_cache, "CACHE_VERSION", "old")
+    assert content_key(b"%PDF-1", settings="dpi=300") != key
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ExtractionCache(max_memory_bytes=50)
+    cache.put("a", "x" * 20)
+    cache.put("b", "y" * 20)
+    assert cache.get("a") == "x" * 20
+    cache.put("c", "z" * 20)
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    # Values larger than the whole budget are not kept in memory at all
+    cache.put("huge", "h" * 100)
+    assert cache.get("huge") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["memory_entries"] == 2 and stats["memory_bytes"] <= 50
+
+def test_disk_tier_survives_restarts_and_promotes_hits(tmp_path):
+    db_path = str(tmp_path / "cache" / "extraction.db")
+    key = digest_key("ab" * 32)
+    ExtractionCache(db_path=db_path).put(key, "Jane Doe\nPython")
+
+    restarted = ExtractionCache(db_path=db_path)
+    assert restarted.stats()["disk_bytes"] > 0
+    assert restarted.get(key) == "Jane Doe\nPython"
+    assert restarted.get(key) == "Jane Doe\nPython"
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["misses"] == 0
+
+def test_disk_tier_stays_within_its_budget(tmp_path):
+    cache = ExtractionCache(max_memory_bytes=0, db_path=str(tmp_path / "extraction.db"), max_disk_bytes=600)
+    for number in range(20):
+        # Incompressible-ish values, so each blob takes real space
+        cache.put(f"k{number}", "".join(chr(33 + (number * 7 + i * 13) % 90) for i in range(100)))
+    assert cache.stats()["disk_bytes"] <= 600
+    assert cache.get("k19") is not None
+    assert cache.get("k0") is None
+
+def test_async_access_matches_sync_access(tmp_path):
+    cache = ExtractionCache(db_path=str(tmp_path / "extraction.db"))
+
+    async def roundtrip():
+        await cache.put_async("key", "text")
+        assert await cache.get_async("key") == "text"
+        assert await cache.get_async("missing") is None
+
+    asyncio.run(roundtrip())
+    assert ExtractionCache(db_path=str(tmp_path / "extraction.db")).get("key") == "text"
+    assert cache.stats()["misses"] == 1
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = ExtractionCache(db_path=str(tmp_path / "extraction.db"))
+    cache.put("key", "text")
+    cache.clear()
+    assert cache.get("key") is None
+    assert cache.stats()["disk_bytes"] == 0
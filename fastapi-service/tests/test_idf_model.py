@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+import idf_model
+import main
+from idf_model import IdfModel, IdfModelUnavailable, get_idf_model, update_idf_model
+
+CORPUS = [
+    "Senior Python developer with Django and PostgreSQL",
+    "Frontend engineer, React and TypeScript",
+    "Python data engineer building Spark pipelines",
+]
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    # Each test starts without a loaded model
+    monkeypatch.setattr(idf_model, "_model", None)
+    monkeypatch.setattr(idf_model, "_model_stamp", None)
+    monkeypatch.setattr(idf_model, "_model_loaded", False)
+    path = str(tmp_path / "idf")
+    monkeypatch.setenv("ATS_IDF_MODEL_PATH", path)
+    return path
+
+def test_saved_model_loads_with_the_same_weights(model_path):
+    model = IdfModel.fit(CORPUS)
+    model.save(model_path)
+    loaded = get_idf_model()
+    assert loaded.terms == model.terms and loaded.n_docs == 3
+    # "python" is in two of three documents, so it weighs less than "react"
+    assert loaded.idf[loaded.vocabulary["python"]] < loaded.idf[loaded.vocabulary["react"]]
+    texts = ["Python and React developer"]
+    assert np.allclose(loaded.transform(texts).toarray(), model.transform(texts).toarray())
+
+def test_update_folds_documents_in_and_reloads_elsewhere(model_path, monkeypatch):
+    IdfModel.fit(CORPUS).save(model_path)
+    model, added = update_idf_model(["Go and Kubernetes platform engineer"])
+    assert added == 1 and model.n_docs == 4 and "kubernetes" in model.vocabulary
+    assert get_idf_model() is model
+
+    # Another worker saves a newer version; this one picks it up on the next call
+    other = IdfModel.load(model_path)
+    other.partial_fit(["Rust systems programmer"])
+    other.save(model_path)
+    assert get_idf_model().n_docs == 5
+
+def test_failed_save_leaves_the_shared_model_unchanged(model_path, monkeypatch):
+    IdfModel.fit(CORPUS).save(model_path)
+    before = get_idf_model()
+
+    def failing_save(self, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(IdfModel, "save", failing_save)
+    with pytest.raises(OSError):
+        update_idf_model(["Go and Kubernetes platform engineer"])
+    assert get_idf_model() is before
+    assert before.n_docs == 3 and "kubernetes" not in before.vocabulary
+
+def test_update_without_a_model(model_path, monkeypatch):
+    with pytest.raises(IdfModelUnavailable, match="fitted"):
+        update_idf_model(CORPUS)
+    monkeypatch.delenv("ATS_IDF_MODEL_PATH")
+    with pytest.raises(IdfModelUnavailable, match="configured"):
+        update_idf_model(CORPUS)
+
+def test_idf_documents_endpoint(model_path):
+    with TestClient(main.app) as client:
+        response = client.post("/idf/documents", json={"documents": CORPUS})
+        assert response.status_code == 409
+        assert "fitted" in response.json()["detail"]
+
+        IdfModel.fit(CORPUS).save(model_path)
+        response = client.post("/idf/documents", json={"documents": ["Go engineer"]})
+        assert response.status_code == 200
+        assert response.json()["documents"] == 4
+        assert client.post("/idf/documents", json={"documents": []}).status_code == 400
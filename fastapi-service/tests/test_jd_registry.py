@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+import jd_cache
+import main
+from ats_score import analyze_and_register, analyze_job_description, get_job_description
+from jd_cache import JobDescriptionCache, JobDescriptionRegistry
+
+JOB = "Backend engineer: Python, PostgreSQL and Kubernetes"
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = JobDescriptionRegistry(str(tmp_path / "jd.db"))
+    monkeypatch.setattr(jd_cache, "_registry", registry)
+    monkeypatch.setattr(jd_cache, "_cache", JobDescriptionCache())
+    return registry
+
+def forget_local_analyses(monkeypatch):
+    """Stand in for another worker, which only shares the registry"""
+    monkeypatch.setattr(jd_cache, "_cache", JobDescriptionCache())
+
+def test_inline_job_descriptions_are_not_registered(registry, monkeypatch):
+    analysis = analyze_job_description(JOB)
+    assert registry.get(analysis.id) is None
+    forget_local_analyses(monkeypatch)
+    with pytest.raises(KeyError):
+        get_job_description(analysis.id)
+
+def test_registered_ids_resolve_on_other_workers(registry, monkeypatch):
+    analysis = analyze_and_register(JOB)
+    forget_local_analyses(monkeypatch)
+    again = get_job_description(analysis.id)
+    assert again.id == analysis.id and again.skills == analysis.skills
+
+def test_registry_keeps_the_most_recently_used_entries(tmp_path):
+    registry = JobDescriptionRegistry(str(tmp_path / "jd.db"), max_entries=2)
+    registry.put("a", "first")
+    registry.put("b", "second")
+    assert registry.get("a") == "first"
+    registry.put("c", "third")
+    assert registry.get("b") is None
+    assert registry.get("a") == "first" and registry.get("c") == "third"
+
+def test_only_the_registration_endpoint_writes_the_registry(registry, monkeypatch):
+    with TestClient(main.app) as client:
+        scored = client.post("/ats-score", json={"resumeData": "Python developer", "jobDescription": JOB})
+        assert scored.status_code == 200
+        jd_id = scored.json()["analysis"]["jobDescriptionId"]
+        assert registry.get(jd_id) is None
+
+        registered = client.post("/job-descriptions", json={"jobDescription": JOB})
+        assert registered.json()["jobDescriptionId"] == jd_id
+        assert registry.get(jd_id) == JOB
+
+        forget_local_analyses(monkeypatch)
+        by_id = client.post("/ats-score", json={"resumeData": "Python developer", "jobDescriptionId": jd_id})
+        assert by_id.status_code == 200
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import jobs
+from ingest import IngestedUpload
+from jobs import JobQueue, LeaseLost
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 2)
+    return JobQueue(str(tmp_path))
+
+def enqueue(queue: JobQueue, key=None) -> dict:
+    upload = IngestedUpload("application/pdf", 5, "digest", data=b"%PDF-")
+    return queue.enqueue(upload, "resume.pdf", idempotency_key=key)
+
+def expire_leases(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", -1)
+
+def test_idempotency_key_returns_the_same_job(queue):
+    job = enqueue(queue, key="abc")
+    assert enqueue(queue, key="abc")["id"] == job["id"]
+    assert enqueue(queue, key="other")["id"] != job["id"]
+
+def test_expired_lease_is_reclaimed_and_fences_the_old_worker(queue, monkeypatch):
+    job = enqueue(queue)
+    expire_leases(monkeypatch)
+    first = queue.claim()
+    second = queue.claim()
+    assert first["id"] == second["id"] == job["id"]
+    assert second["attempts"] == 2
+    assert first["lease_token"] != second["lease_token"]
+
+    with pytest.raises(LeaseLost):
+        queue.complete(job["id"], first["lease_token"], {"stale": True})
+    with pytest.raises(LeaseLost):
+        queue.fail(job["id"], first["lease_token"], "boom", first["attempts"], first["max_attempts"])
+
+    queue.complete(job["id"], second["lease_token"], {"ok": True})
+    finished = queue.get(job["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["input_path"] is None
+    assert jobs.job_status(finished)["result"] == {"ok": True}
+
+def test_lease_expiry_on_the_last_attempt_fails_the_job(queue, monkeypatch):
+    job = enqueue(queue)
+    expire_leases(monkeypatch)
+    queue.claim()
+    last = queue.claim()
+    assert last["attempts"] == last["max_attempts"]
+
+    assert queue.claim() is None
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed"
+    assert "lease expired" in failed["error"]
+    assert failed["input_path"] is None
+    assert os.listdir(queue.inputs_dir) == []
+    with pytest.raises(LeaseLost):
+        queue.complete(job["id"], last["lease_token"], {})
+
+def test_failed_attempts_retry_until_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE", 0)
+    job = enqueue(queue)
+    claimed = queue.claim()
+    assert queue.fail(job["id"], claimed["lease_token"], "boom", claimed["attempts"], claimed["max_attempts"]) == "queued"
+    claimed = queue.claim()
+    assert queue.fail(job["id"], claimed["lease_token"], "boom", claimed["attempts"], claimed["max_attempts"]) == "failed"
+    assert queue.claim() is None
+    assert queue.counts() == {"failed": 1}
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pdf_parser
+from extraction_cache import digest_key, get_extraction_cache
+
+PAYLOAD = ("L", 1, 1, b"\xff")
+
+def units(*digests):
+    return [(page_num, digest, lambda: PAYLOAD) for page_num, digest in enumerate(digests)]
+
+def test_page_deadline_starts_when_the_page_runs(monkeypatch):
+    monkeypatch.setattr(pdf_parser, "OCR_PAGE_TIMEOUT", 0.3)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(time.sleep, 0.2)
+        # Queued behind the first page for 0.2s, then runs for 0.2s: within the deadline
+        second = pool.submit(lambda: time.sleep(0.2) or "text")
+        pdf_parser._await_ocr(first)
+        assert pdf_parser._await_ocr(second) == "text"
+
+        slow = pool.submit(time.sleep, 0.6)
+        with pytest.raises(FutureTimeoutError):
+            pdf_parser._await_ocr(slow)
+        assert not slow.cancel()
+
+def test_pages_waiting_too_long_for_a_worker_are_dropped(monkeypatch):
+    monkeypatch.setattr(pdf_parser, "OCR_QUEUE_TIMEOUT", 0.1)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(time.sleep, 0.4)
+        queued = pool.submit(str)
+        with pytest.raises(FutureTimeoutError):
+            pdf_parser._await_ocr(queued)
+        assert queued.cancel()
+
+def test_empty_ocr_results_are_not_cached(monkeypatch):
+    texts = iter(["", "Jane Doe"])
+    monkeypatch.setattr(pdf_parser, "ocr_page", lambda payload: next(texts))
+    cache = get_extraction_cache()
+    digest = f"test-empty-{time.time()}"
+
+    assert pdf_parser._run_page_ocr(iter(units(digest)), use_pool=False) == {0: ""}
+    assert cache.get(digest_key(digest, "ocr")) is None
+    assert pdf_parser._run_page_ocr(iter(units(digest)), use_pool=False) == {0: "Jane Doe"}
+    assert cache.get(digest_key(digest, "ocr")) is not None
+
+def test_repeated_images_are_recognized_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pdf_parser, "ocr_page", lambda payload: calls.append(payload) or "Logo")
+    digest = f"test-repeat-{time.time()}"
+    assert pdf_parser._run_page_ocr(iter(units(digest, digest, None)), use_pool=False) == {0: "Logo", 1: "Logo", 2: "Logo"}
+    assert len(calls) == 2
+
+def test_recycling_terminates_a_stuck_worker(monkeypatch):
+    monkeypatch.setattr(pdf_parser, "OCR_WORKERS", 2)
+    pdf_parser.shutdown_ocr_pool()
+    pool = pdf_parser.get_ocr_pool()
+    try:
+        stuck = pool.submit(time.sleep, 60)
+        deadline = time.monotonic() + 30
+        while not stuck.running() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.5)
+        pdf_parser.recycle_ocr_pool(pool)
+        with pytest.raises(BrokenProcessPool):
+            stuck.result(timeout=10)
+        assert pdf_parser.get_ocr_pool() is not pool
+    finally:
+        pdf_parser.shutdown_ocr_pool()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+import main
+from ats_score import analyze_job_description
+from resume_index import ResumeIndex
+
+RESUMES = [
+    ("alice", "Backend engineer. Python, Django, PostgreSQL, Docker and Kubernetes in production."),
+    ("bob", "Frontend developer building React and TypeScript single page apps."),
+    ("carol", "Data scientist using Python, pandas and scikit-learn for forecasting."),
+]
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "candidates")
+
+def ranked_ids(index: ResumeIndex, job_description: str = "Python backend engineer with Docker and Kubernetes"):
+    return [result["resumeId"] for result in index.query(analyze_job_description(job_description), top_k=10)]
+
+def test_query_ranks_the_best_match_first(path):
+    index = ResumeIndex.load(path)
+    index.add_many(RESUMES)
+    assert ranked_ids(index)[0] == "alice"
+    assert sorted(ranked_ids(index)) == ["alice", "bob", "carol"]
+
+def test_journal_is_replayed_after_a_crash(path):
+    index = ResumeIndex.load(path)
+    index.add_many(RESUMES[:2])
+    index.save()
+    index.add(*RESUMES[2])
+    index.remove("bob")
+    expected = ranked_ids(index)
+    # Crash: no save or close, and a journal write cut short mid-line
+    journal = os.path.join(path, f"journal-{index.generation}.jsonl")
+    with open(journal, "ab") as f:
+        f.write(b'{"op":"add","id":"dave","ter')
+
+    recovered = ResumeIndex.load(path)
+    assert len(recovered) == 2
+    assert ranked_ids(recovered) == expected
+
+    # The torn entry is dropped before the next append, so later entries stay readable
+    recovered.add("dave", "Go and Rust systems programmer")
+    assert sorted(ranked_ids(ResumeIndex.load(path))) == ["alice", "carol", "dave"]
+
+def test_remove_survives_reload_and_save(path):
+    index = ResumeIndex.load(path)
+    index.add_many(RESUMES)
+    assert index.remove("carol")
+    assert not index.remove("carol")
+    assert sorted(ranked_ids(ResumeIndex.load(path))) == ["alice", "bob"]
+
+    index.save()
+    reloaded = ResumeIndex.load(path)
+    assert sorted(ranked_ids(reloaded)) == ["alice", "bob"]
+    assert not reloaded.dirty
+
+def test_changes_from_another_process_are_picked_up(path):
+    first = ResumeIndex.load(path)
+    second = ResumeIndex.load(path)
+    first.add_many(RESUMES)
+    second.remove("alice")
+    first.save()
+    assert sorted(ranked_ids(first)) == ["bob", "carol"]
+    assert sorted(ranked_ids(second)) == ["bob", "carol"]
+
+def test_index_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESUME_INDEX_DIR", str(tmp_path))
+    resumes = [{"id": resume_id, "text": text} for resume_id, text in RESUMES]
+    with TestClient(main.app) as client:
+        assert client.post("/indexes/http-test/resumes", json={"resumes": resumes}).json()["size"] == 3
+        assert client.delete("/indexes/http-test/resumes/bob").json() == {"success": True, "size": 2}
+        assert client.delete("/indexes/http-test/resumes/bob").status_code == 404
+        assert client.delete("/indexes/bad%20name/resumes/bob").status_code == 400
+        results = client.post("/indexes/http-test/query", json={"jobDescription": "Python and Kubernetes"}).json()
+    assert [result["resumeId"] for result in results["results"]][0] == "alice"
+    assert sorted(ranked_ids(ResumeIndex.load(str(tmp_path / "http-test")))) == ["alice", "carol"]
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from skills import SkillMatcher, load_taxonomy, taxonomy_paths
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SkillMatcher(load_taxonomy(taxonomy_paths()))
+
+def test_aliases_map_to_canonical_skills(matcher):
+    assert matcher.extract("Deployed on k8s with Postgres and node js") == ["kubernetes", "postgresql", "node.js"]
+
+def test_hosting_products_are_not_git(matcher):
+    assert matcher.extract("GitHub: github.com/jdoe, GitLab CI") == []
+    assert matcher.extract("Git, GitHub") == ["git"]
+
+def test_short_aliases_only_match_as_written(matcher):
+    assert matcher.extract("AI/ML engineer") == ["artificial intelligence", "machine learning"]
+    assert matcher.extract("said ai, 5 ml of water, js") == []
+    assert matcher.extract("React, JS") == ["react", "javascript"]
+
+def test_slash_lists_of_dotted_names(matcher):
+    assert matcher.extract("React.js/Vue.js/Angular.js") == ["react", "vue", "angular"]
+    assert matcher.extract("Node.js/Express, CI/CD") == ["node.js", "express", "ci/cd"]
+
+def test_urls_do_not_leak_skills(matcher):
+    assert matcher.extract("Portfolio: https://github.com/jdoe/react-app") == []
+
+def test_extra_taxonomy_files_extend_the_bundled_one(tmp_path):
+    extra = tmp_path / "extra.json"
+    extra.write_text(json.dumps({"Kubernetes": ["K8S cluster"], "R": ["R"]}))
+    taxonomy = load_taxonomy([*taxonomy_paths(), str(extra)])
+    assert taxonomy["kubernetes"] == ["k8s", "k8s cluster"]
+    assert taxonomy["r"] == ["R"]
+
+def test_short_canonical_names_only_match_as_written(tmp_path):
+    extra = tmp_path / "extra.json"
+    extra.write_text(json.dumps({"R": [], "Go": []}))
+    matcher = SkillMatcher(load_taxonomy([*taxonomy_paths(), str(extra)]))
+    assert matcher.extract("Statistics in R, services in Go, C#") == ["r", "go", "c#"]
+    assert matcher.extract("r & d, go to market") == []
@@ -0,0 +1,59 @@
+import fitz
+
+from pdf_parser import PAGE_BREAK, clean_extracted_text, extract_text_from_pdf
+from prompt_prep import fit_to_budget, prepare_resume_text
+
+TWO_JOBS = """Jane Doe
+Experience
+Software Engineer
+Acme Corp, 2020 - 2023
+- Built REST APIs in Python
+- Built REST APIs in Python
+Software Engineer
+Globex, 2018 - 2020
+- Built REST APIs in Python
+Led a team of 12
+"""
+
+def pdf_with_pages(pages) -> bytes:
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for line_number, line in enumerate(lines):
+            page.insert_text((72, 72 + 16 * line_number), line)
+    return doc.tobytes()
+
+def test_repeated_titles_and_bullets_survive():
+    assert clean_extracted_text(TWO_JOBS).split("\n") == [
+        "Jane Doe",
+        "Experience",
+        "Software Engineer",
+        "Acme Corp, 2020 - 2023",
+        "- Built REST APIs in Python",
+        "Software Engineer",
+        "Globex, 2018 - 2020",
+        "- Built REST APIs in Python",
+        "Led a team of 12",
+    ]
+
+def test_noise_and_whitespace_are_dropped():
+    assert clean_extracted_text("  Skills:\t Python ,  Go \n----\n  •  \n\n12\n") == "Skills: Python , Go\n12"
+
+def test_running_headers_footers_and_page_numbers_are_dropped():
+    pages = [
+        ["Jane Doe - Resume", "Experience", "Software Engineer", "Acme Corp", "Confidential", "Page 1 of 2"],
+        ["Jane Doe - Resume", "Software Engineer", "Globex", "3", "Confidential", "Page 2 of 2"],
+    ]
+    text = extract_text_from_pdf(pdf_with_pages(pages))
+    assert text.count(PAGE_BREAK) == 1
+    assert clean_extracted_text(text).split("\n") == [
+        "Jane Doe - Resume", "Experience", "Software Engineer", "Acme Corp", "Confidential",
+        "Software Engineer", "Globex", "3",
+    ]
+
+def test_budget_keeps_every_section_heading():
+    text = "Jane Doe\nExperience\n" + "\n".join(f"- bullet {i}" for i in range(200)) + "\nEducation\nMIT"
+    fitted = fit_to_budget(text, 50).split("\n")
+    assert "Experience" in fitted and "Education" in fitted and "MIT" in fitted
+    assert len("\n".join(fitted)) <= 200
+    assert prepare_resume_text(TWO_JOBS) == clean_extracted_text(TWO_JOBS)
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+
+import fitz
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+from extraction_cache import get_extraction_cache
+from fake_gemini import SAMPLE_SECTIONS, FakeTransport
+from gemini_client import GeminiClient, set_gemini_client
+import main
+
+RESUME_TEXT = "Jane Doe\nSkills\nPython, FastAPI\nExperience\nAcme Corp - Engineer"
+
+@pytest.fixture(scope="module")
+def client():
+    set_gemini_client(GeminiClient(FakeTransport(), max_retries=0))
+    with TestClient(main.app) as client:
+        yield client
+    set_gemini_client(None)
+
+@pytest.fixture
+def resume_pdf() -> bytes:
+    get_extraction_cache().clear()
+    doc = fitz.open()
+    page = doc.new_page()
+    for line_number, line in enumerate(RESUME_TEXT.split("\n")):
+        page.insert_text((72, 72 + 16 * line_number), line)
+    return doc.tobytes()
+
+def stream(client, pdf: bytes, mode: str = "two-pass", accept: str = "application/x-ndjson"):
+    return client.post(
+        "/upload/stream",
+        files={"file": ("resume.pdf", pdf, "application/pdf")},
+        data={"mode": mode},
+        headers={"Accept": accept},
+    )
+
+@pytest.mark.parametrize("mode, source", [("two-pass", "gemini"), ("single", "local")])
+def test_ndjson_events_arrive_in_stage_order(client, resume_pdf, mode, source):
+    response = stream(client, resume_pdf, mode)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["fileType", "originalText", "sections", "enhancedData"]
+
+    file_type, original, sections, final = events
+    assert file_type["fileType"] == "application/pdf" and file_type["cached"] is False
+    assert original["originalText"].startswith("Jane Doe")
+    assert sections["source"] == source
+    assert final["enhanced"] is True and final["enhancedData"] == SAMPLE_SECTIONS
+    # Timings are cumulative, so each event carries the stages before it
+    assert set(final["timingsMs"]) == {"detect", "extract", "sections", "enhance"}
+
+def test_repeated_upload_is_served_from_the_cache(client, resume_pdf):
+    stream(client, resume_pdf)
+    events = [json.loads(line) for line in stream(client, resume_pdf).text.splitlines()]
+    assert events[0]["cached"] is True
+
+def test_sse_when_the_client_accepts_event_streams(client, resume_pdf):
+    response = stream(client, resume_pdf, accept="text/event-stream")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    assert [frame.split("\n")[0] for frame in frames] == [
+        "event: fileType", "event: originalText", "event: sections", "event: enhancedData",
+    ]
+    assert json.loads(frames[-1].split("\n")[1][len("data: "):])["enhanced"] is True
+
+def test_unreadable_upload_is_rejected_before_the_stream_starts(client):
+    response = client.post("/upload/stream", files={"file": ("notes.txt", b"plain text", "text/plain")})
+    assert response.status_code == 400
+
+def test_non_streaming_upload_returns_the_same_result(client, resume_pdf):
+    response = client.post("/upload", files={"file": ("resume.pdf", resume_pdf, "application/pdf")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enhanced"] is True and body["enhancedData"] == SAMPLE_SECTIONS
+    assert body["originalText"].startswith("Jane Doe")
@@ -0,0 +1,96 @@
+import io
+import os
+import tempfile
+import zipfile
+
+import fitz
+import pytest
+
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("JOBS_DIR", tempfile.mkdtemp(prefix="jobs-"))
+
+from fastapi.testclient import TestClient
+
+import ingest
+import main
+from docx_parser import DOCX_MIME, ZIP_MIME
+from pdf_parser import detect_file_type
+
+ORIGIN = "http://localhost:3000"
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+def pdf_bytes(pages: int = 1) -> bytes:
+    doc = fitz.open()
+    for page_number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Jane Doe page {page_number + 1}")
+    return doc.tobytes()
+
+DOCUMENT_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:body><w:p><w:r><w:t>Jane Doe</w:t></w:r></w:p><w:p><w:r><w:t>Python developer</w:t></w:r></w:p></w:body>"
+    "</w:document>"
+)
+
+def zip_bytes(parts) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in parts:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+def libreoffice_docx() -> bytes:
+    """Parts in the order LibreOffice writes them, relationships first"""
+    return zip_bytes([
+        ("_rels/.rels", "<Relationships/>" + " " * 1024),
+        ("docProps/app.xml", "<Properties/>"),
+        ("word/document.xml", DOCUMENT_XML),
+        ("[Content_Types].xml", "<Types/>"),
+    ])
+
+def post(client, content: bytes, name: str = "resume.pdf"):
+    return client.post("/upload", files={"file": (name, content, "application/pdf")}, headers={"Origin": ORIGIN})
+
+def test_declared_oversized_upload_is_readable_by_the_browser(client, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_UPLOAD_BYTES", 1024)
+    response = post(client, b"%PDF-" + b"0" * (ingest.MULTIPART_OVERHEAD_BYTES + 4096))
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert "x-request-id" in response.headers
+    assert "server-timing" in response.headers
+
+def test_oversized_file_is_rejected_while_streaming(client, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_UPLOAD_BYTES", 1024)
+    response = post(client, b"%PDF-" + b"0" * 4096)
+    assert response.status_code == 413
+    assert "limit" in response.json()["detail"]
+
+def test_too_many_pages_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_PDF_PAGES", 2)
+    response = post(client, pdf_bytes(pages=3))
+    assert response.status_code == 413
+    assert "3 pages" in response.json()["detail"]
+
+def test_unsupported_and_empty_files_are_rejected(client):
+    assert post(client, b"plain text, not a resume file", "resume.txt").status_code == 400
+    assert post(client, b"").status_code == 400
+
+def test_docx_is_recognized_whatever_its_part_order():
+    docx = libreoffice_docx()
+    assert detect_file_type(docx[:ingest.SNIFF_BYTES]) == ZIP_MIME
+    assert detect_file_type(docx) == DOCX_MIME
+    assert detect_file_type(zip_bytes([("notes.txt", "hello")])) == ZIP_MIME
+
+def test_docx_upload_with_relationships_first(client):
+    response = post(client, libreoffice_docx(), "resume.docx")
+    assert response.status_code == 200
+    assert response.json()["originalText"] == "Jane Doe\nPython developer"
+
+def test_other_zips_are_rejected(client):
+    response = post(client, zip_bytes([("word/notes.txt", "hello")]), "archive.zip")
+    assert response.status_code == 400
+    assert "Unsupported file type" in response.json()["detail"]
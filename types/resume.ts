@@ -3,6 +3,14 @@ export interface APIResponse {
   filename: string;
   originalText: string;
   enhancedData: ResumeData;
+  // false when AI enhancement was unavailable and enhancedData holds the service's local parse
+  enhanced: boolean;
+  degraded?: DegradedInfo;
+}
+
+export interface DegradedInfo {
+  reason: "not_configured" | "circuit_open" | "llm_error";
+  detail: string;
 }
 
 export interface ResumeData {